@@ -0,0 +1,153 @@
+# dataset.py — synthetic dori_bot.db generator for benchmarks and load tests
+#
+#   python -m benchmarks.dataset --words 100000 --students 5000 --progress 2000000 out.db
+
+import argparse
+import os
+import random
+import sqlite3
+import string
+import time
+from datetime import datetime, timedelta
+
+from bot.database.schema import initialize_db
+
+
+class DatasetConfig:
+    DATA_DIR = os.path.join(os.path.dirname(__file__), "data")
+    LEVELS = ("A1", "A2", "B1")
+    PARTS_OF_SPEECH = ("noun", "verb", "adjective", "adverb", "phrase", "phrasal verb")
+    TEACHERS = 10
+    TEACHER_WORD_SHARE = 0.3    # доля слов, добавленных преподавателями
+    MODULES = 40
+    BATCH_SIZE = 10000
+
+
+def _token(rng: random.Random, alphabet: str, low: int = 3, high: int = 10) -> str:
+    return "".join(rng.choice(alphabet) for _ in range(rng.randint(low, high)))
+
+
+def default_path(words: int, students: int, progress: int, seed: int) -> str:
+    return os.path.join(DatasetConfig.DATA_DIR, f"dori_w{words}_s{students}_p{progress}_seed{seed}.db")
+
+
+def generate(path: str, words: int, students: int, progress: int, seed: int = 42) -> dict:
+    """Create a fresh database at path filled with deterministic synthetic data."""
+    if os.path.exists(path):
+        os.remove(path)
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    initialize_db(path)
+
+    rng = random.Random(seed)
+    started = time.perf_counter()
+    base_time = datetime(2025, 1, 1)
+    latin = string.ascii_lowercase
+    cyrillic = "абвгдеёжзийклмнопрстуфхцчшщьыэюя"
+
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA synchronous = OFF")
+    cur = conn.cursor()
+
+    teachers = DatasetConfig.TEACHERS
+    cur.executemany(
+        "INSERT INTO StudentSession (telegram_id, role, level, score, last_active) VALUES (?, ?, ?, ?, ?)",
+        (
+            (
+                1_000_000 + i,
+                "teacher" if i < teachers else "student",
+                rng.choice(DatasetConfig.LEVELS),
+                0,
+                (base_time + timedelta(days=rng.randint(0, 180))).date(),
+            )
+            for i in range(teachers + students)
+        ),
+    )
+    # StudentSession_ID 1..teachers — преподаватели, дальше студенты
+
+    teacher_words = int(words * DatasetConfig.TEACHER_WORD_SHARE)
+
+    def word_rows():
+        for i in range(words):
+            is_teacher = i < teacher_words
+            owner = rng.randint(1, teachers) if is_teacher else rng.randint(teachers + 1, teachers + students)
+            synonyms = ", ".join(_token(rng, latin) for _ in range(rng.randint(0, 3))) or None
+            yield (
+                f"{_token(rng, latin)}{i}",
+                f"{_token(rng, cyrillic)}{i}",
+                rng.choice(DatasetConfig.PARTS_OF_SPEECH),
+                "teacher" if is_teacher else "student",
+                base_time + timedelta(minutes=i),
+                rng.choice(DatasetConfig.LEVELS),
+                owner,
+                synonyms,
+                str(rng.randint(1, DatasetConfig.MODULES)) if is_teacher else None,
+            )
+
+    cur.executemany("""
+        INSERT INTO Word (Text, translation, part_of_speech, added_by, created_at, level, StudentSession_ID, synonyms, module)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """, word_rows())
+
+    # Прогресс: у каждого студента — свой набор уникальных слов из общего (учительского) пула
+    per_student, extra = divmod(progress, students) if students else (0, 0)
+    pool = max(teacher_words, 1)
+
+    def progress_rows():
+        for s in range(students):
+            session_id = teachers + 1 + s
+            count = min(per_student + (1 if s < extra else 0), pool)
+            for word_id in rng.sample(range(1, pool + 1), count):
+                yield (
+                    session_id,
+                    word_id,
+                    rng.randint(0, 10),
+                    rng.randint(0, 5),
+                    base_time + timedelta(minutes=rng.randint(0, 260000)),
+                )
+
+    rows = progress_rows()
+    while True:
+        batch = [row for _, row in zip(range(DatasetConfig.BATCH_SIZE), rows)]
+        if not batch:
+            break
+        cur.executemany("""
+            INSERT INTO PracticeProgress (StudentSession_ID, Word_ID, correct_count, incorrect_count, last_practiced)
+            VALUES (?, ?, ?, ?, ?)
+        """, batch)
+
+    conn.commit()
+    conn.close()
+    return {
+        "path": path,
+        "words": words,
+        "students": students,
+        "teachers": teachers,
+        "progress": progress,
+        "seed": seed,
+        "seconds": round(time.perf_counter() - started, 2),
+    }
+
+
+def ensure_dataset(words: int, students: int, progress: int, seed: int = 42, path: str = None) -> str:
+    """Return the path of a cached dataset for these parameters, generating it on first use."""
+    path = path or default_path(words, students, progress, seed)
+    if not os.path.exists(path):
+        generate(path, words, students, progress, seed)
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic dori_bot.db")
+    parser.add_argument("path", nargs="?", help="output file (default: benchmarks/data/...)")
+    parser.add_argument("--words", type=int, default=100_000)
+    parser.add_argument("--students", type=int, default=5_000)
+    parser.add_argument("--progress", type=int, default=2_000_000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    path = args.path or default_path(args.words, args.students, args.progress, args.seed)
+    info = generate(path, args.words, args.students, args.progress, args.seed)
+    print(f"Generated {info['path']} in {info['seconds']} s")
+
+
+if __name__ == "__main__":
+    main()
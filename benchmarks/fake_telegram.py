@@ -0,0 +1,129 @@
+# fake_telegram.py — local stand-in for the Telegram Bot API
+#
+# Answers every Bot API method with a plausible result so the real Dispatcher
+# and handlers can run without network access, and counts the calls made.
+
+import itertools
+import time
+from collections import Counter, defaultdict
+from typing import Optional
+
+from aiogram.client.session.base import BaseSession
+from aiogram.methods.base import Response
+from aiohttp import web
+
+
+class FakeTelegramAPI:
+    BOT_USER = {"id": 123456, "is_bot": True, "first_name": "Dori", "username": "dori_test_bot"}
+    MESSAGE_METHODS = {
+        "sendMessage", "sendPhoto", "sendDocument", "editMessageText",
+        "editMessageCaption", "editMessageMedia", "editMessageReplyMarkup",
+    }
+
+    def __init__(self):
+        self.calls = Counter()                  # метод -> число вызовов
+        self.chat_calls = Counter()             # chat_id -> число вызовов
+        self.chat_methods = defaultdict(Counter)
+        self._message_ids = defaultdict(lambda: itertools.count(1_000_000))
+        self._file_ids = itertools.count(1)
+
+    def reset(self):
+        self.calls.clear()
+        self.chat_calls.clear()
+        self.chat_methods.clear()
+
+    def handle(self, method: str, params: dict):
+        self.calls[method] += 1
+        chat_id = _as_int(params.get("chat_id"))
+        if chat_id is not None:
+            self.chat_calls[chat_id] += 1
+            self.chat_methods[chat_id][method] += 1
+
+        if method == "getMe":
+            return self.BOT_USER
+        if method == "getUpdates":
+            return []
+        if method in self.MESSAGE_METHODS:
+            if chat_id is None:
+                return True  # inline-сообщения: Telegram возвращает True
+            return self._message(method, chat_id, params)
+        return True
+
+    def _message(self, method: str, chat_id: int, params: dict) -> dict:
+        message_id = _as_int(params.get("message_id")) or next(self._message_ids[chat_id])
+        message = {
+            "message_id": message_id,
+            "date": int(time.time()),
+            "chat": {"id": chat_id, "type": "private"},
+            "from": self.BOT_USER,
+        }
+        if method in ("sendPhoto", "editMessageMedia"):
+            file_id = f"photo{next(self._file_ids)}"
+            message["photo"] = [{"file_id": file_id, "file_unique_id": file_id, "width": 820, "height": 620}]
+        elif method == "sendDocument":
+            file_id = f"doc{next(self._file_ids)}"
+            message["document"] = {"file_id": file_id, "file_unique_id": file_id}
+        if "caption" in params:
+            message["caption"] = params["caption"]
+        if "text" in params:
+            message["text"] = params["text"]
+        return message
+
+    # --- HTTP server ---
+
+    async def _http_handler(self, request: web.Request) -> web.Response:
+        method = request.match_info["method"]
+        form = await request.post()
+        params = {key: value for key, value in form.items() if isinstance(value, str)}
+        return web.json_response({"ok": True, "result": self.handle(method, params)})
+
+    async def start_server(self, host: str = "127.0.0.1", port: int = 0) -> "FakeTelegramServer":
+        app = web.Application(client_max_size=50 * 1024 * 1024)
+        app.router.add_post("/bot{token}/{method}", self._http_handler)
+        runner = web.AppRunner(app, access_log=None)
+        await runner.setup()
+        site = web.TCPSite(runner, host, port)
+        await site.start()
+        bound_port = runner.addresses[0][1]
+        return FakeTelegramServer(runner, f"http://{host}:{bound_port}")
+
+
+class FakeTelegramServer:
+    def __init__(self, runner: web.AppRunner, url: str):
+        self.runner = runner
+        self.url = url
+
+    async def close(self):
+        await self.runner.cleanup()
+
+
+class StubSession(BaseSession):
+    """In-process aiogram session: Bot API calls are answered by FakeTelegramAPI without HTTP."""
+
+    def __init__(self, api: FakeTelegramAPI, **kwargs):
+        super().__init__(**kwargs)
+        self.fake_api = api
+
+    async def make_request(self, bot, method, timeout=None):
+        params = {
+            key: value for key, value in method.model_dump(warnings=False).items()
+            if isinstance(value, (str, int))
+        }
+        result = self.fake_api.handle(method.__api_method__, params)
+        response = Response[method.__returning__].model_validate(
+            {"ok": True, "result": result}, context={"bot": bot}
+        )
+        return response.result
+
+    async def stream_content(self, url, headers=None, timeout=30, chunk_size=65536, raise_for_status=True):
+        yield b""
+
+    async def close(self):
+        pass
+
+
+def _as_int(value) -> Optional[int]:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None  # None или @username канала
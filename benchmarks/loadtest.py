@@ -0,0 +1,253 @@
+# loadtest.py — end-to-end load test of the real Dispatcher against a fake Bot API
+#
+#   python -m benchmarks.loadtest --students 2000 --teachers 20 --answers 10
+#
+# Every simulated student goes through /start, flashcards_start, module selection,
+# a number of answers and /stopcard; teachers upload word batches. Updates are fed
+# through Dispatcher.feed_update, all outgoing Bot API calls go over HTTP to
+# benchmarks.fake_telegram.
+
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import random
+import shutil
+import statistics
+import tempfile
+import time
+from collections import defaultdict
+from datetime import datetime
+
+from aiogram import Bot
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import TelegramAPIServer
+from aiogram.fsm.storage.base import StorageKey
+from aiogram.types import CallbackQuery, Chat, Message, Update, User
+
+from benchmarks.dataset import ensure_dataset
+from benchmarks.fake_telegram import FakeTelegramAPI
+from bot.database import db_helpers
+from bot.database.schema import initialize_db
+from bot.dispatcher import create_dispatcher
+from bot.services.metrics import metrics
+from bot.services.send_scheduler import SendScheduler
+
+
+class LoadConfig:
+    STUDENT_ID_BASE = 50_000_000
+    TEACHER_ID_BASE = 60_000_000
+    BOT_TOKEN = "123456:LOADTEST"
+
+
+def percentile(ordered: list, q: float) -> float:
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(len(ordered) * q))]
+
+
+class UpdateFactory:
+    def __init__(self, bot_user: User):
+        self.bot_user = bot_user
+        self._update_ids = itertools.count(1)
+        self._message_ids = itertools.count(1)
+        self._callback_ids = itertools.count(1)
+
+    def _user(self, user_id: int) -> User:
+        return User(id=user_id, is_bot=False, first_name=f"user{user_id}")
+
+    def message(self, user_id: int, text: str) -> Update:
+        return Update(update_id=next(self._update_ids), message=Message(
+            message_id=next(self._message_ids),
+            date=datetime.now(),
+            chat=Chat(id=user_id, type="private"),
+            from_user=self._user(user_id),
+            text=text,
+        ))
+
+    def callback(self, user_id: int, data: str) -> Update:
+        return Update(update_id=next(self._update_ids), callback_query=CallbackQuery(
+            id=str(next(self._callback_ids)),
+            from_user=self._user(user_id),
+            chat_instance=str(user_id),
+            message=Message(
+                message_id=next(self._message_ids),
+                date=datetime.now(),
+                chat=Chat(id=user_id, type="private"),
+                from_user=self.bot_user,
+                text="menu",
+            ),
+            data=data,
+        ))
+
+
+class LoadTest:
+    def __init__(self, dp, bot: Bot, api: FakeTelegramAPI, args):
+        self.dp = dp
+        self.bot = bot
+        self.api = api
+        self.args = args
+        self.factory = UpdateFactory(User(**FakeTelegramAPI.BOT_USER))
+        self.latencies = defaultdict(list)     # шаг -> [секунды]
+        self.turn_calls = []                   # API-вызовы на один ответ во флеш-картах
+        self.errors = defaultdict(int)
+        self.updates = 0
+        self.rng = random.Random(args.seed)
+
+    async def step(self, name: str, user_id: int, update: Update) -> int:
+        before = self.api.chat_calls[user_id]
+        start = time.perf_counter()
+        try:
+            await self.dp.feed_update(self.bot, update)
+        except Exception as e:
+            self.errors[f"{name}: {type(e).__name__}"] += 1
+        self.latencies[name].append(time.perf_counter() - start)
+        self.updates += 1
+        if self.args.think:
+            await asyncio.sleep(self.rng.uniform(0, self.args.think))
+        return self.api.chat_calls[user_id] - before
+
+    async def student(self, user_id: int, modules: list):
+        await asyncio.sleep(self.rng.uniform(0, self.args.ramp))
+        await self.step("start", user_id, self.factory.message(user_id, "/start"))
+        await self.step("flashcards_start", user_id, self.factory.callback(user_id, "flashcards_start"))
+        module = self.rng.choice(modules) if modules else "все"
+        await self.step("select_module", user_id, self.factory.message(user_id, module))
+
+        key = StorageKey(bot_id=self.bot.id, chat_id=user_id, user_id=user_id)
+        for _ in range(self.args.answers):
+            word = (await self.dp.storage.get_data(key)).get("current_word")
+            if not word:
+                break
+            answer = word["Text"] if self.rng.random() < self.args.correct_rate else "wrong answer"
+            self.turn_calls.append(await self.step("answer", user_id, self.factory.message(user_id, answer)))
+        await self.step("stopcard", user_id, self.factory.message(user_id, "/stopcard"))
+
+    async def teacher(self, user_id: int):
+        await asyncio.sleep(self.rng.uniform(0, self.args.ramp))
+        for batch in range(self.args.batches):
+            lines = "\n".join(
+                f"load{user_id}x{batch}x{i} - нагрузка{user_id}x{batch}x{i} - test - {self.rng.randint(1, 40)}"
+                for i in range(self.args.batch_size)
+            )
+            await self.step("teacher_add_batch", user_id, self.factory.callback(user_id, "add_batch"))
+            await self.step("teacher_batch_input", user_id, self.factory.message(user_id, lines))
+            await self.step("teacher_confirm_batch", user_id, self.factory.callback(user_id, "confirm_batch"))
+
+    async def run(self) -> dict:
+        modules = db_helpers.get_all_modules()
+        students = [LoadConfig.STUDENT_ID_BASE + i for i in range(self.args.students)]
+        teachers = [LoadConfig.TEACHER_ID_BASE + i for i in range(self.args.teachers)]
+        for user_id in teachers:
+            db_helpers.get_or_create_session(user_id, role="teacher")
+
+        self.api.reset()
+        started = time.perf_counter()
+        await asyncio.gather(
+            *(self.student(user_id, modules) for user_id in students),
+            *(self.teacher(user_id) for user_id in teachers),
+        )
+        elapsed = time.perf_counter() - started
+
+        # Отложенные удаления карточек (delete_message_later) — тоже будущие API-вызовы
+        pending = [
+            t for t in asyncio.all_tasks()
+            if t is not asyncio.current_task() and "delete_message_later" in getattr(t.get_coro(), "__qualname__", "")
+        ]
+        for task in pending:
+            task.cancel()
+        return self.report(elapsed, len(pending))
+
+    def report(self, elapsed: float, deferred_calls: int) -> dict:
+        steps = {}
+        for name, samples in self.latencies.items():
+            ordered = sorted(samples)
+            steps[name] = {
+                "count": len(ordered),
+                "p50_ms": percentile(ordered, 0.50) * 1000,
+                "p95_ms": percentile(ordered, 0.95) * 1000,
+                "p99_ms": percentile(ordered, 0.99) * 1000,
+                "max_ms": ordered[-1] * 1000,
+            }
+        turns = len(self.turn_calls)
+        return {
+            "students": self.args.students,
+            "teachers": self.args.teachers,
+            "elapsed_s": elapsed,
+            "updates": self.updates,
+            "updates_per_sec": self.updates / elapsed if elapsed else 0.0,
+            "api_calls": sum(self.api.calls.values()),
+            "api_calls_by_method": dict(self.api.calls.most_common()),
+            "api_calls_per_turn": statistics.fmean(self.turn_calls) if turns else 0.0,
+            "deferred_calls_per_turn": deferred_calls / turns if turns else 0.0,
+            "steps": steps,
+            "send_wait": {k: v for k, v in metrics.snapshot()["summaries"].items() if k.startswith("send.")},
+            "errors": dict(self.errors),
+        }
+
+
+def print_report(report: dict):
+    print(f"{report['updates']} updates in {report['elapsed_s']:.1f} s "
+          f"({report['updates_per_sec']:.0f} updates/s), {report['api_calls']} API calls")
+    print(f"API calls per flashcard turn: {report['api_calls_per_turn']:.2f} "
+          f"(+{report['deferred_calls_per_turn']:.2f} deferred deletions)")
+    print(f"{'step':<24} {'count':>7} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+    for name, s in report["steps"].items():
+        print(f"{name:<24} {s['count']:>7} {s['p50_ms']:>9.2f} {s['p95_ms']:>9.2f} {s['p99_ms']:>9.2f} {s['max_ms']:>9.2f}")
+    print("API calls by method: " + ", ".join(f"{m}={n}" for m, n in report["api_calls_by_method"].items()))
+    for name, s in report["send_wait"].items():
+        print(f"{name}: n={s['count']} avg {s['avg'] * 1000:.1f} ms, p95 {s['p95'] * 1000:.1f} ms, max {s['max'] * 1000:.1f} ms")
+    if report["errors"]:
+        print("Errors: " + ", ".join(f"{k} x{v}" for k, v in report["errors"].items()))
+
+
+async def run(args) -> dict:
+    api = FakeTelegramAPI()
+    server = await api.start_server()
+    bot = Bot(token=LoadConfig.BOT_TOKEN, session=AiohttpSession(api=TelegramAPIServer.from_base(server.url)))
+    if args.send_scheduler:
+        bot.session.middleware(SendScheduler())
+    dp = create_dispatcher()
+    try:
+        return await LoadTest(dp, bot, api, args).run()
+    finally:
+        await bot.session.close()
+        await server.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test Dori Bot against a fake Bot API server")
+    parser.add_argument("--students", type=int, default=1000)
+    parser.add_argument("--teachers", type=int, default=10)
+    parser.add_argument("--answers", type=int, default=10, help="flashcard answers per student")
+    parser.add_argument("--correct-rate", type=float, default=0.7)
+    parser.add_argument("--batches", type=int, default=3, help="batch uploads per teacher")
+    parser.add_argument("--batch-size", type=int, default=20, help="words per batch upload")
+    parser.add_argument("--think", type=float, default=0.0, help="max think time between steps, s")
+    parser.add_argument("--ramp", type=float, default=0.0, help="spread user start times over N s")
+    parser.add_argument("--send-scheduler", action="store_true",
+                        help="send through the outbound scheduler with Telegram rate limits, as in production")
+    parser.add_argument("--db", help="existing database to copy (default: synthetic dataset)")
+    parser.add_argument("--words", type=int, default=20_000)
+    parser.add_argument("--dataset-students", type=int, default=1_000)
+    parser.add_argument("--progress", type=int, default=100_000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--out", help="write the report as JSON here")
+    args = parser.parse_args()
+
+    source = args.db or ensure_dataset(args.words, args.dataset_students, args.progress, args.seed)
+    with tempfile.TemporaryDirectory() as tmp:
+        db_helpers.DB_PATH = os.path.join(tmp, "dori_bot.db")
+        shutil.copyfile(source, db_helpers.DB_PATH)
+        initialize_db(db_helpers.DB_PATH)  # миграции схемы для копий старых баз
+        report = asyncio.run(run(args))
+
+    print_report(report)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+# micro.py — micro-benchmarks for the hot db_helpers and card rendering
+#
+#   python -m benchmarks.micro --out results/HEAD.json
+#   python -m benchmarks.micro --compare results/main.json
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import shutil
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from itertools import count
+
+from PIL import Image, ImageDraw
+
+from benchmarks.dataset import ensure_dataset
+from bot.database import db_helpers
+from bot.database.schema import initialize_db
+from bot.services.card_generator import FlashcardConfig, FlashcardGenerator
+
+
+class BenchConfig:
+    WARMUP = 3
+    REPEAT = 50
+    REGRESSION_THRESHOLD = 0.10   # +10% медианы считается регрессией
+
+
+def _measure(fn, repeat: int, warmup: int) -> dict:
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    samples.sort()
+    median = statistics.median(samples)
+    return {
+        "repeat": repeat,
+        "min_ms": samples[0] * 1000,
+        "median_ms": median * 1000,
+        "p95_ms": samples[min(len(samples) - 1, int(len(samples) * 0.95))] * 1000,
+        "mean_ms": statistics.fmean(samples) * 1000,
+        "ops_per_sec": 1 / median if median else None,
+    }
+
+
+def _pick_ids(db_path: str):
+    with sqlite3.connect(db_path) as conn:
+        session_id = conn.execute("""
+            SELECT StudentSession_ID FROM PracticeProgress
+            GROUP BY StudentSession_ID ORDER BY COUNT(*) DESC LIMIT 1
+        """).fetchone()
+        session_id = session_id[0] if session_id else conn.execute(
+            "SELECT MAX(StudentSession_ID) FROM StudentSession").fetchone()[0]
+        module = conn.execute("SELECT module FROM Word WHERE module IS NOT NULL LIMIT 1").fetchone()
+        word_ids = [row[0] for row in conn.execute("SELECT Word_ID FROM Word WHERE added_by = 'teacher' LIMIT 200")]
+    return session_id, module[0] if module else None, word_ids
+
+
+def db_benchmarks(db_path: str, repeat: int, warmup: int) -> dict:
+    session_id, module, word_ids = _pick_ids(db_path)
+    words = iter(count())
+    progress_words = iter(word_ids * (repeat + warmup + 1))
+
+    cases = {
+        "get_words": lambda: db_helpers.get_words(session_id),
+        "get_words_module": lambda: db_helpers.get_words(session_id, module),
+        "get_weighted_words": lambda: db_helpers.get_weighted_words(session_id),
+        "update_progress": lambda: db_helpers.update_progress(session_id, next(progress_words), True),
+        "add_word": lambda: db_helpers.add_word(session_id, f"bench{next(words)}", "бенчмарк"),
+        "get_random_word": lambda: db_helpers.get_random_word("A1"),
+        "get_all_modules": db_helpers.get_all_modules,
+    }
+    return {name: _measure(fn, repeat, warmup) for name, fn in cases.items()}
+
+
+def card_benchmarks(repeat: int, warmup: int) -> dict:
+    generator = FlashcardGenerator()
+    text = "интернационализация"
+
+    def render():
+        img = Image.new('RGB', FlashcardConfig.IMAGE_SIZE, FlashcardConfig.RANDOM_COLOR_PALETTE[0])
+        generator._draw_text(ImageDraw.Draw(img), text, True)
+        return generator._add_border(img)
+
+    rendered = render()
+    loop = asyncio.new_event_loop()
+    try:
+        return {
+            "card_render": _measure(render, repeat, warmup),
+            "card_encode": _measure(lambda: generator._image_to_telegram_file(rendered), repeat, warmup),
+            "card_generate": _measure(
+                lambda: loop.run_until_complete(generator.generate_flashcard(text)), repeat, warmup),
+        }
+    finally:
+        loop.close()
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def compare(current: dict, baseline: dict, threshold: float = BenchConfig.REGRESSION_THRESHOLD) -> bool:
+    """Print median deltas against a previous run; return True if anything regressed."""
+    regressed = False
+    print(f"{'benchmark':<22} {'base ms':>10} {'now ms':>10} {'delta':>8}")
+    for name, result in current["results"].items():
+        base = baseline.get("results", {}).get(name)
+        if not base:
+            print(f"{name:<22} {'-':>10} {result['median_ms']:>10.3f} {'new':>8}")
+            continue
+        delta = (result["median_ms"] - base["median_ms"]) / base["median_ms"] if base["median_ms"] else 0.0
+        flag = "  REGRESSION" if delta > threshold else ""
+        regressed |= delta > threshold
+        print(f"{name:<22} {base['median_ms']:>10.3f} {result['median_ms']:>10.3f} {delta:>+8.1%}{flag}")
+    return regressed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run Dori Bot micro-benchmarks")
+    parser.add_argument("--words", type=int, default=100_000)
+    parser.add_argument("--students", type=int, default=5_000)
+    parser.add_argument("--progress", type=int, default=2_000_000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--repeat", type=int, default=BenchConfig.REPEAT)
+    parser.add_argument("--warmup", type=int, default=BenchConfig.WARMUP)
+    parser.add_argument("--only", choices=("db", "card"), help="run only one group")
+    parser.add_argument("--out", help="write results JSON here")
+    parser.add_argument("--compare", help="baseline results JSON to compare against")
+    args = parser.parse_args()
+
+    results = {}
+    if args.only != "card":
+        source = ensure_dataset(args.words, args.students, args.progress, args.seed)
+        with tempfile.TemporaryDirectory() as tmp:
+            # Пишущие бенчмарки работают с копией, чтобы кэшированный набор данных не менялся
+            db_path = os.path.join(tmp, "dori_bot.db")
+            shutil.copyfile(source, db_path)
+            initialize_db(db_path)  # миграции схемы для копий старых баз
+            db_helpers.DB_PATH = db_path
+            results.update(db_benchmarks(db_path, args.repeat, args.warmup))
+    if args.only != "db":
+        results.update(card_benchmarks(args.repeat, args.warmup))
+
+    report = {
+        "meta": {
+            "commit": _git_commit(),
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "platform": platform.platform(),
+            "scale": {"words": args.words, "students": args.students, "progress": args.progress, "seed": args.seed},
+        },
+        "results": results,
+    }
+    for name, result in results.items():
+        print(f"{name:<22} median {result['median_ms']:>9.3f} ms   p95 {result['p95_ms']:>9.3f} ms")
+    if args.out:
+        os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            if compare(report, json.load(f)):
+                sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
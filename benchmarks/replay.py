@@ -0,0 +1,209 @@
+# replay.py — replay recorded production updates against a copy of the database
+#
+#   python -m benchmarks.replay updates.jsonl.gz --db dori_bot.db --speed 10
+#
+# Updates recorded with DORI_RECORD_UPDATES are fed through Dispatcher.feed_update
+# with a stubbed Bot (no network). --speed is a playback factor: 1 is real time,
+# 10 is ten times faster, "max" feeds updates as fast as the bot can take them.
+
+import argparse
+import asyncio
+import glob
+import gzip
+import json
+import os
+import re
+import shutil
+import sqlite3
+import tempfile
+import time
+import zlib
+from collections import defaultdict
+
+from aiogram import Bot
+from aiogram.types import Update
+
+from benchmarks.fake_telegram import FakeTelegramAPI, StubSession
+from benchmarks.loadtest import LoadConfig, percentile
+from bot.database import db_helpers
+from bot.database.schema import initialize_db
+from bot.dispatcher import create_dispatcher
+from bot.middlewares.recorder import RecorderConfig, anonymize_id
+
+
+class ReplayConfig:
+    MAX_SPEED_CONCURRENCY = 100
+
+
+def recording_segments(path: str) -> list:
+    """Segment files of a recording: `path` itself if it exists, plus every per-process segment."""
+    base = path[:-3] if path.endswith(".gz") else path
+    segments = sorted(glob.glob(glob.escape(base) + ".*.gz"))
+    return ([path] if os.path.isfile(path) else []) + [s for s in segments if s != path]
+
+
+def load_recording(path: str) -> list:
+    records = []
+    for segment in recording_segments(path):
+        try:
+            with gzip.open(segment, "rt", encoding="utf-8") as f:
+                for line in f:
+                    line = line.strip()
+                    if line:
+                        records.append(json.loads(line))
+        except (EOFError, zlib.error, gzip.BadGzipFile, json.JSONDecodeError) as e:
+            # Процесс убит во время записи: хвост сегмента обрезан, прочитанное до него годно
+            print(f"{segment}: truncated ({e}), kept the updates before it")
+    records.sort(key=lambda r: r["ts"])
+    return records
+
+
+def anonymize_database(db_path: str, salt: str):
+    """Rewrite telegram_id in a database copy so it matches ids in a recording made with the same salt."""
+    with sqlite3.connect(db_path) as conn:
+        rows = conn.execute("SELECT StudentSession_ID, telegram_id FROM StudentSession").fetchall()
+        conn.executemany(
+            "UPDATE StudentSession SET telegram_id = ? WHERE StudentSession_ID = ?",
+            [(anonymize_id(telegram_id, salt), session_id) for session_id, telegram_id in rows],
+        )
+
+
+def update_kind(update: Update) -> str:
+    if update.message:
+        text = update.message.text or ""
+        return f"message {text.split()[0]}" if text.startswith("/") else "message"
+    if update.callback_query:
+        return "callback " + re.sub(r"\d+", "#", update.callback_query.data or "")
+    return update.event_type
+
+
+class Replayer:
+    def __init__(self, dp, bot: Bot, api: FakeTelegramAPI, speed):
+        self.dp = dp
+        self.bot = bot
+        self.api = api
+        self.speed = speed
+        self.latencies = defaultdict(list)    # вид апдейта -> [секунды от плана до завершения]
+        self.lag = []                         # опоздание старта обработки относительно плана
+        self.errors = defaultdict(int)
+
+    async def _feed(self, kind: str, update: Update, due: float, semaphore):
+        async with semaphore:
+            self.lag.append(max(0.0, time.perf_counter() - due))
+            try:
+                await self.dp.feed_update(self.bot, update)
+            except Exception as e:
+                self.errors[f"{kind}: {type(e).__name__}"] += 1
+        self.latencies[kind].append(time.perf_counter() - due)
+
+    async def run(self, records: list) -> dict:
+        limit = ReplayConfig.MAX_SPEED_CONCURRENCY if self.speed == "max" else len(records) or 1
+        semaphore = asyncio.Semaphore(limit)
+        tasks = []
+        started = time.perf_counter()
+        first_ts = records[0]["ts"] if records else 0.0
+        for record in records:
+            update = Update.model_validate(record["update"], context={"bot": self.bot})
+            if self.speed != "max":
+                due = started + (record["ts"] - first_ts) / self.speed
+                delay = due - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            else:
+                due = time.perf_counter()
+            tasks.append(asyncio.create_task(self._feed(update_kind(update), update, due, semaphore)))
+        await asyncio.gather(*tasks)
+        return self.report(records, time.perf_counter() - started)
+
+    def report(self, records: list, elapsed: float) -> dict:
+        kinds = {}
+        for kind, samples in sorted(self.latencies.items()):
+            ordered = sorted(samples)
+            kinds[kind] = {
+                "count": len(ordered),
+                "p50_ms": percentile(ordered, 0.50) * 1000,
+                "p95_ms": percentile(ordered, 0.95) * 1000,
+                "p99_ms": percentile(ordered, 0.99) * 1000,
+            }
+        recorded_span = records[-1]["ts"] - records[0]["ts"] if records else 0.0
+        all_latencies = sorted(s for samples in self.latencies.values() for s in samples)
+        lag = sorted(self.lag)
+        return {
+            "updates": len(records),
+            "speed": self.speed,
+            "recorded_span_s": recorded_span,
+            "elapsed_s": elapsed,
+            "updates_per_sec": len(records) / elapsed if elapsed else 0.0,
+            "latency_p50_ms": percentile(all_latencies, 0.50) * 1000,
+            "latency_p95_ms": percentile(all_latencies, 0.95) * 1000,
+            "latency_p99_ms": percentile(all_latencies, 0.99) * 1000,
+            "start_lag_p95_ms": percentile(lag, 0.95) * 1000,
+            "api_calls": sum(self.api.calls.values()),
+            "api_calls_by_method": dict(self.api.calls.most_common()),
+            "kinds": kinds,
+            "errors": dict(self.errors),
+        }
+
+
+def print_report(report: dict):
+    print(f"Replayed {report['updates']} updates ({report['recorded_span_s']:.0f} s recorded) "
+          f"in {report['elapsed_s']:.1f} s at speed {report['speed']}: {report['updates_per_sec']:.1f} updates/s")
+    print(f"Latency p50 {report['latency_p50_ms']:.1f} ms, p95 {report['latency_p95_ms']:.1f} ms, "
+          f"p99 {report['latency_p99_ms']:.1f} ms; start lag p95 {report['start_lag_p95_ms']:.1f} ms")
+    print(f"{'update kind':<32} {'count':>7} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for kind, s in report["kinds"].items():
+        print(f"{kind:<32} {s['count']:>7} {s['p50_ms']:>9.2f} {s['p95_ms']:>9.2f} {s['p99_ms']:>9.2f}")
+    print(f"API calls: {report['api_calls']} (" +
+          ", ".join(f"{m}={n}" for m, n in report["api_calls_by_method"].items()) + ")")
+    if report["errors"]:
+        print("Errors: " + ", ".join(f"{k} x{v}" for k, v in report["errors"].items()))
+
+
+def parse_speed(value: str):
+    if value == "max":
+        return value
+    speed = float(value)
+    if speed <= 0:
+        raise argparse.ArgumentTypeError("speed must be positive or 'max'")
+    return speed
+
+
+async def replay(records: list, speed) -> dict:
+    api = FakeTelegramAPI()
+    bot = Bot(token=LoadConfig.BOT_TOKEN, session=StubSession(api))
+    dp = create_dispatcher()
+    try:
+        return await Replayer(dp, bot, api, speed).run(records)
+    finally:
+        await bot.session.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay recorded Dori Bot updates")
+    parser.add_argument("recording", help="DORI_RECORD_UPDATES path; all its per-process segments are read")
+    parser.add_argument("--db", default="dori_bot.db", help="database to copy for the replay")
+    parser.add_argument("--speed", type=parse_speed, default="max", help="1 = real time, N = N times faster, max")
+    parser.add_argument("--salt", default=os.getenv(RecorderConfig.SALT_ENV),
+                        help="recording salt; rewrites telegram ids in the DB copy to match the recording")
+    parser.add_argument("--out", help="write the report as JSON here")
+    args = parser.parse_args()
+
+    # Повтор не должен сам записывать апдейты
+    os.environ.pop(RecorderConfig.PATH_ENV, None)
+    records = load_recording(args.recording)
+    with tempfile.TemporaryDirectory() as tmp:
+        db_helpers.DB_PATH = os.path.join(tmp, "dori_bot.db")
+        shutil.copyfile(args.db, db_helpers.DB_PATH)
+        initialize_db(db_helpers.DB_PATH)  # миграции схемы для копий старых баз
+        if args.salt:
+            anonymize_database(db_helpers.DB_PATH, args.salt)
+        report = asyncio.run(replay(records, args.speed))
+
+    print_report(report)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+
+
+if __name__ == "__main__":
+    main()
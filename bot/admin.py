@@ -0,0 +1,219 @@
+"""Maintenance commands for cron jobs and scripts, without starting the bot.
+
+    python -m bot.admin migrate
+    python -m bot.admin import words.csv.gz --user 123456789
+    python -m bot.admin export words --user 123456789 --out words.csv.gz
+    python -m bot.admin stats
+    python -m bot.admin backup --dir backups --keep 7
+    python -m bot.admin warm
+
+Only the storage layer is imported, and only by the command that needs it: no aiogram,
+Pillow or NumPy, so a command starts in a few tens of milliseconds.
+"""
+
+import argparse
+import csv
+import gzip
+import json
+import os
+import shutil
+import sys
+import time
+
+
+class AdminConfig:
+    IMPORT_COLUMNS = ("Text", "translation", "part_of_speech", "level", "module", "synonyms")
+    LEVELS = ("A1", "A2", "B1")
+    DEFAULT_LEVEL = "A1"
+    WARM_CHUNK = 1 << 20          # байт за одно чтение при прогреве
+
+
+def _open_text(path: str):
+    if path.endswith(".gz"):
+        return gzip.open(path, "rt", encoding="utf-8", newline="")
+    return open(path, encoding="utf-8", newline="")
+
+
+def _read_rows(f, jsonl: bool):
+    """(line number, row dict or None, error) for every record of the file."""
+    if jsonl:
+        for line_no, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except json.JSONDecodeError as e:
+                yield line_no, None, f"invalid JSON: {e.msg}"
+                continue
+            yield (line_no, row, None) if isinstance(row, dict) else (line_no, None, "not a JSON object")
+    else:
+        reader = csv.DictReader(f)
+        for row in reader:
+            yield reader.line_num, row, None
+
+
+def read_words(path: str) -> tuple:
+    """Words from a CSV or JSONL file (optionally .gz) with the columns of the `words` export.
+
+    Text and translation are required; level is upper-cased, defaults to A1 and must be one of
+    AdminConfig.LEVELS. Word_ID, created_at and unknown columns are ignored. Returns
+    (words, errors), errors being (line number, reason) for the rows that were skipped.
+    """
+    words, errors = [], []
+    with _open_text(path) as f:
+        for line_no, row, error in _read_rows(f, ".jsonl" in os.path.basename(path)):
+            if error:
+                errors.append((line_no, error))
+                continue
+            word = {key: (str(row[key]).strip() or None) if row.get(key) is not None else None
+                    for key in AdminConfig.IMPORT_COLUMNS}
+            word["level"] = (word["level"] or AdminConfig.DEFAULT_LEVEL).upper()
+            if not word["Text"] or not word["translation"]:
+                errors.append((line_no, "Text and translation are required"))
+            elif word["level"] not in AdminConfig.LEVELS:
+                errors.append((line_no, f"level {word['level']!r} is not one of {', '.join(AdminConfig.LEVELS)}"))
+            else:
+                words.append(word)
+    return words, errors
+
+
+def _session(telegram_id, role=None):
+    from bot.database.db_helpers import get_session
+
+    session = get_session(telegram_id)
+    if session is None:
+        raise SystemExit(f"No session for Telegram user {telegram_id}")
+    if role and session["role"] != role:
+        raise SystemExit(f"Telegram user {telegram_id} is a {session['role']}, not a {role}")
+    return session["StudentSession_ID"]
+
+
+def cmd_migrate(args):
+    from bot.database.schema import initialize_db
+
+    started = time.monotonic()
+    initialize_db(args.db)
+    print(f"{args.db}: schema up to date in {time.monotonic() - started:.2f} s")
+
+
+def cmd_import(args):
+    from bot.database.db_helpers import add_words
+
+    words, errors = read_words(args.file)
+    for line_no, error in errors:
+        print(f"{args.file}:{line_no}: {error}", file=sys.stderr)
+    session_id = _session(args.user, role="teacher")
+    started = time.monotonic()
+    word_ids, skipped = add_words(session_id, words)
+    print(f"Imported {len(word_ids)} words, skipped {skipped} duplicates and {len(errors)} invalid rows "
+          f"in {time.monotonic() - started:.2f} s")
+    if word_ids:
+        print("Restart the bot for /find and self-check answer options to include them: "
+              "both word indexes are built in memory.")
+
+
+def cmd_export(args):
+    from bot.services.export import export_to_file
+
+    session_id = _session(args.user) if args.user else None
+    path, filename, count = export_to_file(args.name, args.format, session_id)
+    out = args.out or filename
+    shutil.move(path, out)
+    print(f"{count} rows -> {out}")
+
+
+def cmd_stats(args):
+    from bot.database.db_helpers import get_database_stats
+
+    stats = get_database_stats()
+    answers = stats["correct"] + stats["incorrect"]
+    accuracy = f"{100 * stats['correct'] / answers:.0f}%" if answers else "—"
+    computed = stats["difficulty_computed_at"]
+    lines = [
+        f"Database: {args.db} ({_size(args.db)}, WAL {_size(args.db + '-wal')})",
+        "Users: " + ", ".join(f"{role} {count}" for role, count in sorted(stats["sessions"].items())),
+        "Words: " + ", ".join(f"{added_by} {count}" for added_by, count in sorted(stats["words"].items())),
+        f"Classes: {stats['classes']}, modules: {stats['modules']}, broadcasts: {stats['broadcasts']}",
+        f"Progress rows: {stats['progress']}, answers: {answers} (accuracy {accuracy})",
+        f"Answer log: {stats['answer_events']} events",
+        "Word difficulty: " + (time.strftime("%Y-%m-%d %H:%M", time.localtime(computed)) if computed else "not computed"),
+    ]
+    print("\n".join(lines))
+
+
+def cmd_backup(args):
+    from bot.services.backup import BackupConfig, create_backup
+
+    directory = args.dir or os.getenv(BackupConfig.DIR_ENV, BackupConfig.DEFAULT_DIR)
+    keep = args.keep if args.keep is not None else int(os.getenv(BackupConfig.KEEP_ENV, BackupConfig.DEFAULT_KEEP))
+    result = create_backup(args.db, directory, keep)
+    print(f"{result['path']}: {result['size'] // 1024} KB in {result['seconds']:.1f} s, rotated {result['rotated']}")
+
+
+def cmd_warm(args):
+    """Read the database, its WAL and the dictionary index once so the bot starts on a warm page cache."""
+    from bot.services.dictionary import DictionaryConfig
+
+    paths = [args.db, args.db + "-wal", os.getenv(DictionaryConfig.PATH_ENV, DictionaryConfig.DEFAULT_PATH)]
+    buffer = bytearray(AdminConfig.WARM_CHUNK)
+    for path in paths:
+        if not os.path.exists(path):
+            continue
+        started = time.monotonic()
+        total = 0
+        with open(path, "rb", buffering=0) as f:
+            while True:
+                read = f.readinto(buffer)
+                if not read:
+                    break
+                total += read
+        print(f"{path}: {total / (1 << 20):.1f} MB in {time.monotonic() - started:.2f} s")
+
+
+def _size(path: str) -> str:
+    return f"{os.path.getsize(path) // 1024} KB" if os.path.exists(path) else "—"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m bot.admin", description="Dori Bot maintenance commands")
+    parser.add_argument("--db", default="dori_bot.db", help="database file (default: %(default)s)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    commands.add_parser("migrate", help="create missing tables, indexes and triggers")
+
+    import_ = commands.add_parser("import", help="add teacher words from a CSV or JSONL file (optionally .gz)")
+    import_.add_argument("file", help="columns as in the words export: Text, translation, part_of_speech, "
+                                      "level, module, synonyms")
+    import_.add_argument("--user", type=int, required=True,
+                         help="teacher's Telegram id; words go to their active class")
+
+    export = commands.add_parser("export", help="write an export as gzip CSV or JSONL")
+    export.add_argument("name", choices=("words", "cohort_progress", "dictionary", "progress"))
+    export.add_argument("--format", choices=("csv", "jsonl"), default="csv")
+    export.add_argument("--user", type=int,
+                        help="Telegram id: teacher exports use their active class, student exports their data")
+    export.add_argument("--out", help="output file (default: generated name in the current directory)")
+
+    commands.add_parser("stats", help="row counts and file sizes")
+
+    backup = commands.add_parser("backup", help="online backup, checked with integrity_check")
+    backup.add_argument("--dir", help="backup directory (default: $DORI_BACKUP_DIR or backups)")
+    backup.add_argument("--keep", type=int, help="latest backups to keep (default: $DORI_BACKUP_KEEP or 7)")
+
+    commands.add_parser("warm", help="read the database and dictionary index into the OS page cache")
+
+    args = parser.parse_args(argv)
+    if args.command != "migrate" and not os.path.exists(args.db):
+        parser.error(f"no database at {args.db}; run migrate first")
+
+    from bot.database import db_helpers
+    db_helpers.DB_PATH = args.db
+    handlers = {
+        "migrate": cmd_migrate, "import": cmd_import, "export": cmd_export,
+        "stats": cmd_stats, "backup": cmd_backup, "warm": cmd_warm,
+    }
+    handlers[args.command](args)
+
+
+if __name__ == "__main__":
+    main()
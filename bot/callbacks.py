@@ -0,0 +1,113 @@
+import inspect
+
+from aiogram.filters.callback_data import CallbackData
+from aiogram.fsm.context import FSMContext
+from aiogram.types import CallbackQuery
+
+from bot.services.metrics import metrics
+
+
+class CallbackConfig:
+    SEPARATOR = ":"   # разделитель CallbackData: всё до него — ключ в таблице
+    STALE_NOTICE = "Эта кнопка больше не активна."
+    UNKNOWN_NOTICE = "Кнопка устарела. Откройте меню заново: /start"
+
+
+# --- Кнопки с параметрами ---
+class StudentLevel(CallbackData, prefix="student_level"):
+    level: str
+
+class WordPartOfSpeech(CallbackData, prefix="word_pos"):
+    pos: str
+
+class WordLevel(CallbackData, prefix="word_level"):
+    level: str
+
+class ModuleChoice(CallbackData, prefix="module"):
+    module_id: int    # 0 — все слова
+
+class ModulePage(CallbackData, prefix="module_page"):
+    page: int
+
+class AnswerOption(CallbackData, prefix="mc"):
+    index: int
+
+class DashboardPage(CallbackData, prefix="dash_page"):
+    page: int
+
+class ClassChoice(CallbackData, prefix="class_use"):
+    class_id: int     # 0 — без класса
+
+class BroadcastAction(CallbackData, prefix="broadcast"):
+    action: str       # send | stop
+    broadcast_id: int
+
+
+class CallbackRoute:
+    __slots__ = ("handler", "data_type", "state", "flags", "stale", "params")
+
+    def __init__(self, handler, data_type, state, flags, stale):
+        self.handler = handler
+        self.data_type = data_type
+        self.state = state
+        self.flags = flags
+        self.stale = stale
+        self.params = set(inspect.signature(handler).parameters)
+
+
+class CallbackRegistry:
+    """One callback_query handler for the whole bot, routing presses through a dict.
+
+    A button's callback data is either a plain action name ("flashcards_start") or a packed
+    CallbackData ("module:12"); the part before the separator is the key. Handlers register
+    with @callback_registry.register(key or CallbackData class, state=..., flags=...); a key
+    can be registered only once. The handler gets the callback plus whichever of `state`,
+    `callback_data` and aiogram's context values (`bot`, ...) it declares.
+    """
+
+    def __init__(self):
+        self._routes = {}
+
+    def register(self, key, *, state=None, flags=None, stale=None):
+        data_type = key if isinstance(key, type) and issubclass(key, CallbackData) else None
+        if data_type:
+            key = data_type.__prefix__
+        if CallbackConfig.SEPARATOR in key:
+            raise ValueError(f"Callback key {key!r} must not contain {CallbackConfig.SEPARATOR!r}")
+
+        def decorator(handler):
+            if key in self._routes:
+                raise ValueError(f"Callback {key!r} is already handled by {self._routes[key].handler.__qualname__}")
+            self._routes[key] = CallbackRoute(handler, data_type, state.state if state else None, flags or {}, stale)
+            return handler
+        return decorator
+
+    def route(self, data: str):
+        return self._routes.get((data or "").split(CallbackConfig.SEPARATOR, 1)[0])
+
+    def flags(self, data: str) -> dict:
+        """Flags of the handler for this callback data (read by ThrottlingMiddleware)."""
+        route = self.route(data)
+        return route.flags if route else {}
+
+    async def dispatch(self, callback: CallbackQuery, state: FSMContext, **context):
+        route = self.route(callback.data)
+        if route is None:
+            metrics.inc("callbacks.unknown")
+            await callback.answer(CallbackConfig.UNKNOWN_NOTICE)
+            return
+        if route.state and await state.get_state() != route.state:
+            await callback.answer(route.stale or CallbackConfig.STALE_NOTICE)
+            return
+        context.update(state=state)
+        if route.data_type:
+            try:
+                context["callback_data"] = route.data_type.unpack(callback.data)
+            except (TypeError, ValueError):
+                metrics.inc("callbacks.unknown")
+                await callback.answer(CallbackConfig.UNKNOWN_NOTICE)
+                return
+        return await route.handler(callback, **{k: v for k, v in context.items() if k in route.params})
+
+
+callback_registry = CallbackRegistry()
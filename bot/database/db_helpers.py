@@ -1,14 +1,24 @@
+import logging
 import sqlite3
 from datetime import datetime
 import random
+import secrets
+import string
 from typing import Dict, Optional, List
 
+from bot.database.profiler import query_profiler
+from bot.database.schema import review_interval_days
+
+
+logger = logging.getLogger(__name__)
+
 
 DB_PATH = "dori_bot.db"
+SCORE_PER_CORRECT = 1
 
 
 def get_connection():
-    return sqlite3.connect(DB_PATH)
+    return query_profiler.connect(DB_PATH)
 
 # --- Session & User Management ---
 
@@ -25,6 +35,14 @@ def get_or_create_session(telegram_id, local_id=None, role="student", level=None
         """, (telegram_id, local_id, role, level or "A1"))
         return cur.lastrowid
 
+def get_session(telegram_id):
+    """{"StudentSession_ID", "role", "Class_ID"} of a Telegram user, or None if they never started the bot."""
+    with get_connection() as conn:
+        cur = conn.cursor()
+        cur.execute("SELECT StudentSession_ID, role, Class_ID FROM StudentSession WHERE telegram_id = ?", (telegram_id,))
+        row = cur.fetchone()
+        return dict(zip(["StudentSession_ID", "role", "Class_ID"], row)) if row else None
+
 def get_user_role(telegram_id):
     with get_connection() as conn:
         cur = conn.cursor()
@@ -48,45 +66,276 @@ def update_user_role(telegram_id, role):
 def update_user_level_and_role(telegram_id, level):
     set_user_session(telegram_id, role="student", level=level)
 
-# --- Word Management ---
+# --- Classes ---
 
-def add_word(session_id, text, translation, level="A1", part_of_speech=None, added_by="student", synonyms=None, module=None):
+JOIN_CODE_ALPHABET = "ABCDEFGHJKLMNPQRSTUVWXYZ23456789"
+JOIN_CODE_LENGTH = 6
+
+def _session_class(cur, session_id):
+    cur.execute("SELECT Class_ID FROM StudentSession WHERE StudentSession_ID = ?", (session_id,))
+    row = cur.fetchone()
+    return row[0] if row else None
+
+def _class_scope(class_id, column="Class_ID"):
+    """WHERE fragment and params for a class; NULL means words and students outside any class."""
+    if class_id is None:
+        return f"{column} IS NULL", []
+    return f"{column} = ?", [class_id]
+
+def create_class(teacher_session_id, name):
+    """Create a class with a unique join code and make it the teacher's active class."""
     with get_connection() as conn:
         cur = conn.cursor()
+        while True:
+            code = "".join(secrets.choice(JOIN_CODE_ALPHABET) for _ in range(JOIN_CODE_LENGTH))
+            try:
+                cur.execute(
+                    "INSERT INTO Class (name, join_code, created_by) VALUES (?, ?, ?)",
+                    (name, code, teacher_session_id),
+                )
+                break
+            except sqlite3.IntegrityError:
+                continue
+        class_id = cur.lastrowid
+        cur.execute("UPDATE StudentSession SET Class_ID = ? WHERE StudentSession_ID = ?", (class_id, teacher_session_id))
+        return {"Class_ID": class_id, "name": name, "join_code": code}
 
-        # Проверка на дубликаты: по text + translation
+def get_class(class_id):
+    with get_connection() as conn:
+        cur = conn.cursor()
+        cur.execute("SELECT Class_ID, name, join_code, created_by FROM Class WHERE Class_ID = ?", (class_id,))
+        row = cur.fetchone()
+        return dict(zip(["Class_ID", "name", "join_code", "created_by"], row)) if row else None
+
+def get_session_class(session_id):
+    with get_connection() as conn:
+        return _session_class(conn.cursor(), session_id)
+
+def is_class_student(session_id, class_id):
+    """True if the session is a student of this class; None means a student outside any class."""
+    scope, params = _class_scope(class_id)
+    with get_connection() as conn:
+        cur = conn.cursor()
+        cur.execute(
+            f"SELECT 1 FROM StudentSession WHERE StudentSession_ID = ? AND role = 'student' AND {scope}",
+            [session_id] + params,
+        )
+        return cur.fetchone() is not None
+
+def join_class(session_id, join_code):
+    """Move a student into the class with this code; returns the class or None for an unknown code."""
+    with get_connection() as conn:
+        cur = conn.cursor()
+        cur.execute("SELECT Class_ID, name FROM Class WHERE join_code = ?", (join_code.strip().upper(),))
+        row = cur.fetchone()
+        if not row:
+            return None
+        cur.execute("UPDATE StudentSession SET Class_ID = ? WHERE StudentSession_ID = ?", (row[0], session_id))
+        return {"Class_ID": row[0], "name": row[1]}
+
+def get_teacher_classes(teacher_session_id):
+    with get_connection() as conn:
+        cur = conn.cursor()
         cur.execute("""
-            SELECT 1 FROM Word WHERE LOWER(Text) = LOWER(?) AND LOWER(translation) = LOWER(?)
-        """, (text.strip(), translation.strip()))
-        
-        if cur.fetchone():
+            SELECT c.Class_ID, c.name, c.join_code,
+                   (SELECT COUNT(*) FROM StudentSession ss WHERE ss.role = 'student' AND ss.Class_ID = c.Class_ID)
+            FROM Class c
+            WHERE c.created_by = ?
+            ORDER BY c.Class_ID
+        """, (teacher_session_id,))
+        return [dict(zip(["Class_ID", "name", "join_code", "students"], row)) for row in cur.fetchall()]
+
+def set_active_class(teacher_session_id, class_id):
+    """Switch the class a teacher works with; None switches back to words outside any class."""
+    with get_connection() as conn:
+        cur = conn.cursor()
+        if class_id is not None:
+            cur.execute("SELECT 1 FROM Class WHERE Class_ID = ? AND created_by = ?", (class_id, teacher_session_id))
+            if not cur.fetchone():
+                return False
+        cur.execute("UPDATE StudentSession SET Class_ID = ? WHERE StudentSession_ID = ?", (class_id, teacher_session_id))
+        return True
+
+# --- Word Management ---
+
+# Слушатели изменений слов (кэши и индексы в памяти): listener(word_ids) вызывается после коммита.
+_word_listeners = []
+
+def add_word_listener(listener):
+    _word_listeners.append(listener)
+
+def _notify_word_change(word_ids):
+    for listener in _word_listeners:
+        try:
+            listener(word_ids)
+        except Exception:
+            logger.exception("Word listener failed")
+
+def _is_duplicate_word(cur, class_id, session_id, text, translation):
+    # Проверка на дубликаты: по text + translation среди слов класса и своих слов
+    class_clause, class_params = _class_scope(class_id)
+    cur.execute(f"""
+        SELECT 1 FROM Word
+        WHERE added_by = 'teacher' AND {class_clause}
+          AND LOWER(Text) = LOWER(?) AND LOWER(translation) = LOWER(?)
+        UNION ALL
+        SELECT 1 FROM Word
+        WHERE StudentSession_ID = ? AND LOWER(Text) = LOWER(?) AND LOWER(translation) = LOWER(?)
+        LIMIT 1
+    """, class_params + [text.strip(), translation.strip(), session_id, text.strip(), translation.strip()])
+    return cur.fetchone() is not None
+
+def _insert_word(cur, class_id, session_id, text, translation, level, part_of_speech, added_by, synonyms, module):
+    cur.execute("""
+        INSERT INTO Word (Text, translation, level, part_of_speech, added_by, created_at, StudentSession_ID, synonyms, module, Class_ID)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """, (text, translation, level, part_of_speech, added_by, datetime.now(), session_id, synonyms, module, class_id))
+    return cur.lastrowid
+
+def add_word(session_id, text, translation, level="A1", part_of_speech=None, added_by="student", synonyms=None, module=None):
+    with get_connection() as conn:
+        cur = conn.cursor()
+        class_id = _session_class(cur, session_id)
+        if _is_duplicate_word(cur, class_id, session_id, text, translation):
             raise ValueError("Слово с таким переводом уже существует.")
+        word_id = _insert_word(cur, class_id, session_id, text, translation, level, part_of_speech, added_by, synonyms, module)
+    _notify_word_change([word_id])
+    return word_id
 
-        # Вставка нового слова
-        cur.execute("""
-            INSERT INTO Word (Text, translation, level, part_of_speech, added_by, created_at, StudentSession_ID, synonyms, module)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """, (text, translation, level, part_of_speech, added_by, datetime.now(), session_id, synonyms, module))
+_SQL_LOWER = str.maketrans(string.ascii_uppercase, string.ascii_lowercase)
 
-def get_words(session_id, module=None):
+def add_words(session_id, words, added_by="teacher"):
+    """Insert word dicts (Text, translation, level, part_of_speech, synonyms, module) in one transaction.
+
+    Same duplicate rule as add_word(), including duplicates within `words`, which are skipped.
+    Existing keys are read once instead of one scan per word. Returns (new Word_IDs, skipped count).
+    """
+    word_ids, skipped = [], 0
+    with get_connection() as conn:
+        cur = conn.cursor()
+        class_id = _session_class(cur, session_id)
+        class_clause, class_params = _class_scope(class_id)
+        cur.execute(f"""
+            SELECT LOWER(Text), LOWER(translation) FROM Word WHERE added_by = 'teacher' AND {class_clause}
+            UNION
+            SELECT LOWER(Text), LOWER(translation) FROM Word WHERE StudentSession_ID = ?
+        """, class_params + [session_id])
+        seen = set(cur.fetchall())
+        for w in words:
+            # LOWER() в SQLite меняет регистр только у ASCII — ключи строятся так же
+            key = (w["Text"].strip().translate(_SQL_LOWER), w["translation"].strip().translate(_SQL_LOWER))
+            if key in seen:
+                skipped += 1
+                continue
+            seen.add(key)
+            word_ids.append(_insert_word(
+                cur, class_id, session_id, w["Text"], w["translation"], w.get("level") or "A1",
+                w.get("part_of_speech"), added_by, w.get("synonyms"), w.get("module"),
+            ))
+    if word_ids:
+        _notify_word_change(word_ids)
+    return word_ids, skipped
+
+def update_word(word_id, text, translation):
+    with get_connection() as conn:
+        cur = conn.cursor()
+        cur.execute("UPDATE Word SET Text = ?, translation = ? WHERE Word_ID = ?", (text, translation, word_id))
+        updated = cur.rowcount > 0
+    _notify_word_change([word_id])
+    return updated
+
+def delete_word(word_id, session_id=None):
+    """Delete a word; with session_id only the student's own word can be deleted."""
+    with get_connection() as conn:
+        cur = conn.cursor()
+        if session_id is None:
+            cur.execute("DELETE FROM Word WHERE Word_ID = ?", (word_id,))
+        else:
+            cur.execute(
+                "DELETE FROM Word WHERE Word_ID = ? AND added_by = 'student' AND StudentSession_ID = ?",
+                (word_id, session_id),
+            )
+        deleted = cur.rowcount > 0
+    _notify_word_change([word_id])
+    return deleted
+
+def get_teacher_word_keys(word_ids=None):
+    """(Word_ID, Text, part_of_speech, level, module, Class_ID) of teacher words, all or the given ones."""
+    query = "SELECT Word_ID, Text, part_of_speech, level, module, Class_ID FROM Word WHERE added_by = 'teacher'"
+    params = []
+    if word_ids is not None:
+        query += f" AND Word_ID IN ({', '.join('?' * len(word_ids))})"
+        params = list(word_ids)
     with get_connection() as conn:
         cur = conn.cursor()
-        query = """
-            SELECT Word_ID, Text, translation, synonyms
-            FROM Word
-            WHERE added_by = 'teacher' OR StudentSession_ID = ?
-        """
-        params = [session_id]
-        if module:
-            query += " AND LOWER(module) = LOWER(?)"
-            params.append(module)
         cur.execute(query, params)
-        return [{
-            "Word_ID": row[0],
-            "Text": row[1],
-            "translation": row[2],
-            "synonyms": row[3] or "не указаны"
-        } for row in cur.fetchall()]
+        return cur.fetchall()
+
+def get_word_search_rows(word_ids=None):
+    """(Word_ID, Text, translation, synonyms, added_by, Class_ID, StudentSession_ID) of all or the given words."""
+    query = "SELECT Word_ID, Text, translation, synonyms, added_by, Class_ID, StudentSession_ID FROM Word"
+    params = []
+    if word_ids is not None:
+        query += f" WHERE Word_ID IN ({', '.join('?' * len(word_ids))})"
+        params = list(word_ids)
+    with get_connection() as conn:
+        cur = conn.cursor()
+        cur.execute(query, params)
+        return cur.fetchall()
+
+_WORD_COLUMNS = "w.Word_ID, w.Text, w.translation, w.synonyms, w.part_of_speech, w.level, w.module, d.error_rate"
+# Сложность слова по когорте (services/analytics.py); NULL, пока по слову нет ответов
+_WORD_DIFFICULTY_JOIN = "LEFT JOIN WordDifficulty d ON d.Word_ID = w.Word_ID"
+
+def _word_dict(row):
+    return {
+        "Word_ID": row[0],
+        "Text": row[1],
+        "translation": row[2],
+        "synonyms": row[3] or "не указаны",
+        "part_of_speech": row[4],
+        "level": row[5],
+        "module": row[6],
+        "difficulty": row[7],
+    }
+
+def get_words(session_id, module=None):
+    """Teacher words of the student's class plus the student's own words.
+
+    Both halves are index range scans (added_by, Class_ID, module) and (StudentSession_ID, module),
+    so the cost follows the size of the class, not of the whole Word table.
+    """
+    with get_connection() as conn:
+        cur = conn.cursor()
+        class_clause, params = _class_scope(_session_class(cur, session_id), "w.Class_ID")
+        module_clause = " AND w.module = ? COLLATE NOCASE" if module else ""
+        params += [module] if module else []
+        params += [session_id] + ([module] if module else [])
+        cur.execute(f"""
+            SELECT {_WORD_COLUMNS}
+            FROM Word w {_WORD_DIFFICULTY_JOIN}
+            WHERE w.added_by = 'teacher' AND {class_clause}{module_clause}
+            UNION ALL
+            SELECT {_WORD_COLUMNS}
+            FROM Word w {_WORD_DIFFICULTY_JOIN}
+            WHERE w.StudentSession_ID = ? AND w.added_by = 'student'{module_clause}
+        """, params)
+        return [_word_dict(row) for row in cur.fetchall()]
+
+def get_due_words(session_id, limit=20):
+    """Words whose next review is due, most overdue first."""
+    with get_connection() as conn:
+        cur = conn.cursor()
+        cur.execute(f"""
+            SELECT {_WORD_COLUMNS}
+            FROM PracticeProgress p
+            JOIN Word w ON w.Word_ID = p.Word_ID
+            {_WORD_DIFFICULTY_JOIN}
+            WHERE p.StudentSession_ID = ? AND p.due_at <= CURRENT_TIMESTAMP
+            ORDER BY p.due_at
+            LIMIT ?
+        """, (session_id, limit))
+        return [_word_dict(row) for row in cur.fetchall()]
 
 def get_weighted_words(session_id, module=None):
     with get_connection() as conn:
@@ -132,14 +381,20 @@ def update_progress(session_id, word_id, is_correct):
             incorrect = row[2] + int(not is_correct)
             cur.execute("""
                 UPDATE PracticeProgress
-                SET correct_count = ?, incorrect_count = ?, last_practiced = CURRENT_TIMESTAMP
+                SET correct_count = ?, incorrect_count = ?, last_practiced = CURRENT_TIMESTAMP,
+                    due_at = datetime('now', '+' || ? || ' days')
                 WHERE PracticeProgress_ID = ?
-            """, (correct, incorrect, row[0]))
+            """, (correct, incorrect, review_interval_days(correct, incorrect), row[0]))
         else:
+            correct, incorrect = int(is_correct), int(not is_correct)
             cur.execute("""
-                INSERT INTO PracticeProgress (StudentSession_ID, Word_ID, correct_count, incorrect_count, last_practiced)
-                VALUES (?, ?, ?, ?, CURRENT_TIMESTAMP)
-            """, (session_id, word_id, int(is_correct), int(not is_correct)))
+                INSERT INTO PracticeProgress (StudentSession_ID, Word_ID, correct_count, incorrect_count, last_practiced, due_at)
+                VALUES (?, ?, ?, ?, CURRENT_TIMESTAMP, datetime('now', '+' || ? || ' days'))
+            """, (session_id, word_id, correct, incorrect, review_interval_days(correct, incorrect)))
+        cur.execute("""
+            UPDATE StudentSession SET score = score + ?, last_active = DATE('now'), idle_reminders = 0
+            WHERE StudentSession_ID = ?
+        """, (int(is_correct) * SCORE_PER_CORRECT, session_id))
 
 def assign_achievement(session_id, achievement_id):
     with get_connection() as conn:
@@ -148,6 +403,56 @@ def assign_achievement(session_id, achievement_id):
             INSERT OR IGNORE INTO UserAchievement (StudentSession_ID, Achievement_ID, timestamp)
             VALUES (?, ?, ?)
         """, (session_id, achievement_id, datetime.now()))
+        return cur.rowcount > 0
+
+def get_achievement_definitions():
+    with get_connection() as conn:
+        cur = conn.cursor()
+        cur.execute("SELECT Achievement_ID, name, description, criteria FROM Achievement")
+        return cur.fetchall()
+
+def add_achievement(name, description, criteria):
+    with get_connection() as conn:
+        cur = conn.cursor()
+        cur.execute("""
+            INSERT INTO Achievement (name, description, criteria) VALUES (?, ?, ?)
+        """, (name, description, criteria))
+        return cur.lastrowid
+
+def get_awarded_achievement_ids(session_id, achievement_ids):
+    with get_connection() as conn:
+        cur = conn.cursor()
+        placeholders = ", ".join("?" * len(achievement_ids))
+        cur.execute(f"""
+            SELECT Achievement_ID FROM UserAchievement
+            WHERE StudentSession_ID = ? AND Achievement_ID IN ({placeholders})
+        """, (session_id, *achievement_ids))
+        return {row[0] for row in cur.fetchall()}
+
+def get_student_counters(session_id, expressions: Dict[str, str]) -> Dict[str, int]:
+    """Read achievement counters from StudentStats; expressions maps counter name -> SQL over its columns."""
+    with get_connection() as conn:
+        cur = conn.cursor()
+        columns = ", ".join(f"IFNULL({expr}, 0)" for expr in expressions.values())
+        cur.execute(f"SELECT {columns} FROM StudentStats WHERE StudentSession_ID = ?", (session_id,))
+        row = cur.fetchone() or [0] * len(expressions)
+        return dict(zip(expressions, row))
+
+def complete_module(session_id, module) -> bool:
+    """Mark a module as completed by the student; returns True only the first time."""
+    with get_connection() as conn:
+        cur = conn.cursor()
+        cur.execute("""
+            UPDATE StudentModuleStats SET completed_at = CURRENT_TIMESTAMP
+            WHERE StudentSession_ID = ? AND LOWER(module) = LOWER(?) AND completed_at IS NULL
+        """, (session_id, module))
+        if cur.rowcount == 0:
+            return False
+        cur.execute("""
+            UPDATE StudentStats SET modules_completed = modules_completed + 1
+            WHERE StudentSession_ID = ?
+        """, (session_id,))
+        return True
 
 def get_achievements(session_id):
     with get_connection() as conn:
@@ -160,6 +465,40 @@ def get_achievements(session_id):
         """, (session_id,))
         return cur.fetchall()
 
+# --- Leaderboard ---
+
+def get_leaderboard(limit=10, level=None, class_id=None):
+    with get_connection() as conn:
+        cur = conn.cursor()
+        # Читается прямо из индекса (role, Class_ID, [level,] score) — без сортировки всех студентов
+        scope, params = _class_scope(class_id)
+        query = f"SELECT StudentSession_ID, level, score FROM StudentSession WHERE role = 'student' AND {scope}"
+        if level:
+            query += " AND level = ?"
+            params.append(level)
+        query += " ORDER BY score DESC LIMIT ?"
+        params.append(limit)
+        cur.execute(query, params)
+        return [dict(zip(["StudentSession_ID", "level", "score"], row)) for row in cur.fetchall()]
+
+def get_student_rank(session_id, level=None, class_id=None):
+    with get_connection() as conn:
+        cur = conn.cursor()
+        cur.execute("SELECT score, level FROM StudentSession WHERE StudentSession_ID = ?", (session_id,))
+        row = cur.fetchone()
+        if not row:
+            return None
+        score = row[0] or 0
+        scope, params = _class_scope(class_id)
+        scope = f"role = 'student' AND {scope}" + (" AND level = ?" if level else "")
+        params += [level] if level else []
+        # Оба COUNT идут по диапазону индекса, место = число студентов с большим счётом + 1
+        cur.execute(f"SELECT COUNT(*) FROM StudentSession WHERE {scope} AND score > ?", params + [score])
+        above = cur.fetchone()[0]
+        cur.execute(f"SELECT COUNT(*) FROM StudentSession WHERE {scope}", params)
+        total = cur.fetchone()[0]
+        return {"rank": above + 1, "total": total, "score": score, "level": row[1]}
+
 # --- Library & Module Utilities ---
 
 def add_library_word(session_id, word_id, can_edit=True):
@@ -190,21 +529,73 @@ def can_user_edit_word(session_id, word_id):
         """, (session_id, word_id))
         return cur.fetchone() is not None
 
+# Числовые модули по номеру ("2" раньше "10"), затем остальные по алфавиту
+_MODULE_ORDER = "m.name GLOB '[0-9]*' DESC, CAST(m.name AS INTEGER), m.name"
+
 def get_all_modules():
+    return [m["name"] for m in get_modules()]
+
+def get_modules(added_by=None, level=None, class_id=None):
+    """Modules from the catalog with their word counts: [{"Module_ID", "name", "words"}].
+
+    class_id limits the counts to one class; 0 means words outside any class.
+    """
+    query = """
+        SELECT m.Module_ID, m.name, SUM(c.word_count)
+        FROM Module m
+        JOIN ModuleWordCount c ON c.Module_ID = m.Module_ID
+        WHERE 1 = 1
+    """
+    params = []
+    if class_id is not None:
+        query += " AND c.Class_ID = ?"
+        params.append(class_id)
+    if added_by:
+        query += " AND c.added_by = ?"
+        params.append(added_by)
+    if level:
+        query += " AND c.level = ?"
+        params.append(level)
+    query += f" GROUP BY m.Module_ID HAVING SUM(c.word_count) > 0 ORDER BY {_MODULE_ORDER}"
     with get_connection() as conn:
         cur = conn.cursor()
-        cur.execute("""
-            SELECT DISTINCT module FROM Word
-            WHERE module IS NOT NULL AND module != ''
-            ORDER BY module
-        """)
-        return [row[0] for row in cur.fetchall()]
+        cur.execute(query, params)
+        return [{"Module_ID": row[0], "name": row[1], "words": row[2]} for row in cur.fetchall()]
+
+def get_student_modules(session_id):
+    """Modules a student can practice: teacher modules of their class plus modules of their own words."""
+    with get_connection() as conn:
+        cur = conn.cursor()
+        cur.execute(f"""
+            SELECT m.Module_ID, m.name, SUM(x.words)
+            FROM (
+                SELECT Module_ID, word_count AS words FROM ModuleWordCount
+                WHERE Class_ID = IFNULL((SELECT Class_ID FROM StudentSession WHERE StudentSession_ID = ?), 0)
+                  AND added_by = 'teacher'
+                UNION ALL
+                SELECT own.Module_ID, 1 FROM Word w
+                JOIN Module own ON own.name = w.module
+                WHERE w.StudentSession_ID = ? AND w.added_by = 'student'
+            ) x
+            JOIN Module m ON m.Module_ID = x.Module_ID
+            GROUP BY m.Module_ID
+            HAVING SUM(x.words) > 0
+            ORDER BY {_MODULE_ORDER}
+        """, (session_id, session_id))
+        return [{"Module_ID": row[0], "name": row[1], "words": row[2]} for row in cur.fetchall()]
+
+def get_module(module_id):
+    with get_connection() as conn:
+        cur = conn.cursor()
+        cur.execute("SELECT name FROM Module WHERE Module_ID = ?", (module_id,))
+        row = cur.fetchone()
+        return row[0] if row else None
 
-def get_teacher_words(module=None):
+def get_teacher_words(module=None, class_id=None):
     with get_connection() as conn:
         cur = conn.cursor()
-        query = "SELECT Word_ID, Text, translation, module FROM Word WHERE added_by = 'teacher'"
-        params = []
+        class_clause, params = _class_scope(class_id)
+        query = f"SELECT Word_ID, Text, translation, module FROM Word WHERE added_by = 'teacher' AND {class_clause}"
         if module:
             query += " AND LOWER(module) = LOWER(?)"
             params.append(module)
@@ -224,7 +615,7 @@ def get_personal_words_by_session(session_id, module=None):
 
 def get_random_word(level: str = None) -> Optional[Dict]:
     try:
-        with sqlite3.connect(DB_PATH) as conn:
+        with get_connection() as conn:
             conn.row_factory = sqlite3.Row
             cursor = conn.cursor()
             query = "SELECT * FROM Word WHERE 1=1"
@@ -242,7 +633,7 @@ def get_random_word(level: str = None) -> Optional[Dict]:
 
 def get_word_definition(word_id: int) -> Optional[str]:
     try:
-        with sqlite3.connect(DB_PATH) as conn:
+        with get_connection() as conn:
             cursor = conn.cursor()
             cursor.execute("SELECT translation FROM Word WHERE Word_ID = ?", (word_id,))
             result = cursor.fetchone()
@@ -253,7 +644,7 @@ def get_word_definition(word_id: int) -> Optional[str]:
 
 def get_personal_words(user_id: int) -> list:
     try:
-        with sqlite3.connect(DB_PATH) as conn:
+        with get_connection() as conn:
             conn.row_factory = sqlite3.Row
             cursor = conn.cursor()
             cursor.execute("""
@@ -269,28 +660,31 @@ def get_personal_words(user_id: int) -> list:
 
 def add_personal_word(user_id: int, word: str, translation: str) -> bool:
     try:
-        with sqlite3.connect(DB_PATH) as conn:
+        with get_connection() as conn:
             cursor = conn.cursor()
             cursor.execute("INSERT OR IGNORE INTO StudentSession (telegram_id) VALUES (?)", (user_id,))
             cursor.execute("SELECT StudentSession_ID FROM StudentSession WHERE telegram_id = ?", (user_id,))
             session_id = cursor.fetchone()[0]
             cursor.execute("""
-                INSERT INTO Word (Text, translation, added_by, StudentSession_ID)
-                VALUES (?, ?, 'student', ?)
-            """, (word, translation, session_id))
+                INSERT INTO Word (Text, translation, added_by, StudentSession_ID, Class_ID)
+                VALUES (?, ?, 'student', ?, ?)
+            """, (word, translation, session_id, _session_class(cursor, session_id)))
+            word_id = cursor.lastrowid
             conn.commit()
-            return True
+        _notify_word_change([word_id])
+        return True
     except sqlite3.Error as e:
         print(f"Database error in add_personal_word: {e}")
         return False
 
 def delete_personal_word(word_id: int) -> bool:
     try:
-        with sqlite3.connect(DB_PATH) as conn:
+        with get_connection() as conn:
             cursor = conn.cursor()
             cursor.execute("DELETE FROM Word WHERE Word_ID = ?", (word_id,))
             conn.commit()
-            return cursor.rowcount > 0
+        _notify_word_change([word_id])
+        return cursor.rowcount > 0
     except sqlite3.Error as e:
         print(f"Database error in delete_personal_word: {e}")
         return False
@@ -307,3 +701,396 @@ def get_achievements_for_student(session_id):
             ORDER BY ua.timestamp DESC
         """, (session_id,))
         return cur.fetchall()
+
+# --- Teacher Dashboard ---
+
+def _cohort_scope(class_id):
+    scope, params = _class_scope(class_id, "ss.Class_ID")
+    return f" AND {scope}", params
+
+def get_cohort_summary(class_id=None):
+    scope, params = _cohort_scope(class_id)
+    with get_connection() as conn:
+        cur = conn.cursor()
+        cur.execute(f"""
+            SELECT COUNT(*), IFNULL(SUM(st.correct_count), 0), IFNULL(SUM(st.incorrect_count), 0),
+                   IFNULL(SUM(st.words_mastered), 0), MAX(st.last_activity)
+            FROM StudentSession ss
+            LEFT JOIN StudentStats st ON st.StudentSession_ID = ss.StudentSession_ID
+            WHERE ss.role = 'student'{scope}
+        """, params)
+        row = cur.fetchone()
+        return dict(zip(["students", "correct", "incorrect", "mastered", "last_activity"], row))
+
+def get_cohort_dashboard(limit=20, offset=0, class_id=None):
+    scope, params = _cohort_scope(class_id)
+    with get_connection() as conn:
+        cur = conn.cursor()
+        cur.execute(f"""
+            SELECT ss.StudentSession_ID, ss.telegram_id, ss.level,
+                   IFNULL(st.correct_count, 0), IFNULL(st.incorrect_count, 0),
+                   IFNULL(st.words_practiced, 0), IFNULL(st.words_mastered, 0), st.last_activity
+            FROM StudentSession ss
+            LEFT JOIN StudentStats st ON st.StudentSession_ID = ss.StudentSession_ID
+            WHERE ss.role = 'student'{scope}
+            ORDER BY st.last_activity IS NULL, st.last_activity DESC
+            LIMIT ? OFFSET ?
+        """, params + [limit, offset])
+        keys = ["StudentSession_ID", "telegram_id", "level", "correct", "incorrect", "practiced", "mastered", "last_activity"]
+        return [dict(zip(keys, row)) for row in cur.fetchall()]
+
+def get_cohort_module_stats(class_id=None):
+    scope, params = _cohort_scope(class_id)
+    with get_connection() as conn:
+        cur = conn.cursor()
+        cur.execute(f"""
+            SELECT ms.module, COUNT(*), SUM(ms.correct_count), SUM(ms.incorrect_count), SUM(ms.words_mastered)
+            FROM StudentModuleStats ms
+            JOIN StudentSession ss ON ss.StudentSession_ID = ms.StudentSession_ID AND ss.role = 'student'{scope}
+            GROUP BY ms.module
+            ORDER BY ms.module
+        """, params)
+        keys = ["module", "students", "correct", "incorrect", "mastered"]
+        return [dict(zip(keys, row)) for row in cur.fetchall()]
+
+def get_student_module_stats(session_id):
+    with get_connection() as conn:
+        cur = conn.cursor()
+        cur.execute("""
+            SELECT module, correct_count, incorrect_count, words_practiced, words_mastered, last_activity
+            FROM StudentModuleStats
+            WHERE StudentSession_ID = ?
+            ORDER BY module
+        """, (session_id,))
+        keys = ["module", "correct", "incorrect", "practiced", "mastered", "last_activity"]
+        return [dict(zip(keys, row)) for row in cur.fetchall()]
+
+# --- Broadcasts ---
+
+BROADCAST_FIELDS = {
+    "status", "total", "last_session_id", "sent", "failed", "blocked",
+    "report_chat_id", "report_message_id", "finished_at",
+}
+
+def _broadcast_audience_filter(level=None, module=None, active_since=None, class_id=None):
+    scope, params = _class_scope(class_id, "ss.Class_ID")
+    query = f" WHERE ss.role = 'student' AND {scope}"
+    if level:
+        query += " AND ss.level = ?"
+        params.append(level)
+    if active_since:
+        query += " AND ss.last_active >= ?"
+        params.append(active_since)
+    if module:
+        query += """ AND EXISTS (
+            SELECT 1 FROM StudentModuleStats ms
+            WHERE ms.StudentSession_ID = ss.StudentSession_ID AND LOWER(ms.module) = LOWER(?)
+        )"""
+        params.append(module)
+    return query, params
+
+def count_broadcast_audience(level=None, module=None, active_since=None, class_id=None):
+    where, params = _broadcast_audience_filter(level, module, active_since, class_id)
+    with get_connection() as conn:
+        cur = conn.cursor()
+        cur.execute("SELECT COUNT(*) FROM StudentSession ss" + where, params)
+        return cur.fetchone()[0]
+
+def get_broadcast_recipients(after_session_id, limit, level=None, module=None, active_since=None, class_id=None):
+    """Next chunk of (StudentSession_ID, telegram_id) after the checkpoint, in StudentSession_ID order."""
+    where, params = _broadcast_audience_filter(level, module, active_since, class_id)
+    with get_connection() as conn:
+        cur = conn.cursor()
+        cur.execute(
+            "SELECT ss.StudentSession_ID, ss.telegram_id FROM StudentSession ss" + where +
+            " AND ss.StudentSession_ID > ? ORDER BY ss.StudentSession_ID LIMIT ?",
+            params + [after_session_id, limit],
+        )
+        return cur.fetchall()
+
+def create_broadcast(created_by, text, level=None, module=None, active_since=None, class_id=None):
+    with get_connection() as conn:
+        cur = conn.cursor()
+        cur.execute("""
+            INSERT INTO Broadcast (created_by, text, level, module, active_since, class_id)
+            VALUES (?, ?, ?, ?, ?, ?)
+        """, (created_by, text, level, module, active_since, class_id))
+        return cur.lastrowid
+
+def get_broadcast(broadcast_id):
+    with get_connection() as conn:
+        cur = conn.cursor()
+        cur.execute("SELECT * FROM Broadcast WHERE Broadcast_ID = ?", (broadcast_id,))
+        row = cur.fetchone()
+        if not row:
+            return None
+        return dict(zip([d[0] for d in cur.description], row))
+
+def update_broadcast(broadcast_id, **fields):
+    unknown = set(fields) - BROADCAST_FIELDS
+    if unknown:
+        raise ValueError(f"Unknown Broadcast fields: {', '.join(sorted(unknown))}")
+    with get_connection() as conn:
+        cur = conn.cursor()
+        cur.execute(
+            f"UPDATE Broadcast SET {', '.join(f'{k} = ?' for k in fields)} WHERE Broadcast_ID = ?",
+            list(fields.values()) + [broadcast_id],
+        )
+
+def get_running_broadcast_ids():
+    with get_connection() as conn:
+        cur = conn.cursor()
+        cur.execute("SELECT Broadcast_ID FROM Broadcast WHERE status = 'running' ORDER BY Broadcast_ID")
+        return [row[0] for row in cur.fetchall()]
+
+# --- Reminders ---
+
+REMINDER_SETTINGS = ("reminders_enabled", "tz_offset", "quiet_start", "quiet_end")
+
+_LOCAL_HOUR = "CAST(strftime('%H', 'now', tz_offset || ' minutes') AS INTEGER)"
+_NOT_QUIET = f"""NOT (quiet_start IS NOT NULL AND CASE
+    WHEN quiet_start <= quiet_end THEN {_LOCAL_HOUR} >= quiet_start AND {_LOCAL_HOUR} < quiet_end
+    ELSE {_LOCAL_HOUR} >= quiet_start OR {_LOCAL_HOUR} < quiet_end
+END)"""
+
+def get_reminder_candidates(remind_before, idle_before, limit, max_idle_reminders):
+    """Students to remind now as (StudentSession_ID, telegram_id, reason), reason 'due' or 'idle'.
+
+    Both halves are index scans over (role, next_review_at) and (role, last_active);
+    students reminded after remind_before or inside their quiet hours are skipped.
+    A student who never answered is idle since created_at; idle reminders stop after
+    max_idle_reminders in a row without an answer.
+    """
+    common = f"""
+        reminders_enabled = 1
+        AND (reminded_at IS NULL OR reminded_at < ?)
+        AND {_NOT_QUIET}
+    """
+    with get_connection() as conn:
+        cur = conn.cursor()
+        cur.execute(f"""
+            SELECT StudentSession_ID, telegram_id, 'due' FROM StudentSession
+            WHERE role = 'student' AND next_review_at <= CURRENT_TIMESTAMP AND {common}
+            ORDER BY next_review_at LIMIT ?
+        """, (remind_before, limit))
+        due = cur.fetchall()
+        cur.execute(f"""
+            SELECT StudentSession_ID, telegram_id, 'idle' FROM StudentSession
+            WHERE role = 'student'
+              AND (last_active <= ? OR (last_active IS NULL AND DATE(created_at) <= ?))
+              AND idle_reminders < ? AND {common}
+            ORDER BY last_active LIMIT ?
+        """, (idle_before, idle_before, max_idle_reminders, remind_before, limit))
+        seen = {row[0] for row in due}
+        return due + [row for row in cur.fetchall() if row[0] not in seen][:max(0, limit - len(due))]
+
+def mark_reminded(reminders):
+    """Record sent reminders given as (StudentSession_ID, reason); idle ones count towards the cap."""
+    with get_connection() as conn:
+        conn.executemany(
+            """UPDATE StudentSession SET reminded_at = CURRENT_TIMESTAMP, idle_reminders = idle_reminders + ?
+            WHERE StudentSession_ID = ?""",
+            [(int(reason == "idle"), session_id) for session_id, reason in reminders],
+        )
+
+def disable_reminders(session_ids):
+    with get_connection() as conn:
+        conn.executemany(
+            "UPDATE StudentSession SET reminders_enabled = 0 WHERE StudentSession_ID = ?",
+            [(session_id,) for session_id in session_ids],
+        )
+
+def get_reminder_settings(telegram_id):
+    with get_connection() as conn:
+        cur = conn.cursor()
+        cur.execute(
+            f"SELECT {', '.join(REMINDER_SETTINGS)} FROM StudentSession WHERE telegram_id = ?", (telegram_id,)
+        )
+        row = cur.fetchone()
+        return dict(zip(REMINDER_SETTINGS, row)) if row else None
+
+def set_reminder_settings(telegram_id, **fields):
+    unknown = set(fields) - set(REMINDER_SETTINGS)
+    if unknown:
+        raise ValueError(f"Unknown reminder settings: {', '.join(sorted(unknown))}")
+    with get_connection() as conn:
+        conn.execute(
+            f"UPDATE StudentSession SET {', '.join(f'{k} = ?' for k in fields)} WHERE telegram_id = ?",
+            list(fields.values()) + [telegram_id],
+        )
+
+# --- Answer history ---
+
+ROLLUP_NAME = "answer_daily"
+
+def insert_answer_events(events):
+    """Append (StudentSession_ID, Word_ID, is_correct, answered_at unix seconds) rows in one transaction."""
+    with get_connection() as conn:
+        conn.executemany(
+            "INSERT INTO AnswerEvent (StudentSession_ID, Word_ID, is_correct, answered_at) VALUES (?, ?, ?, ?)",
+            events,
+        )
+
+def rollup_answer_events(limit):
+    """Fold up to `limit` events after the checkpoint into the daily aggregates; returns how many were folded.
+
+    Aggregates and checkpoint are updated in one transaction, so every event is counted exactly once.
+    """
+    with get_connection() as conn:
+        cur = conn.cursor()
+        cur.execute("SELECT last_event_id FROM RollupCheckpoint WHERE name = ?", (ROLLUP_NAME,))
+        row = cur.fetchone()
+        after = row[0] if row else 0
+        cur.execute("""
+            SELECT COUNT(*), MAX(AnswerEvent_ID) FROM (
+                SELECT AnswerEvent_ID FROM AnswerEvent WHERE AnswerEvent_ID > ? ORDER BY AnswerEvent_ID LIMIT ?
+            )
+        """, (after, limit))
+        count, upto = cur.fetchone()
+        if not count:
+            return 0
+        for table, key in (("DailyStudentStats", "StudentSession_ID"), ("DailyWordStats", "Word_ID")):
+            cur.execute(f"""
+                INSERT INTO {table} ({key}, day, correct, incorrect)
+                SELECT {key}, date(answered_at, 'unixepoch'), SUM(is_correct), SUM(1 - is_correct)
+                FROM AnswerEvent
+                WHERE AnswerEvent_ID > ? AND AnswerEvent_ID <= ?
+                GROUP BY {key}, date(answered_at, 'unixepoch')
+                ON CONFLICT ({key}, day) DO UPDATE SET
+                    correct = correct + excluded.correct, incorrect = incorrect + excluded.incorrect
+            """, (after, upto))
+        cur.execute("""
+            INSERT INTO RollupCheckpoint (name, last_event_id) VALUES (?, ?)
+            ON CONFLICT (name) DO UPDATE SET last_event_id = excluded.last_event_id
+        """, (ROLLUP_NAME, upto))
+        return count
+
+def prune_answer_events(events_before, daily_before):
+    """Delete rolled-up raw events older than events_before (unix seconds) and daily rows before daily_before."""
+    with get_connection() as conn:
+        cur = conn.cursor()
+        cur.execute("SELECT last_event_id FROM RollupCheckpoint WHERE name = ?", (ROLLUP_NAME,))
+        row = cur.fetchone()
+        upto = row[0] if row else 0
+        # События пишутся в порядке времени: старые — это начало диапазона rowid,
+        # и поиск первого свежего события просматривает только удаляемые строки
+        cur.execute(
+            "SELECT AnswerEvent_ID FROM AnswerEvent WHERE answered_at >= ? ORDER BY AnswerEvent_ID LIMIT 1",
+            (events_before,),
+        )
+        first_kept = cur.fetchone()
+        if first_kept:
+            upto = min(upto, first_kept[0] - 1)
+        cur.execute("DELETE FROM AnswerEvent WHERE AnswerEvent_ID <= ?", (upto,))
+        events = cur.rowcount
+        cur.execute("DELETE FROM DailyStudentStats WHERE day < ?", (daily_before,))
+        cur.execute("DELETE FROM DailyWordStats WHERE day < ?", (daily_before,))
+        return events
+
+def get_daily_student_stats(session_id, since_day):
+    with get_connection() as conn:
+        cur = conn.cursor()
+        cur.execute("""
+            SELECT day, correct, incorrect FROM DailyStudentStats
+            WHERE StudentSession_ID = ? AND day >= ?
+            ORDER BY day
+        """, (session_id, since_day))
+        return [dict(zip(["day", "correct", "incorrect"], row)) for row in cur.fetchall()]
+
+def get_daily_word_stats(word_id, since_day):
+    with get_connection() as conn:
+        cur = conn.cursor()
+        cur.execute("""
+            SELECT day, correct, incorrect FROM DailyWordStats
+            WHERE Word_ID = ? AND day >= ?
+            ORDER BY day
+        """, (word_id, since_day))
+        return [dict(zip(["day", "correct", "incorrect"], row)) for row in cur.fetchall()]
+
+# --- Word difficulty ---
+
+def iter_practice_counts():
+    """Cursor over (StudentSession_ID, Word_ID, correct_count, incorrect_count) of every answered progress row.
+
+    Rows are streamed, not fetched into a list: the analytics job reads millions of them into arrays.
+    """
+    with get_connection() as conn:
+        return conn.execute("""
+            SELECT StudentSession_ID, Word_ID, correct_count, incorrect_count
+            FROM PracticeProgress
+            WHERE correct_count + incorrect_count > 0
+        """)
+
+def iter_module_words():
+    """Cursor over (Word_ID, Class_ID or 0, Module_ID) of teacher words that belong to a module."""
+    with get_connection() as conn:
+        return conn.execute("""
+            SELECT w.Word_ID, IFNULL(w.Class_ID, 0), m.Module_ID
+            FROM Word w
+            JOIN Module m ON m.name = w.module
+            WHERE w.added_by = 'teacher'
+        """)
+
+def replace_word_difficulty(word_rows, module_rows):
+    """Swap in a full recomputation of WordDifficulty and ModuleDifficulty in one transaction."""
+    with get_connection() as conn:
+        conn.execute("DELETE FROM WordDifficulty")
+        conn.executemany("""
+            INSERT INTO WordDifficulty (Word_ID, students, attempts, error_rate, discrimination, computed_at)
+            VALUES (?, ?, ?, ?, ?, ?)
+        """, word_rows)
+        conn.execute("DELETE FROM ModuleDifficulty")
+        conn.executemany("""
+            INSERT INTO ModuleDifficulty
+                (Class_ID, Module_ID, words, mean, p25, median, p75, p90, hardest_word_id, computed_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, module_rows)
+
+def get_hardest_words(class_id=None, limit=5):
+    """Teacher words of a class (None — outside any class) with the highest error rate."""
+    class_clause, params = _class_scope(class_id, "w.Class_ID")
+    with get_connection() as conn:
+        cur = conn.cursor()
+        cur.execute(f"""
+            SELECT w.Word_ID, w.Text, w.translation, w.module, d.students, d.error_rate, d.discrimination
+            FROM WordDifficulty d
+            JOIN Word w ON w.Word_ID = d.Word_ID
+            WHERE w.added_by = 'teacher' AND {class_clause}
+            ORDER BY d.error_rate DESC
+            LIMIT ?
+        """, params + [limit])
+        keys = ["Word_ID", "Text", "translation", "module", "students", "error_rate", "discrimination"]
+        return [dict(zip(keys, row)) for row in cur.fetchall()]
+
+def get_module_difficulty(class_id=None):
+    """Error-rate distribution per module of a class: {module name in lower case: dict}."""
+    with get_connection() as conn:
+        cur = conn.cursor()
+        cur.execute("""
+            SELECT m.name, md.words, md.mean, md.p25, md.median, md.p75, md.p90, md.hardest_word_id
+            FROM ModuleDifficulty md
+            JOIN Module m ON m.Module_ID = md.Module_ID
+            WHERE md.Class_ID = ?
+        """, (class_id or 0,))
+        keys = ["words", "mean", "p25", "median", "p75", "p90", "hardest_word_id"]
+        return {row[0].lower(): dict(zip(keys, row[1:])) for row in cur.fetchall()}
+
+# --- Admin ---
+
+def get_database_stats():
+    """Row counts of the main tables for `python -m bot.admin stats`."""
+    with get_connection() as conn:
+        cur = conn.cursor()
+        cur.execute("SELECT role, COUNT(*) FROM StudentSession GROUP BY role")
+        stats = {"sessions": dict(cur.fetchall())}
+        cur.execute("SELECT added_by, COUNT(*) FROM Word GROUP BY added_by")
+        stats["words"] = dict(cur.fetchall())
+        for key, table in (("classes", "Class"), ("modules", "Module"), ("progress", "PracticeProgress"),
+                           ("answer_events", "AnswerEvent"), ("broadcasts", "Broadcast")):
+            cur.execute(f"SELECT COUNT(*) FROM {table}")
+            stats[key] = cur.fetchone()[0]
+        cur.execute("SELECT IFNULL(SUM(correct_count), 0), IFNULL(SUM(incorrect_count), 0) FROM StudentStats")
+        stats["correct"], stats["incorrect"] = cur.fetchone()
+        cur.execute("SELECT MAX(computed_at) FROM WordDifficulty")
+        stats["difficulty_computed_at"] = cur.fetchone()[0]
+        return stats
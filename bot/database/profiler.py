@@ -0,0 +1,233 @@
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import deque
+from functools import lru_cache
+from typing import Dict, Optional
+
+
+logger = logging.getLogger(__name__)
+
+
+class ProfilerConfig:
+    ENABLED_ENV = "DORI_SQL_PROFILE"
+    SLOW_MS_ENV = "DORI_SQL_SLOW_MS"
+    DEFAULT_SLOW_MS = 50.0
+    MAX_SAMPLES = 1000          # сколько последних замеров хранить для p95
+    REPORT_LIMIT = 20
+    SQL_PREVIEW_LENGTH = 120
+    EXPLAINABLE = ("SELECT", "INSERT", "UPDATE", "DELETE", "REPLACE", "WITH")
+
+
+_LITERAL_RE = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_SPACE_RE = re.compile(r"\s+")
+
+
+@lru_cache(maxsize=1024)
+def normalize_sql(sql: str) -> str:
+    """Collapse whitespace and replace literals with '?' so equal statements group together."""
+    return _LITERAL_RE.sub("?", _SPACE_RE.sub(" ", sql).strip())
+
+
+class QueryStat:
+    __slots__ = ("sql", "calls", "total", "rows", "samples")
+
+    def __init__(self, sql: str):
+        self.sql = sql
+        self.calls = 0
+        self.total = 0.0
+        self.rows = 0
+        self.samples = deque(maxlen=ProfilerConfig.MAX_SAMPLES)
+
+    @property
+    def p95(self) -> float:
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+
+
+class QueryProfiler:
+    def __init__(self):
+        self.enabled = False
+        self.slow_ms = ProfilerConfig.DEFAULT_SLOW_MS
+        self._stats: Dict[str, QueryStat] = {}
+        self._lock = threading.Lock()
+
+    def configure(self, enabled: Optional[bool] = None, slow_ms: Optional[float] = None):
+        if enabled is None:
+            enabled = os.getenv(ProfilerConfig.ENABLED_ENV, "").lower() in ("1", "true", "yes", "on")
+        if slow_ms is None:
+            slow_ms = float(os.getenv(ProfilerConfig.SLOW_MS_ENV, ProfilerConfig.DEFAULT_SLOW_MS))
+        self.enabled = enabled
+        self.slow_ms = slow_ms
+        if enabled:
+            logger.info(f"SQL profiling enabled, slow query threshold {slow_ms:.0f} ms")
+
+    def connect(self, db_path: str, **kwargs) -> sqlite3.Connection:
+        if not self.enabled:
+            return sqlite3.connect(db_path, **kwargs)
+        return sqlite3.connect(db_path, factory=ProfiledConnection, **kwargs)
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+
+    # --- Recording (вызывается из ProfiledCursor) ---
+
+    def _stat(self, sql: str) -> QueryStat:
+        key = normalize_sql(sql)
+        with self._lock:
+            stat = self._stats.get(key)
+            if stat is None:
+                stat = self._stats[key] = QueryStat(key)
+            stat.calls += 1
+            return stat
+
+    def _add(self, stat: QueryStat, elapsed: float, rows: int):
+        with self._lock:
+            stat.total += elapsed
+            stat.rows += rows
+
+    def _finish(self, stat: QueryStat, elapsed: float):
+        with self._lock:
+            stat.samples.append(elapsed)
+
+    def _log_slow(self, conn: sqlite3.Connection, sql: str, params, elapsed: float):
+        plan = "n/a"
+        if sql.lstrip().upper().startswith(ProfilerConfig.EXPLAINABLE):
+            try:
+                rows = sqlite3.Connection.execute(conn, f"EXPLAIN QUERY PLAN {sql}", params).fetchall()
+                plan = "; ".join(row[-1] for row in rows) or "n/a"
+            except sqlite3.Error as e:
+                plan = f"unavailable ({e})"
+        logger.warning(f"Slow query ({elapsed * 1000:.1f} ms): {normalize_sql(sql)} | plan: {plan}")
+
+    # --- Reporting ---
+
+    def snapshot(self) -> list:
+        with self._lock:
+            return [
+                {
+                    "sql": s.sql,
+                    "calls": s.calls,
+                    "total_ms": s.total * 1000,
+                    "p95_ms": s.p95 * 1000,
+                    "rows": s.rows,
+                }
+                for s in self._stats.values()
+            ]
+
+    def report(self, limit: int = ProfilerConfig.REPORT_LIMIT) -> str:
+        stats = sorted(self.snapshot(), key=lambda s: s["total_ms"], reverse=True)
+        if not stats:
+            return "SQL profile: no statements recorded."
+        lines = [f"SQL profile: {len(stats)} statements, top {min(limit, len(stats))} by total time"]
+        lines.append(f"{'calls':>7} {'total ms':>10} {'p95 ms':>8} {'rows':>9}  sql")
+        for s in stats[:limit]:
+            sql = s["sql"]
+            if len(sql) > ProfilerConfig.SQL_PREVIEW_LENGTH:
+                sql = sql[:ProfilerConfig.SQL_PREVIEW_LENGTH - 3] + "..."
+            lines.append(f"{s['calls']:>7} {s['total_ms']:>10.1f} {s['p95_ms']:>8.2f} {s['rows']:>9}  {sql}")
+        return "\n".join(lines)
+
+    def dump(self):
+        if self.enabled:
+            logger.info(self.report())
+
+
+class ProfiledCursor(sqlite3.Cursor):
+    """Cursor that times execute + fetch of each statement and reports to query_profiler."""
+
+    _stat = None
+
+    def _begin(self, sql: str, params):
+        self._close_sample()
+        self._stat = query_profiler._stat(sql)
+        self._sql = sql
+        self._params = params
+        self._elapsed = 0.0
+        self._slow_logged = False
+
+    def _account(self, elapsed: float, rows: int):
+        if self._stat is None:
+            return
+        self._elapsed += elapsed
+        query_profiler._add(self._stat, elapsed, rows)
+        if not self._slow_logged and self._elapsed * 1000 >= query_profiler.slow_ms:
+            self._slow_logged = True
+            query_profiler._log_slow(self.connection, self._sql, self._params, self._elapsed)
+
+    def _close_sample(self):
+        if self._stat is not None:
+            query_profiler._finish(self._stat, self._elapsed)
+            self._stat = None
+
+    def execute(self, sql, parameters=()):
+        self._begin(sql, parameters)
+        start = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            self._account(time.perf_counter() - start, max(self.rowcount, 0))
+
+    def executemany(self, sql, seq_of_parameters):
+        self._begin(sql, ())
+        start = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            self._account(time.perf_counter() - start, max(self.rowcount, 0))
+
+    def fetchone(self):
+        start = time.perf_counter()
+        row = super().fetchone()
+        self._account(time.perf_counter() - start, int(row is not None))
+        return row
+
+    def fetchmany(self, size=None):
+        start = time.perf_counter()
+        rows = super().fetchmany(self.arraysize if size is None else size)
+        self._account(time.perf_counter() - start, len(rows))
+        return rows
+
+    def fetchall(self):
+        start = time.perf_counter()
+        rows = super().fetchall()
+        self._account(time.perf_counter() - start, len(rows))
+        return rows
+
+    def __next__(self):
+        start = time.perf_counter()
+        try:
+            row = super().__next__()
+        except StopIteration:
+            self._account(time.perf_counter() - start, 0)
+            raise
+        self._account(time.perf_counter() - start, 1)
+        return row
+
+    def close(self):
+        self._close_sample()
+        super().close()
+
+    def __del__(self):
+        self._close_sample()
+
+
+class ProfiledConnection(sqlite3.Connection):
+    def cursor(self, factory=ProfiledCursor):
+        return super().cursor(factory)
+
+    # sqlite3.Connection.execute() не вызывает self.cursor(), поэтому оборачиваем явно
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+
+query_profiler = QueryProfiler()
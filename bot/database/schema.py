@@ -0,0 +1,615 @@
+# schema.py — database schema for Dori Bot
+
+import sqlite3
+
+
+# Слово считается выученным после MASTERY_CORRECT верных ответов, если верных больше, чем ошибок
+MASTERY_CORRECT = 3
+_MASTERED = "({row}.correct_count >= %d AND {row}.correct_count > {row}.incorrect_count)" % MASTERY_CORRECT
+_WORD_MODULE = "IFNULL((SELECT module FROM Word WHERE Word_ID = {row}.Word_ID), '')"
+
+# Интервал до следующего повторения слова (в днях) по разнице верных и неверных ответов
+REVIEW_INTERVAL_DAYS = (1, 2, 4, 7, 14, 30)
+_REVIEW_DAYS = "CASE MIN(MAX({row}.correct_count - {row}.incorrect_count, 0), %d) %s END" % (
+    len(REVIEW_INTERVAL_DAYS) - 1,
+    " ".join(f"WHEN {i} THEN {days}" for i, days in enumerate(REVIEW_INTERVAL_DAYS)),
+)
+
+
+def review_interval_days(correct, incorrect):
+    return REVIEW_INTERVAL_DAYS[min(max(correct - incorrect, 0), len(REVIEW_INTERVAL_DAYS) - 1)]
+
+
+# Агрегаты прогресса для панели преподавателя. Поддерживаются триггерами на PracticeProgress,
+# поэтому панель читает готовые строки, а не сканирует весь прогресс.
+PROGRESS_AGGREGATES_SQL = """
+CREATE TABLE IF NOT EXISTS StudentStats (
+    StudentSession_ID INTEGER PRIMARY KEY,
+    correct_count INTEGER DEFAULT 0,
+    incorrect_count INTEGER DEFAULT 0,
+    words_practiced INTEGER DEFAULT 0,
+    words_mastered INTEGER DEFAULT 0,
+    last_activity DATETIME,
+    current_streak INTEGER DEFAULT 0,
+    best_streak INTEGER DEFAULT 0,
+    words_added INTEGER DEFAULT 0,
+    modules_completed INTEGER DEFAULT 0
+);
+
+CREATE TABLE IF NOT EXISTS StudentModuleStats (
+    StudentSession_ID INTEGER NOT NULL,
+    module TEXT NOT NULL,
+    correct_count INTEGER DEFAULT 0,
+    incorrect_count INTEGER DEFAULT 0,
+    words_practiced INTEGER DEFAULT 0,
+    words_mastered INTEGER DEFAULT 0,
+    last_activity DATETIME,
+    completed_at DATETIME,
+    PRIMARY KEY (StudentSession_ID, module)
+);
+
+CREATE TRIGGER IF NOT EXISTS trg_progress_insert AFTER INSERT ON PracticeProgress
+BEGIN
+    INSERT INTO StudentStats (StudentSession_ID, correct_count, incorrect_count, words_practiced, words_mastered, last_activity)
+    VALUES (NEW.StudentSession_ID, NEW.correct_count, NEW.incorrect_count, 1, {new_mastered}, NEW.last_practiced)
+    ON CONFLICT(StudentSession_ID) DO UPDATE SET
+        correct_count = correct_count + excluded.correct_count,
+        incorrect_count = incorrect_count + excluded.incorrect_count,
+        words_practiced = words_practiced + 1,
+        words_mastered = words_mastered + excluded.words_mastered,
+        last_activity = MAX(IFNULL(last_activity, excluded.last_activity), excluded.last_activity);
+
+    INSERT INTO StudentModuleStats (StudentSession_ID, module, correct_count, incorrect_count, words_practiced, words_mastered, last_activity)
+    VALUES (NEW.StudentSession_ID, {new_module}, NEW.correct_count, NEW.incorrect_count, 1, {new_mastered}, NEW.last_practiced)
+    ON CONFLICT(StudentSession_ID, module) DO UPDATE SET
+        correct_count = correct_count + excluded.correct_count,
+        incorrect_count = incorrect_count + excluded.incorrect_count,
+        words_practiced = words_practiced + 1,
+        words_mastered = words_mastered + excluded.words_mastered,
+        last_activity = MAX(IFNULL(last_activity, excluded.last_activity), excluded.last_activity);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_progress_update AFTER UPDATE OF correct_count, incorrect_count ON PracticeProgress
+BEGIN
+    UPDATE StudentStats SET
+        correct_count = correct_count + NEW.correct_count - OLD.correct_count,
+        incorrect_count = incorrect_count + NEW.incorrect_count - OLD.incorrect_count,
+        words_mastered = words_mastered + {new_mastered} - {old_mastered},
+        last_activity = IFNULL(NEW.last_practiced, last_activity)
+    WHERE StudentSession_ID = NEW.StudentSession_ID;
+
+    UPDATE StudentModuleStats SET
+        correct_count = correct_count + NEW.correct_count - OLD.correct_count,
+        incorrect_count = incorrect_count + NEW.incorrect_count - OLD.incorrect_count,
+        words_mastered = words_mastered + {new_mastered} - {old_mastered},
+        last_activity = IFNULL(NEW.last_practiced, last_activity)
+    WHERE StudentSession_ID = NEW.StudentSession_ID AND module = {new_module};
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_progress_delete AFTER DELETE ON PracticeProgress
+BEGIN
+    UPDATE StudentStats SET
+        correct_count = correct_count - OLD.correct_count,
+        incorrect_count = incorrect_count - OLD.incorrect_count,
+        words_practiced = words_practiced - 1,
+        words_mastered = words_mastered - {old_mastered}
+    WHERE StudentSession_ID = OLD.StudentSession_ID;
+
+    UPDATE StudentModuleStats SET
+        correct_count = correct_count - OLD.correct_count,
+        incorrect_count = incorrect_count - OLD.incorrect_count,
+        words_practiced = words_practiced - 1,
+        words_mastered = words_mastered - {old_mastered}
+    WHERE StudentSession_ID = OLD.StudentSession_ID AND module = {old_module};
+END;
+
+-- Строки по модулям привязаны к модулю слова: при его смене прогресс переносится в новый модуль
+CREATE TRIGGER IF NOT EXISTS trg_word_module_progress AFTER UPDATE OF module ON Word
+WHEN IFNULL(OLD.module, '') != IFNULL(NEW.module, '')
+BEGIN
+    UPDATE StudentModuleStats SET
+        correct_count = StudentModuleStats.correct_count - p.correct_count,
+        incorrect_count = StudentModuleStats.incorrect_count - p.incorrect_count,
+        words_practiced = StudentModuleStats.words_practiced - 1,
+        words_mastered = StudentModuleStats.words_mastered - {progress_mastered}
+    FROM PracticeProgress p
+    WHERE p.Word_ID = NEW.Word_ID AND p.StudentSession_ID = StudentModuleStats.StudentSession_ID
+      AND StudentModuleStats.module = IFNULL(OLD.module, '');
+
+    INSERT INTO StudentModuleStats (StudentSession_ID, module, correct_count, incorrect_count, words_practiced, words_mastered, last_activity)
+    SELECT p.StudentSession_ID, IFNULL(NEW.module, ''), p.correct_count, p.incorrect_count, 1, {progress_mastered}, p.last_practiced
+    FROM PracticeProgress p
+    WHERE p.Word_ID = NEW.Word_ID
+    ON CONFLICT(StudentSession_ID, module) DO UPDATE SET
+        correct_count = correct_count + excluded.correct_count,
+        incorrect_count = incorrect_count + excluded.incorrect_count,
+        words_practiced = words_practiced + 1,
+        words_mastered = words_mastered + excluded.words_mastered,
+        last_activity = MAX(IFNULL(last_activity, excluded.last_activity), excluded.last_activity);
+END;
+""".format(
+    new_mastered=_MASTERED.format(row="NEW"),
+    old_mastered=_MASTERED.format(row="OLD"),
+    progress_mastered=_MASTERED.format(row="p"),
+    new_module=_WORD_MODULE.format(row="NEW"),
+    old_module=_WORD_MODULE.format(row="OLD"),
+)
+
+
+# Счётчики для достижений: серия верных ответов и число добавленных слов
+ACHIEVEMENT_COUNTERS_SQL = """
+CREATE TRIGGER IF NOT EXISTS trg_progress_streak_insert AFTER INSERT ON PracticeProgress
+BEGIN
+    INSERT INTO StudentStats (StudentSession_ID, current_streak, best_streak)
+    VALUES (NEW.StudentSession_ID, NEW.correct_count > 0, NEW.correct_count > 0)
+    ON CONFLICT(StudentSession_ID) DO UPDATE SET
+        current_streak = CASE WHEN NEW.correct_count > 0 THEN current_streak + 1 ELSE 0 END,
+        best_streak = MAX(best_streak, CASE WHEN NEW.correct_count > 0 THEN current_streak + 1 ELSE 0 END);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_progress_streak_update AFTER UPDATE OF correct_count, incorrect_count ON PracticeProgress
+BEGIN
+    UPDATE StudentStats SET
+        current_streak = CASE WHEN NEW.correct_count > OLD.correct_count THEN current_streak + 1 ELSE 0 END,
+        best_streak = MAX(best_streak, CASE WHEN NEW.correct_count > OLD.correct_count THEN current_streak + 1 ELSE 0 END)
+    WHERE StudentSession_ID = NEW.StudentSession_ID;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_word_added AFTER INSERT ON Word
+WHEN NEW.StudentSession_ID IS NOT NULL
+BEGIN
+    INSERT INTO StudentStats (StudentSession_ID, words_added) VALUES (NEW.StudentSession_ID, 1)
+    ON CONFLICT(StudentSession_ID) DO UPDATE SET words_added = words_added + 1;
+END;
+"""
+
+
+# Рассылки преподавателей: фильтры аудитории и контрольная точка для продолжения после перезапуска
+BROADCAST_SQL = """
+CREATE TABLE IF NOT EXISTS Broadcast (
+    Broadcast_ID INTEGER PRIMARY KEY AUTOINCREMENT,
+    created_by INTEGER NOT NULL,            -- StudentSession_ID преподавателя, как в Class
+    text TEXT NOT NULL,
+    level TEXT,
+    module TEXT,
+    active_since DATE,
+    class_id INTEGER,
+    status TEXT DEFAULT 'draft' CHECK(status IN ('draft', 'running', 'done', 'cancelled')),
+    total INTEGER DEFAULT 0,
+    last_session_id INTEGER DEFAULT 0,
+    sent INTEGER DEFAULT 0,
+    failed INTEGER DEFAULT 0,
+    blocked INTEGER DEFAULT 0,
+    report_chat_id INTEGER,
+    report_message_id INTEGER,
+    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+    finished_at DATETIME
+);
+
+CREATE INDEX IF NOT EXISTS idx_broadcast_status ON Broadcast (status);
+"""
+
+
+# Напоминания: StudentSession.next_review_at — ближайший due_at студента, поддерживается триггерами,
+# чтобы планировщик находил студентов по индексу (role, next_review_at), а не сканировал прогресс.
+REMINDERS_SQL = """
+CREATE INDEX IF NOT EXISTS idx_progress_student_due ON PracticeProgress (StudentSession_ID, due_at);
+CREATE INDEX IF NOT EXISTS idx_session_role_next_review ON StudentSession (role, next_review_at);
+CREATE INDEX IF NOT EXISTS idx_session_role_last_active ON StudentSession (role, last_active);
+
+CREATE TRIGGER IF NOT EXISTS trg_progress_due_insert AFTER INSERT ON PracticeProgress
+WHEN NEW.due_at IS NOT NULL
+BEGIN
+    UPDATE StudentSession SET next_review_at = (
+        SELECT MIN(due_at) FROM PracticeProgress WHERE StudentSession_ID = NEW.StudentSession_ID
+    ) WHERE StudentSession_ID = NEW.StudentSession_ID;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_progress_due_update AFTER UPDATE OF due_at ON PracticeProgress
+BEGIN
+    UPDATE StudentSession SET next_review_at = (
+        SELECT MIN(due_at) FROM PracticeProgress WHERE StudentSession_ID = NEW.StudentSession_ID
+    ) WHERE StudentSession_ID = NEW.StudentSession_ID;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_progress_due_delete AFTER DELETE ON PracticeProgress
+BEGIN
+    UPDATE StudentSession SET next_review_at = (
+        SELECT MIN(due_at) FROM PracticeProgress WHERE StudentSession_ID = OLD.StudentSession_ID
+    ) WHERE StudentSession_ID = OLD.StudentSession_ID;
+END;
+"""
+
+
+# Каталог модулей: Word.module остаётся свободным текстом, а Module и ModuleWordCount поддерживаются
+# триггерами, чтобы список модулей строился за O(модулей), а не DISTINCT по всей таблице Word.
+# Счётчики ведутся по классу (Class_ID = 0 — слова без класса).
+MODULE_CATALOG_SQL = """
+CREATE TABLE IF NOT EXISTS Module (
+    Module_ID INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT NOT NULL UNIQUE COLLATE NOCASE,
+    created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS ModuleWordCount (
+    Module_ID INTEGER NOT NULL,
+    Class_ID INTEGER NOT NULL DEFAULT 0,
+    level TEXT NOT NULL,
+    added_by TEXT NOT NULL,
+    word_count INTEGER DEFAULT 0,
+    PRIMARY KEY (Class_ID, added_by, Module_ID, level)
+);
+
+CREATE INDEX IF NOT EXISTS idx_word_student_module ON Word (StudentSession_ID, module);
+
+CREATE TRIGGER IF NOT EXISTS trg_module_word_insert AFTER INSERT ON Word
+WHEN NEW.module IS NOT NULL AND NEW.module != ''
+BEGIN
+    INSERT OR IGNORE INTO Module (name) VALUES (NEW.module);
+    INSERT INTO ModuleWordCount (Module_ID, Class_ID, level, added_by, word_count)
+    SELECT Module_ID, IFNULL(NEW.Class_ID, 0), IFNULL(NEW.level, ''), NEW.added_by, 1 FROM Module WHERE name = NEW.module
+    ON CONFLICT(Class_ID, added_by, Module_ID, level) DO UPDATE SET word_count = word_count + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_module_word_update AFTER UPDATE OF module, level, added_by, Class_ID ON Word
+BEGIN
+    UPDATE ModuleWordCount SET word_count = word_count - 1
+    WHERE Module_ID = (SELECT Module_ID FROM Module WHERE name = OLD.module)
+      AND Class_ID = IFNULL(OLD.Class_ID, 0) AND level = IFNULL(OLD.level, '') AND added_by = OLD.added_by;
+
+    INSERT OR IGNORE INTO Module (name) SELECT NEW.module WHERE NEW.module IS NOT NULL AND NEW.module != '';
+    INSERT INTO ModuleWordCount (Module_ID, Class_ID, level, added_by, word_count)
+    SELECT Module_ID, IFNULL(NEW.Class_ID, 0), IFNULL(NEW.level, ''), NEW.added_by, 1 FROM Module WHERE name = NEW.module
+    ON CONFLICT(Class_ID, added_by, Module_ID, level) DO UPDATE SET word_count = word_count + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_module_word_delete AFTER DELETE ON Word
+BEGIN
+    UPDATE ModuleWordCount SET word_count = word_count - 1
+    WHERE Module_ID = (SELECT Module_ID FROM Module WHERE name = OLD.module)
+      AND Class_ID = IFNULL(OLD.Class_ID, 0) AND level = IFNULL(OLD.level, '') AND added_by = OLD.added_by;
+END;
+"""
+
+_MODULE_CATALOG_TRIGGERS = ("trg_module_word_insert", "trg_module_word_update", "trg_module_word_delete")
+
+
+def rebuild_module_catalog(cur):
+    """Recompute Module and ModuleWordCount from Word (first run and repairs)."""
+    cur.execute("DELETE FROM ModuleWordCount")
+    cur.execute("""
+        INSERT OR IGNORE INTO Module (name)
+        SELECT DISTINCT module FROM Word WHERE module IS NOT NULL AND module != ''
+    """)
+    cur.execute("""
+        INSERT INTO ModuleWordCount (Module_ID, Class_ID, level, added_by, word_count)
+        SELECT m.Module_ID, IFNULL(w.Class_ID, 0), IFNULL(w.level, ''), w.added_by, COUNT(*)
+        FROM Word w
+        JOIN Module m ON m.name = w.module
+        GROUP BY m.Module_ID, IFNULL(w.Class_ID, 0), IFNULL(w.level, ''), w.added_by
+    """)
+
+
+# Классы: у преподавателя StudentSession.Class_ID — класс, с которым он сейчас работает,
+# у студента — класс, в котором он учится. Слова преподавателя без класса видны всем студентам без класса.
+CLASS_SQL = """
+CREATE TABLE IF NOT EXISTS Class (
+    Class_ID INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT NOT NULL,
+    join_code TEXT NOT NULL UNIQUE,
+    created_by INTEGER NOT NULL,
+    created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_class_created_by ON Class (created_by);
+CREATE INDEX IF NOT EXISTS idx_word_class_teacher ON Word (added_by, Class_ID, module COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS idx_session_class_role_score ON StudentSession (role, Class_ID, score);
+CREATE INDEX IF NOT EXISTS idx_session_class_role_level_score ON StudentSession (role, Class_ID, level, score);
+"""
+
+
+# Журнал ответов: только дописывается (пачками из services/answer_log.py), без вторичных индексов.
+# Периодическая свёртка переносит события в дневные агрегаты и удаляет старые сырые события.
+# AUTOINCREMENT: после удаления всех событий rowid не начинаются заново ниже RollupCheckpoint.
+ANSWER_EVENTS_SQL = """
+CREATE TABLE IF NOT EXISTS AnswerEvent (
+    AnswerEvent_ID INTEGER PRIMARY KEY AUTOINCREMENT,
+    StudentSession_ID INTEGER NOT NULL,
+    Word_ID INTEGER NOT NULL,
+    is_correct INTEGER NOT NULL,
+    answered_at INTEGER NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS DailyStudentStats (
+    StudentSession_ID INTEGER NOT NULL,
+    day TEXT NOT NULL,
+    correct INTEGER NOT NULL DEFAULT 0,
+    incorrect INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (StudentSession_ID, day)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS DailyWordStats (
+    Word_ID INTEGER NOT NULL,
+    day TEXT NOT NULL,
+    correct INTEGER NOT NULL DEFAULT 0,
+    incorrect INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (Word_ID, day)
+) WITHOUT ROWID;
+
+CREATE INDEX IF NOT EXISTS idx_daily_word_day ON DailyWordStats (day);
+
+CREATE TABLE IF NOT EXISTS RollupCheckpoint (
+    name TEXT PRIMARY KEY,
+    last_event_id INTEGER NOT NULL DEFAULT 0
+);
+"""
+
+
+# Сложность слов по всей когорте: пересчитывается целиком пакетной задачей services/analytics.py.
+# error_rate — сглаженная доля ошибок, discrimination — корреляция успеха на слове
+# с общей успеваемостью студента (NULL, пока студентов слишком мало).
+# ModuleDifficulty — распределение error_rate по словам модуля класса (Class_ID 0 — без класса).
+WORD_DIFFICULTY_SQL = """
+CREATE TABLE IF NOT EXISTS WordDifficulty (
+    Word_ID INTEGER PRIMARY KEY,
+    students INTEGER NOT NULL,
+    attempts INTEGER NOT NULL,
+    error_rate REAL NOT NULL,
+    discrimination REAL,
+    computed_at INTEGER NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_word_difficulty_error_rate ON WordDifficulty (error_rate);
+
+CREATE TABLE IF NOT EXISTS ModuleDifficulty (
+    Class_ID INTEGER NOT NULL,
+    Module_ID INTEGER NOT NULL,
+    words INTEGER NOT NULL,
+    mean REAL NOT NULL,
+    p25 REAL NOT NULL,
+    median REAL NOT NULL,
+    p75 REAL NOT NULL,
+    p90 REAL NOT NULL,
+    hardest_word_id INTEGER,
+    computed_at INTEGER NOT NULL,
+    PRIMARY KEY (Class_ID, Module_ID)
+) WITHOUT ROWID;
+"""
+
+def _table_exists(cur, name):
+    cur.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (name,))
+    return cur.fetchone() is not None
+
+
+def _index_exists(cur, name):
+    cur.execute("SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = ?", (name,))
+    return cur.fetchone() is not None
+
+
+def _columns(cur, table):
+    cur.execute(f"PRAGMA table_info({table})")
+    return {row[1] for row in cur.fetchall()}
+
+
+def _add_missing_columns(cur, table, columns):
+    """ALTER TABLE ADD COLUMN for columns missing in an existing table; returns the added names."""
+    existing = _columns(cur, table)
+    added = []
+    for name, decl in columns.items():
+        if name not in existing:
+            cur.execute(f"ALTER TABLE {table} ADD COLUMN {name} {decl}")
+            added.append(name)
+    return added
+
+
+def _backfill_review_schedule(cur):
+    days = _REVIEW_DAYS.format(row="PracticeProgress")
+    cur.execute(f"""
+        UPDATE PracticeProgress
+        SET due_at = datetime(IFNULL(last_practiced, CURRENT_TIMESTAMP), '+' || ({days}) || ' days')
+        WHERE due_at IS NULL
+    """)
+    cur.execute("""
+        UPDATE StudentSession SET next_review_at = (
+            SELECT MIN(due_at) FROM PracticeProgress p WHERE p.StudentSession_ID = StudentSession.StudentSession_ID
+        )
+    """)
+
+
+def _backfill_words_added(cur):
+    cur.execute("""
+        INSERT INTO StudentStats (StudentSession_ID, words_added)
+        SELECT StudentSession_ID, COUNT(*) FROM Word
+        WHERE StudentSession_ID IS NOT NULL
+        GROUP BY StudentSession_ID
+        ON CONFLICT(StudentSession_ID) DO UPDATE SET words_added = excluded.words_added
+    """)
+
+
+def _deduplicate_user_achievements(cur):
+    # Уникальный индекс нельзя создать, пока в таблице есть повторные награды
+    cur.execute("""
+        DELETE FROM UserAchievement WHERE UserAchievement_ID NOT IN (
+            SELECT MIN(UserAchievement_ID) FROM UserAchievement GROUP BY StudentSession_ID, Achievement_ID
+        )
+    """)
+
+
+def _upgrade_answer_event_ids(cur):
+    """Rebuild an AnswerEvent table created without AUTOINCREMENT, continuing ids after the rollup checkpoint."""
+    cur.execute("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'AnswerEvent'")
+    if "AUTOINCREMENT" in cur.fetchone()[0].upper():
+        return
+    cur.execute("ALTER TABLE AnswerEvent RENAME TO AnswerEvent_old")
+    cur.executescript(ANSWER_EVENTS_SQL)
+    cur.execute("INSERT INTO AnswerEvent SELECT * FROM AnswerEvent_old")
+    cur.execute("DROP TABLE AnswerEvent_old")
+    # Таблица могла быть пуста после очистки — следующий id должен быть больше уже свёрнутых
+    cur.execute("DELETE FROM sqlite_sequence WHERE name = 'AnswerEvent'")
+    cur.execute("""
+        INSERT INTO sqlite_sequence (name, seq) SELECT 'AnswerEvent', MAX(
+            IFNULL((SELECT MAX(AnswerEvent_ID) FROM AnswerEvent), 0),
+            IFNULL((SELECT MAX(last_event_id) FROM RollupCheckpoint), 0)
+        )
+    """)
+
+
+def _convert_broadcast_creators(cur):
+    # Прежние версии хранили в Broadcast.created_by telegram_id преподавателя
+    cur.execute("""
+        UPDATE Broadcast SET created_by = ss.StudentSession_ID
+        FROM StudentSession ss
+        WHERE ss.telegram_id = Broadcast.created_by
+    """)
+
+
+def _backfill_progress_aggregates(cur):
+    mastered = _MASTERED.format(row="p")
+    cur.execute(f"""
+        INSERT INTO StudentStats (StudentSession_ID, correct_count, incorrect_count, words_practiced, words_mastered, last_activity)
+        SELECT p.StudentSession_ID, SUM(p.correct_count), SUM(p.incorrect_count), COUNT(*), SUM({mastered}), MAX(p.last_practiced)
+        FROM PracticeProgress p
+        GROUP BY p.StudentSession_ID
+    """)
+    cur.execute(f"""
+        INSERT INTO StudentModuleStats (StudentSession_ID, module, correct_count, incorrect_count, words_practiced, words_mastered, last_activity)
+        SELECT p.StudentSession_ID, IFNULL(w.module, ''), SUM(p.correct_count), SUM(p.incorrect_count), COUNT(*), SUM({mastered}), MAX(p.last_practiced)
+        FROM PracticeProgress p
+        LEFT JOIN Word w ON w.Word_ID = p.Word_ID
+        GROUP BY p.StudentSession_ID, IFNULL(w.module, '')
+    """)
+
+
+def initialize_db(db_path="dori_bot.db"):
+    conn = sqlite3.connect(db_path)
+    # Действует только для новой базы; старые переводит на incremental_vacuum обслуживание (services/maintenance.py)
+    conn.execute("PRAGMA auto_vacuum = INCREMENTAL;")
+    # WAL: читатели (в том числе онлайн-бэкап) не блокируют запись ответов студентов
+    conn.execute("PRAGMA journal_mode = WAL;")
+    conn.execute("PRAGMA foreign_keys = ON;")
+    cur = conn.cursor()
+    new_aggregates = not _table_exists(cur, "StudentStats")
+
+    cur.executescript("""
+    CREATE TABLE IF NOT EXISTS StudentSession (
+        StudentSession_ID INTEGER PRIMARY KEY AUTOINCREMENT,
+        telegram_id INTEGER NOT NULL UNIQUE,
+        localID TEXT,
+        role TEXT DEFAULT 'student',
+        level TEXT DEFAULT 'A1',
+        created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+        score INTEGER DEFAULT 0,
+        last_active DATE
+    );
+
+    CREATE TABLE IF NOT EXISTS Word (
+        Word_ID INTEGER PRIMARY KEY AUTOINCREMENT,
+        Text TEXT NOT NULL,
+        translation TEXT NOT NULL,
+        part_of_speech TEXT,
+        added_by TEXT CHECK(added_by IN ('teacher', 'student')) NOT NULL,
+        created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+        localID TEXT,
+        level TEXT CHECK(level IN ('A1', 'A2', 'B1')),
+        StudentSession_ID INTEGER,
+        synonyms TEXT,
+        module TEXT
+    );
+
+    CREATE TABLE IF NOT EXISTS LibraryWord (
+        LibraryWord_ID INTEGER PRIMARY KEY AUTOINCREMENT,
+        added_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+        can_edit BOOLEAN DEFAULT FALSE,
+        StudentSession_ID INTEGER,
+        Word_ID INTEGER
+    );
+
+    CREATE TABLE IF NOT EXISTS PracticeProgress (
+        PracticeProgress_ID INTEGER PRIMARY KEY AUTOINCREMENT,
+        StudentSession_ID INTEGER,
+        Word_ID INTEGER,
+        correct_count INTEGER DEFAULT 0,
+        incorrect_count INTEGER DEFAULT 0,
+        last_practiced DATETIME
+    );
+
+    CREATE TABLE IF NOT EXISTS Achievement (
+        Achievement_ID INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT NOT NULL,
+        description TEXT,
+        criteria TEXT
+    );
+
+    CREATE TABLE IF NOT EXISTS UserAchievement (
+        UserAchievement_ID INTEGER PRIMARY KEY AUTOINCREMENT,
+        StudentSession_ID INTEGER,
+        Achievement_ID INTEGER,
+        timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
+    );
+
+    CREATE INDEX IF NOT EXISTS idx_progress_student_word ON PracticeProgress (StudentSession_ID, Word_ID);
+    CREATE INDEX IF NOT EXISTS idx_session_role_score ON StudentSession (role, score);
+    CREATE INDEX IF NOT EXISTS idx_session_role_level_score ON StudentSession (role, level, score);
+    """)
+
+    cur.executescript(PROGRESS_AGGREGATES_SQL)
+    if new_aggregates:
+        _backfill_progress_aggregates(cur)
+
+    added = _add_missing_columns(cur, "StudentStats", {
+        "current_streak": "INTEGER DEFAULT 0",
+        "best_streak": "INTEGER DEFAULT 0",
+        "words_added": "INTEGER DEFAULT 0",
+        "modules_completed": "INTEGER DEFAULT 0",
+    })
+    _add_missing_columns(cur, "StudentModuleStats", {"completed_at": "DATETIME"})
+    if new_aggregates or "words_added" in added:
+        _backfill_words_added(cur)
+    cur.executescript(ACHIEVEMENT_COUNTERS_SQL)
+    cur.executescript(BROADCAST_SQL)
+    if not _index_exists(cur, "idx_broadcast_created_by"):
+        _convert_broadcast_creators(cur)
+        cur.execute("CREATE INDEX idx_broadcast_created_by ON Broadcast (created_by)")
+
+    added = _add_missing_columns(cur, "PracticeProgress", {"due_at": "DATETIME"})
+    _add_missing_columns(cur, "StudentSession", {
+        "next_review_at": "DATETIME",
+        "reminded_at": "DATETIME",
+        "reminders_enabled": "INTEGER DEFAULT 1",
+        "tz_offset": "INTEGER DEFAULT 0",        # минуты относительно UTC
+        "quiet_start": "INTEGER DEFAULT 22",     # тихие часы по местному времени, NULL — без них
+        "quiet_end": "INTEGER DEFAULT 8",
+        "idle_reminders": "INTEGER DEFAULT 0",   # напоминаний о простое без ответа с тех пор
+    })
+    if added:
+        _backfill_review_schedule(cur)
+    cur.executescript(REMINDERS_SQL)
+
+    _add_missing_columns(cur, "StudentSession", {"Class_ID": "INTEGER"})
+    _add_missing_columns(cur, "Word", {"Class_ID": "INTEGER"})
+    _add_missing_columns(cur, "Broadcast", {"class_id": "INTEGER"})
+    cur.executescript(CLASS_SQL)
+
+    new_catalog = not _table_exists(cur, "Module")
+    if not new_catalog and "Class_ID" not in _columns(cur, "ModuleWordCount"):
+        # Счётчики без класса из прежней версии схемы — пересобираем производную таблицу
+        for trigger in _MODULE_CATALOG_TRIGGERS:
+            cur.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+        cur.execute("DROP TABLE ModuleWordCount")
+        new_catalog = True
+    cur.executescript(MODULE_CATALOG_SQL)
+    if new_catalog:
+        rebuild_module_catalog(cur)
+
+    cur.executescript(ANSWER_EVENTS_SQL)
+    _upgrade_answer_event_ids(cur)
+    cur.executescript(WORD_DIFFICULTY_SQL)
+
+    if not _index_exists(cur, "idx_user_achievement_unique"):
+        _deduplicate_user_achievements(cur)
+        cur.execute("""
+            CREATE UNIQUE INDEX idx_user_achievement_unique ON UserAchievement (StudentSession_ID, Achievement_ID)
+        """)
+
+    conn.commit()
+    conn.close()
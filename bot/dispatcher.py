@@ -0,0 +1,63 @@
+# dispatcher.py — builds the Dispatcher with all routers for Dori Bot
+
+from aiogram import Dispatcher
+from aiogram.fsm.storage.memory import MemoryStorage
+
+from bot.callbacks import callback_registry
+from bot.handlers import start, student, teacher, export, self_check, search
+from bot.middlewares.mailbox import UserMailbox
+from bot.middlewares.recorder import UpdateRecorder
+from bot.middlewares.throttling import ThrottlingMiddleware
+from bot.services.analytics import analytics_service
+from bot.services.answer_log import answer_log
+from bot.services.backup import backup_service
+from bot.services.broadcast import broadcast_service
+from bot.services.maintenance import maintenance_service
+from bot.services.reminders import reminder_service
+
+
+def create_dispatcher() -> Dispatcher:
+    dp = Dispatcher(storage=MemoryStorage())
+
+    # Register all handlers and routers
+    start.register(dp)
+    student.register(dp)
+    teacher.register(dp)
+    export.register(dp)
+    self_check.register(dp)
+    search.register(dp)
+    # Все нажатия кнопок — один обработчик с таблицей префиксов (см. bot/callbacks.py)
+    dp.callback_query.register(callback_registry.dispatch)
+
+    # Внутренний middleware: видит флаги выбранного обработчика
+    throttling = ThrottlingMiddleware()
+    dp.message.middleware(throttling)
+    dp.callback_query.middleware(throttling)
+
+    # Рассылки, прерванные остановкой бота, продолжаются с контрольной точки
+    dp.startup.register(broadcast_service.resume)
+    # Фоновые напоминания о повторении слов
+    dp.startup.register(reminder_service.start)
+    dp.shutdown.register(reminder_service.stop)
+    # Журнал ответов: запись пачками, свёртка по дням, удаление старых событий
+    dp.startup.register(answer_log.start)
+    dp.shutdown.register(answer_log.stop)
+    # Резервные копии базы по расписанию
+    dp.startup.register(backup_service.start)
+    dp.shutdown.register(backup_service.stop)
+    # ANALYZE, контрольная точка WAL и incremental_vacuum в тихие периоды
+    dp.startup.register(maintenance_service.start)
+    dp.shutdown.register(maintenance_service.stop)
+    # Пересчёт сложности слов по когорте для панели и порядка колоды
+    dp.startup.register(analytics_service.start)
+    dp.shutdown.register(analytics_service.stop)
+
+    # Обновления одного пользователя — по очереди, разных — параллельно.
+    # Регистрируется первым: следующие outer middleware уже видят актуальное состояние FSM
+    dp.update.outer_middleware(UserMailbox())
+
+    recorder = UpdateRecorder.from_env()
+    if recorder:
+        dp.update.outer_middleware(recorder)
+        dp.shutdown.register(recorder.close)
+    return dp
@@ -1 +1 @@
-from . import start, student, teacher
+from . import start, student, teacher, export, self_check, search
\ No newline at end of file
@@ -0,0 +1,56 @@
+import asyncio
+import logging
+import os
+
+from aiogram import Router, types
+from aiogram.filters import Command, CommandObject
+from aiogram.types import FSInputFile
+
+from bot.database.db_helpers import get_or_create_session, get_user_role
+from bot.services.export import ExportConfig, export_to_file
+
+router = Router()
+logger = logging.getLogger(__name__)
+
+# Что можно выгрузить: команда -> название выгрузки в EXPORT_QUERIES
+TEACHER_EXPORTS = {"words": "words", "progress": "cohort_progress"}
+STUDENT_EXPORTS = {"dict": "dictionary", "progress": "progress"}
+MAX_DOCUMENT_SIZE = 50 * 1024 * 1024  # лимит Telegram для отправки файлов ботом
+
+
+@router.message(Command("export"), flags={"throttle": "export"})
+async def cmd_export(message: types.Message, command: CommandObject):
+    role = get_user_role(message.from_user.id)
+    exports = TEACHER_EXPORTS if role == "teacher" else STUDENT_EXPORTS
+    args = (command.args or "").lower().split()
+    what = args[0] if args else None
+    fmt = args[1] if len(args) > 1 else "csv"
+
+    if what not in exports or fmt not in ExportConfig.FORMATS:
+        await message.answer(
+            "Использование: /export <" + "|".join(exports) + "> [csv|jsonl]\n"
+            "Например: /export " + next(iter(exports)) + " jsonl"
+        )
+        return
+
+    session_id = get_or_create_session(message.from_user.id)
+    await message.answer("⏳ Готовлю выгрузку...")
+    try:
+        # Запрос и запись идут в отдельном потоке, чтобы не блокировать бота на больших таблицах
+        path, filename, count = await asyncio.to_thread(export_to_file, exports[what], fmt, session_id)
+    except Exception as e:
+        logger.error(f"Export {what} failed: {e}")
+        await message.answer("❌ Не удалось подготовить выгрузку.")
+        return
+
+    try:
+        if os.path.getsize(path) > MAX_DOCUMENT_SIZE:
+            await message.answer("❌ Файл слишком большой для отправки в Telegram.")
+            return
+        await message.answer_document(FSInputFile(path, filename=filename), caption=f"Строк: {count}")
+    finally:
+        os.remove(path)
+
+
+def register(dp):
+    dp.include_router(router)
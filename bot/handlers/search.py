@@ -0,0 +1,70 @@
+import html
+
+from aiogram import Router, types
+from aiogram.filters import Command, CommandObject
+from aiogram.types import InlineQueryResultArticle, InputTextMessageContent
+
+from bot.database.db_helpers import get_or_create_session, get_session, get_session_class
+from bot.services.word_search import word_search
+
+router = Router()
+
+
+class SearchConfig:
+    INLINE_RESULTS = 20
+    INLINE_CACHE_SECONDS = 10   # результаты личные: у каждого свой класс и свои слова
+    FIND_RESULTS = 20
+
+
+def _synonyms(word):
+    return word["synonyms"] if word["synonyms"] and word["synonyms"] != "не указаны" else None
+
+
+def format_search_results(query, words):
+    if not words:
+        return f"По запросу «{html.escape(query)}» ничего не найдено."
+    lines = [f"🔎 <b>{html.escape(query)}</b>:"]
+    for w in words:
+        line = f"{w['Word_ID']}. {html.escape(w['Text'])} – {html.escape(w['translation'])}"
+        if _synonyms(w):
+            line += f" <i>({html.escape(_synonyms(w))})</i>"
+        lines.append(line)
+    lines.append("\nНомер слова нужен для редактирования и удаления.")
+    return "\n".join(lines)
+
+
+@router.message(Command("find"))
+async def find_command(message: types.Message, command: CommandObject):
+    query = (command.args or "").strip()
+    if not query:
+        await message.answer("Укажите начало слова, перевода или синонима, например: /find cat")
+        return
+    session_id = get_or_create_session(message.from_user.id)
+    words = word_search.search(session_id, get_session_class(session_id), query, SearchConfig.FIND_RESULTS)
+    await message.answer(format_search_results(query, words), parse_mode="HTML")
+
+
+@router.inline_query()
+async def inline_search(inline_query: types.InlineQuery):
+    query = inline_query.query.strip()
+    # Инлайн-запрос может прийти от любого пользователя Telegram: сессию не создаём
+    session = get_session(inline_query.from_user.id) if query else None
+    words = []
+    if session:
+        words = word_search.search(
+            session["StudentSession_ID"], session["Class_ID"], query, SearchConfig.INLINE_RESULTS
+        )
+    results = [
+        InlineQueryResultArticle(
+            id=str(w["Word_ID"]),
+            title=f"{w['Text']} — {w['translation']}",
+            description=f"#{w['Word_ID']}" + (f" · {_synonyms(w)}" if _synonyms(w) else ""),
+            input_message_content=InputTextMessageContent(message_text=f"{w['Text']} — {w['translation']}"),
+        )
+        for w in words
+    ]
+    await inline_query.answer(results, cache_time=SearchConfig.INLINE_CACHE_SECONDS, is_personal=True)
+
+
+def register(dp):
+    dp.include_router(router)
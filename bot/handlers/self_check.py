@@ -0,0 +1,109 @@
+import html
+import random
+
+from aiogram import Router, types
+from aiogram.fsm.context import FSMContext
+from aiogram.fsm.state import State, StatesGroup
+
+from bot.callbacks import callback_registry, CallbackConfig, AnswerOption
+from bot.sharedState import user_flashcards
+from bot.database.db_helpers import get_or_create_session, get_words, get_session_class, update_progress
+from bot.menus import self_check_menu
+from bot.services.answer_log import answer_log
+from bot.services.achievements import achievement_engine, format_new_achievements
+from bot.services.distractors import DistractorConfig, distractor_index
+from bot.services.flashcard_flow import show_card, finish_session, order_deck
+
+router = Router()
+
+
+class SelfCheckState(StatesGroup):
+    answering = State()
+
+
+class SelfCheckConfig:
+    SESSION_SIZE = 20   # вопросов в одной самопроверке
+
+
+def build_options(word, class_id, session_words):
+    """Correct answer plus distractors from the index; a small class is topped up from the session's words."""
+    options = distractor_index.pick(word, class_id)
+    if len(options) < DistractorConfig.OPTIONS - 1:
+        taken = {o.lower() for o in options} | {word["Text"].lower()}
+        for other in random.sample(session_words, min(len(session_words), DistractorConfig.OPTIONS * 2)):
+            if len(options) == DistractorConfig.OPTIONS - 1:
+                break
+            if other["Text"].lower() not in taken:
+                taken.add(other["Text"].lower())
+                options.append(other["Text"])
+    options.append(word["Text"])
+    random.shuffle(options)
+    return options
+
+
+async def ask(message: types.Message, state: FSMContext, word: dict, feedback: str = None):
+    data = await state.get_data()
+    options = build_options(word, data["class_id"], data["session_words"])
+    await state.update_data(current_word=word, options=options)
+    await show_card(message, state, word, feedback, reply_markup=self_check_menu(options))
+
+
+@callback_registry.register("self_check_start", flags={"throttle": "flashcard"})
+async def self_check_start(callback: types.CallbackQuery, state: FSMContext):
+    session_id = get_or_create_session(callback.from_user.id)
+    words = get_words(session_id)
+    if len(words) < 2:
+        await callback.answer("Для самопроверки нужно хотя бы два слова.")
+        return
+    await callback.answer()
+    order_deck(words)
+    words = words[:SelfCheckConfig.SESSION_SIZE]
+    user_flashcards[callback.from_user.id] = words[1:]
+    await state.set_state(SelfCheckState.answering)
+    await state.update_data(
+        card_message_id=None, class_id=get_session_class(session_id),
+        session_words=[{"Text": w["Text"]} for w in words],
+    )
+    await ask(callback.message, state, words[0])
+
+
+@callback_registry.register(
+    AnswerOption, state=SelfCheckState.answering, flags={"throttle": "flashcard"},
+    stale="Самопроверка завершена. Начните новую из меню.",
+)
+async def self_check_answer(callback: types.CallbackQuery, state: FSMContext, callback_data: AnswerOption):
+    data = await state.get_data()
+    if callback.message.message_id != data.get("card_message_id"):
+        await callback.answer("Этот вопрос уже закрыт.")
+        return
+    if not 0 <= callback_data.index < len(data["options"]):
+        await callback.answer(CallbackConfig.STALE_NOTICE)
+        return
+    session_id = get_or_create_session(callback.from_user.id)
+    word = data["current_word"]
+    chosen = data["options"][callback_data.index]
+    is_correct = chosen == word["Text"]
+    await callback.answer()
+
+    update_progress(session_id, word["Word_ID"], is_correct)
+    answer_log.record(session_id, word["Word_ID"], is_correct)
+    feedback = "✅ Верно!" if is_correct else (
+        f"❌ Неверно: {html.escape(chosen)}.\nПравильный ответ: <b>{html.escape(word['Text'])}</b>"
+    )
+    new_achievements = achievement_engine.on_event(session_id, "answer")
+    if new_achievements:
+        feedback += "\n\n" + format_new_achievements(new_achievements)
+
+    next_words = user_flashcards.get(callback.from_user.id, [])
+    if not next_words:
+        await finish_session(callback.message, state, session_id, feedback)
+        return
+    if not is_correct:
+        next_words.append(word)
+    next_word = next_words.pop(0)
+    user_flashcards[callback.from_user.id] = next_words
+    await ask(callback.message, state, next_word, feedback)
+
+
+def register(dp):
+    dp.include_router(router)
@@ -1,20 +1,24 @@
 import os
-import random
 from dotenv import load_dotenv
 from aiogram import Router, types, F
-from aiogram.filters import Command
+from aiogram.filters import Command, CommandObject
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
 from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
 from bot.sharedState import user_flashcards
 
-from bot.menus import student_main_menu, teacher_main_menu, start_choice_menu
+from bot.callbacks import callback_registry, StudentLevel, ModuleChoice, ModulePage
+
+from bot.menus import student_main_menu, teacher_main_menu, start_choice_menu, module_selection_menu
 from bot.database.db_helpers import (
     get_or_create_session, get_user_role, set_user_session,
-    get_all_modules, get_words, update_progress
+    get_words, get_due_words, update_progress, get_student_modules, get_module, join_class
 )
-from bot.handlers.teacher import delete_message_later, teacher_help
-from bot.services.card_generator import generate_flashcard_image
+from bot.handlers.teacher import teacher_help
+from bot.services.answer_log import answer_log
+from bot.services.achievements import achievement_engine, format_new_achievements
+from bot.services.flashcard_flow import grade_answer, show_card, finish_session, order_deck
+from bot.services.reminders import ReminderConfig
 
 load_dotenv()
 TEACHER_PASS = os.getenv("TEACHER_PASS")
@@ -37,9 +41,19 @@ async def stopcard_command(message: types.Message, state: FSMContext):
 
 # --- Role selection ---
 @router.message(Command("start"))
-async def cmd_start(message: types.Message):
-    get_or_create_session(message.from_user.id)
+async def cmd_start(message: types.Message, command: CommandObject, state: FSMContext):
+    session_id = get_or_create_session(message.from_user.id)
     role = get_user_role(message.from_user.id)
+    if command.args and command.args.startswith("join_") and role != "teacher":
+        # Ссылка-приглашение преподавателя: t.me/<бот>?start=join_<КОД>
+        cls = join_class(session_id, command.args[len("join_"):])
+        await message.answer(f"🏫 Вы в классе «{cls['name']}»." if cls else "Код класса не найден.")
+    if command.args == ReminderConfig.DEEP_LINK and role == "student":
+        # Кнопка из напоминания: сразу повторяем слова, срок которых подошёл
+        words = get_due_words(session_id) or get_words(session_id)
+        if words:
+            await begin_flashcards(message, state, words)
+            return
     if role not in ("teacher", "student"):
         await message.answer("Выберите роль:", reply_markup=start_choice_menu())
     elif role == "teacher":
@@ -51,7 +65,7 @@ async def cmd_start(message: types.Message):
 async def cmd_role(message: types.Message):
     await message.answer("Выберите роль:", reply_markup=start_choice_menu())
 
-@router.callback_query(F.data == "choose_teacher")
+@callback_registry.register("choose_teacher")
 async def choose_teacher(callback: types.CallbackQuery, state: FSMContext):
     await callback.message.edit_text("Введите пароль преподавателя:")
     await state.set_state(RoleSelection.waiting_for_teacher_password)
@@ -65,36 +79,57 @@ async def process_teacher_password(message: types.Message, state: FSMContext):
         await message.answer("Неверный пароль. Попробуйте ещё раз или выберите другую роль.")
     await state.clear()
 
-@router.callback_query(F.data == "choose_student")
+@callback_registry.register("choose_student")
 async def choose_student(callback: types.CallbackQuery, state: FSMContext):
     await callback.message.edit_text("Выберите ваш уровень английского:")
     await callback.message.answer(
         "Пожалуйста, выберите уровень:",
         reply_markup=InlineKeyboardMarkup(inline_keyboard=[
-            [InlineKeyboardButton(text="A1", callback_data="level_A1")],
-            [InlineKeyboardButton(text="A2", callback_data="level_A2")],
-            [InlineKeyboardButton(text="B1", callback_data="level_B1")]
+            [InlineKeyboardButton(text=level, callback_data=StudentLevel(level=level).pack())]
+            for level in ("A1", "A2", "B1")
         ])
     )
     await state.set_state(RoleSelection.waiting_for_student_level)
 
-@router.callback_query(RoleSelection.waiting_for_student_level, F.data.startswith("level_"))
-async def student_level_selected(callback: types.CallbackQuery, state: FSMContext):
-    level = callback.data.split("_")[1]
+@callback_registry.register(StudentLevel, state=RoleSelection.waiting_for_student_level)
+async def student_level_selected(callback: types.CallbackQuery, state: FSMContext, callback_data: StudentLevel):
+    level = callback_data.level
     set_user_session(callback.from_user.id, role="student", level=level)
     await callback.message.edit_text(f"Ваш уровень установлен как {level}.")
     await callback.message.answer("Добро пожаловать, студент!", reply_markup=student_main_menu())
     await state.clear()
 
 # --- Flashcard Mode ---
-@router.callback_query(F.data == "flashcards_start")
+@callback_registry.register("flashcards_start")
 async def start_flashcard(callback: types.CallbackQuery, state: FSMContext):
+    session_id = get_or_create_session(callback.from_user.id)
     await state.set_state(FlashcardState.selecting_module)
     await callback.message.answer(
-        "Режим флеш-карт активирован.\n\nВведите модуль (например: module 4) или 'все' для всех слов:"
+        "Режим флеш-карт активирован.\n\nВыберите модуль или введите его название ('все' — все слова):",
+        reply_markup=module_selection_menu(get_student_modules(session_id))
+    )
+    await callback.answer()
+
+@callback_registry.register(ModulePage)
+async def module_page(callback: types.CallbackQuery, callback_data: ModulePage):
+    session_id = get_or_create_session(callback.from_user.id)
+    await callback.message.edit_reply_markup(
+        reply_markup=module_selection_menu(get_student_modules(session_id), callback_data.page)
     )
+    await callback.answer()
+
+@callback_registry.register(ModuleChoice, flags={"throttle": "flashcard"})
+async def module_selected(callback: types.CallbackQuery, state: FSMContext, callback_data: ModuleChoice):
+    session_id = get_or_create_session(callback.from_user.id)
+    module = get_module(callback_data.module_id) if callback_data.module_id else None
+    words = get_words(session_id, module) if module or not callback_data.module_id else []
+    if not words:
+        await callback.answer("Слов из этого модуля не найдено.")
+        return
+    await callback.answer()
+    await begin_flashcards(callback.message, state, words, module, callback.from_user.id)
 
-@router.message(FlashcardState.selecting_module)
+@router.message(FlashcardState.selecting_module, F.text, ~F.text.startswith("/"), flags={"throttle": "flashcard"})
 async def load_flashcard_words(message: types.Message, state: FSMContext):
     module = message.text.strip().lower()
     session_id = get_or_create_session(message.from_user.id)
@@ -104,42 +139,32 @@ async def load_flashcard_words(message: types.Message, state: FSMContext):
         await message.answer("Слов из этого модуля не найдено.")
         return
 
-    random.shuffle(words)
-    user_flashcards[message.from_user.id] = words[1:]
+    await begin_flashcards(message, state, words, module if module != "все" else None)
+
+async def begin_flashcards(message: types.Message, state: FSMContext, words, module=None, user_id=None):
+    order_deck(words)
+    user_flashcards[user_id or message.from_user.id] = words[1:]
     current_word = words[0]
     await state.set_state(FlashcardState.awaiting_input)
-    await state.update_data(current_word=current_word)
-
-    image = await generate_flashcard_image(current_word["translation"], is_question=True)
-    sent = await message.answer_photo(photo=image)
-    await message.answer(f"Слово: {current_word['translation']}")
-    await delete_message_later(message.bot, message.chat.id, sent.message_id)
+    await state.update_data(current_word=current_word, module=module, card_message_id=None)
+    await show_card(message, state, current_word)
 
-@router.message(FlashcardState.awaiting_input)
+@router.message(FlashcardState.awaiting_input, F.text, ~F.text.startswith("/"), flags={"throttle": "flashcard"})
 async def handle_flashcard_answer(message: types.Message, state: FSMContext):
     session_id = get_or_create_session(message.from_user.id)
     data = await state.get_data()
     word = data["current_word"]
 
-    user_input = message.text.strip().lower()
-    correct = word["Text"].strip().lower()
-    synonyms = [s.strip().lower() for s in (word.get("synonyms") or "").split(",")]
-    is_correct = user_input == correct or user_input in synonyms
-
+    is_correct, feedback = grade_answer(word, message.text)
     update_progress(session_id, word["Word_ID"], is_correct)
-
-    feedback = (
-        "✅ Верно!" if user_input == correct else
-        "✅ Верно (синоним)!" if user_input in synonyms else
-        f"❌ Неверно.\nПравильный ответ: <b>{word['Text']}</b>"
-    )
-
-    await message.answer(f"{feedback}\nСинонимы: {word.get('synonyms', 'не указаны')}", parse_mode="HTML")
+    answer_log.record(session_id, word["Word_ID"], is_correct)
+    new_achievements = achievement_engine.on_event(session_id, "answer")
+    if new_achievements:
+        feedback += "\n\n" + format_new_achievements(new_achievements)
 
     next_words = user_flashcards.get(message.from_user.id, [])
     if not next_words:
-        await message.answer("🎉 Тренировка завершена")
-        await state.clear()
+        await finish_session(message, state, session_id, feedback, data.get("module"))
         return
 
     if not is_correct:
@@ -147,12 +172,7 @@ async def handle_flashcard_answer(message: types.Message, state: FSMContext):
     next_word = next_words.pop(0)
     user_flashcards[message.from_user.id] = next_words
     await state.update_data(current_word=next_word)
-
-    image = await generate_flashcard_image(next_word["translation"], is_question=True)
-    sent = await message.answer_photo(photo=image)
-    await message.answer(f"Слово: {next_word['translation']}")
-    await delete_message_later(message.bot, message.chat.id, sent.message_id)
-
+    await show_card(message, state, next_word, feedback)
 
 
 # --- Help ---
@@ -171,6 +191,14 @@ async def cmd_help(message: types.Message):
         help_text += (
             "👨‍🏫 <b>Команды для преподавателя:</b>\n"
             "/menu_teacher - Показать меню преподавателя\n"
+            "/newclass, /classes - Классы и коды для студентов\n"
+            "/dashboard - Прогресс студентов\n"
+            "/history #студент - Ответы студента по дням\n"
+            "/find слово - Поиск слова и его ID\n"
+            "/export words|progress - Выгрузить слова или прогресс группы\n"
+            "/broadcast - Рассылка студентам\n"
+            "/metrics - Метрики бота\n"
+            "/backup - Резервная копия базы\n"
             "• Добавить слово\n"
             "• Добавить пакет слов\n"
             "• Просмотреть все слова\n"
@@ -184,16 +212,23 @@ async def cmd_help(message: types.Message):
             "/levelSwitch - Изменить уровень сложности (A1/A2/B1)\n"
             "/menu_student - Показать меню студента\n"
             "• Флеш-карты\n"
+            "• Самопроверка - Выбор перевода из вариантов\n"
             "• Редактировать слово\n"
             "• Просмотреть модули\n"
             "• /stopcard - Завершить тренировку\n"
+            "• /join КОД - Вступить в класс преподавателя\n"
+            "• /history 30 - Точность ответов по дням\n"
+            "• /find слово - Найти слово и его ID (или @бот слово в любом чате)\n"
+            "• /top - Рейтинг студентов\n"
+            "• /export dict|progress - Выгрузить словарь или свой прогресс\n"
+            "• /reminders on|off, /quiet 22-8, /timezone +3 - Напоминания о повторении\n"
         )
     else:
         help_text += "🤔 Выберите роль с помощью /start."
 
     await message.answer(help_text, parse_mode="HTML")
 
-@router.callback_query(F.data == "help_command")
+@callback_registry.register("help_command")
 async def handle_help_callback(callback: types.CallbackQuery):
     await teacher_help(callback.message)
     await callback.answer()
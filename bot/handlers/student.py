@@ -1,19 +1,22 @@
 import random
 import asyncio
-from aiogram import Router, types, F
+from datetime import datetime, timedelta, timezone
+from aiogram import Router, types
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
 from aiogram.types import Message
-from aiogram.filters import Command, StateFilter
+from aiogram.filters import Command, CommandObject
 
-from bot.sharedState import user_flashcards
+from bot.callbacks import callback_registry
 from bot.database.db_helpers import (
-    get_all_modules, get_connection, get_or_create_session, add_word,
-    get_words, add_library_word, can_user_edit_word, update_progress, get_achievements_for_student
+    get_modules, get_student_modules, get_user_role, get_connection, get_or_create_session, add_word,
+    get_words, add_library_word, can_user_edit_word, get_achievements_for_student,
+    get_leaderboard, get_student_rank, get_reminder_settings, set_reminder_settings,
+    join_class, get_session_class, update_word, delete_word, get_daily_student_stats, is_class_student
 )
-from bot.handlers.teacher import delete_message_later
-from bot.menus import personal_dict_menu, student_main_menu, student_word_view_menu
-from bot.services.card_generator import generate_flashcard_image
+from bot.handlers.start import FlashcardState
+from bot.menus import personal_dict_menu, student_main_menu, student_word_view_menu, module_selection_menu
+from bot.services.achievements import achievement_engine, format_new_achievements
 
 router = Router()
 
@@ -23,10 +26,6 @@ class StudentEditWord(StatesGroup):
     waiting_for_new_text = State()
     waiting_for_new_translation = State()
 
-class FlashcardState(StatesGroup):
-    selecting_module = State()
-    awaiting_input = State()
-
 class PersonalDictFSM(StatesGroup):
     adding_word = State()
     adding_translation = State()
@@ -34,13 +33,6 @@ class PersonalDictFSM(StatesGroup):
     deleting_word_id = State()
 
 
-# ---------- Global Stopcard Command ----------
-@router.message(Command("stopcard"), StateFilter("*"))
-async def stopcard_command(message: types.Message, state: FSMContext):
-    await state.clear()
-    await message.answer("⛔️ Режим флеш-карт остановлен.")
-
-
 # ---------- Utility ----------
 def pick_weighted_word(words):
     total = sum(word["weight"] for word in words)
@@ -58,104 +50,12 @@ def pick_weighted_word(words):
 async def show_student_menu(message: types.Message):
     await message.answer("Выберите действие:", reply_markup=student_main_menu())
 
-@router.message(Command("help"))
-async def student_help(message: types.Message):
-    help_text = (
-        "🎓 <b>Справка для студента:</b>\n\n"
-        "<b>Основные команды:</b>\n"
-        "/menu_student - Показать меню студента\n"
-        "/levelSwitch - Изменить уровень сложности (A1/A2/B1)\n"
-        "/help - Показать эту справку\n"
-        "/stopcard - Остановить режим флеш-карт\n\n"
-        "<b>Функции меню:</b>\n"
-        "• <b>Флеш-карты</b> - Тренировка перевода слов\n"
-        "• <b>Редактировать слово</b> - Изменить слова из вашей библиотеки\n"
-        "• <b>Мои модули</b> - Просмотреть доступные учебные модули"
-    )
-    await message.answer(help_text, parse_mode="HTML")
-
-
-# ---------- Flashcard Flow ----------
-@router.callback_query(F.data == "flashcards_start")
-async def start_flashcard_practice(callback: types.CallbackQuery, state: FSMContext):
-    await state.set_state(FlashcardState.selecting_module)
-    await callback.message.answer(
-        "Режим флеш-карт активирован.\n\nВам будет показано слово на русском. Напишите его перевод на английский."
-    )
-    await callback.message.answer("Введите модуль (например: module 4) или 'все' для всех слов:")
-
-@router.message(FlashcardState.selecting_module)
-async def handle_module_selection(message: types.Message, state: FSMContext):
-    module = message.text.strip().lower()
-    session_id = get_or_create_session(message.from_user.id)
-    words = get_words(session_id, module if module != "все" else None)
-
-    if not words:
-        await message.answer("Слов из этого модуля не найдено.")
-        return
-
-    random.shuffle(words)
-    current_word = words[0]
-    flashcards = words[1:]
-
-    await state.set_state(FlashcardState.awaiting_input)
-    await state.update_data(current_word=current_word, flashcards=flashcards)
-
-    image = await generate_flashcard_image(current_word["translation"], is_question=True)
-    sent = await message.answer_photo(photo=image)
-    await message.answer(f"Слово: {current_word['translation']}")
-    asyncio.create_task(delete_message_later(message.bot, message.chat.id, sent.message_id))
-
-
-@router.message(FlashcardState.awaiting_input)
-async def check_flashcard_answer(message: types.Message, state: FSMContext):
-    session_id = get_or_create_session(message.from_user.id)
-    data = await state.get_data()
-
-    if "current_word" not in data:
-        await state.clear()
-        return
-
-    word = data["current_word"]
-    flashcards = data.get("flashcards", [])
-
-    user_input = message.text.strip().lower()
-    correct = word["Text"].strip().lower()
-    synonyms = [s.strip().lower() for s in (word.get("synonyms") or "").split(",")]
-    is_correct = user_input == correct or user_input in synonyms
-
-    update_progress(session_id, word["Word_ID"], is_correct)
-
-    feedback = (
-        "✅ Верно!" if user_input == correct else
-        "✅ Верно (синоним)!" if user_input in synonyms else
-        f"❌ Неверно.\nПравильный ответ: <b>{word['Text']}</b>"
-    )
-
-    await message.answer(f"{feedback}\nСинонимы: {word.get('synonyms', 'не указаны')}", parse_mode="HTML")
-
-    if not flashcards:
-        await message.answer("🎉 Тренировка завершена")
-        await state.clear()
-        return
-
-    if not is_correct:
-        flashcards.append(word)
-
-    next_word = flashcards.pop(0)
-    await state.update_data(current_word=next_word, flashcards=flashcards)
-
-    image = await generate_flashcard_image(next_word["translation"], is_question=True)
-    sent = await message.answer_photo(photo=image)
-    await message.answer(f"Слово: {next_word['translation']}")
-    asyncio.create_task(delete_message_later(message.bot, message.chat.id, sent.message_id))
-
 
 # ---------- Word Editing ----------
-@router.callback_query(F.data == "student_start_edit")
+@callback_registry.register("student_start_edit")
 async def student_prompt_edit(callback: types.CallbackQuery, state: FSMContext):
     await state.set_state(StudentEditWord.waiting_for_word_id)
-    await callback.message.answer("Введите ID слова из вашей библиотеки:")
+    await callback.message.answer("Введите ID слова из вашей библиотеки (найти ID: /find начало слова):")
 
 @router.message(StudentEditWord.waiting_for_word_id)
 async def student_check_edit_permission(message: types.Message, state: FSMContext):
@@ -184,17 +84,16 @@ async def student_edit_text(message: types.Message, state: FSMContext):
 @router.message(StudentEditWord.waiting_for_new_translation)
 async def student_edit_translation(message: types.Message, state: FSMContext):
     data = await state.get_data()
-    with get_connection() as conn:
-        conn.execute("UPDATE Word SET Text = ?, translation = ? WHERE Word_ID = ?", (data['new_text'], message.text, data['word_id']))
+    update_word(data['word_id'], data['new_text'], message.text)
     await message.answer(f"Слово обновлено: {data['new_text']} – {message.text}")
     await state.clear()
 
 # ---------- Word & Dictionary Management ----------
-@router.callback_query(F.data == "view_student_words")
+@callback_registry.register("view_student_words")
 async def student_words_entry(callback: types.CallbackQuery):
     await callback.message.answer("Что вы хотите просмотреть?", reply_markup=student_word_view_menu())
 
-@router.callback_query(F.data == "student_words_all")
+@callback_registry.register("student_words_all")
 async def view_all_words(callback: types.CallbackQuery):
     session_id = get_or_create_session(callback.from_user.id)
     words = get_words(session_id)
@@ -205,19 +104,29 @@ async def view_all_words(callback: types.CallbackQuery):
     lines = [f"{w['Word_ID']}. {w['Text']} – {w['translation']}" for w in words]
     await callback.message.answer("📚 Все доступные слова:\n" + "\n".join(lines))
 
-@router.callback_query(F.data == "view_modules")
-async def student_view_modules(callback: types.CallbackQuery):
-    modules = get_all_modules()
+@callback_registry.register("view_modules")
+async def student_view_modules(callback: types.CallbackQuery, state: FSMContext):
+    session_id = get_or_create_session(callback.from_user.id)
+    await callback.answer()
+    if get_user_role(callback.from_user.id) == "teacher":
+        modules = get_modules(added_by="teacher", class_id=get_session_class(session_id) or 0)
+        if not modules:
+            await callback.message.answer("Модули пока не найдены.")
+            return
+        await callback.message.answer("\n".join(f"{m['name']} — слов: {m['words']}" for m in modules))
+        return
+    modules = get_student_modules(session_id)
     if not modules:
         await callback.message.answer("Модули пока не найдены.")
         return
-    await callback.message.answer("\n".join(modules))
+    await state.set_state(FlashcardState.selecting_module)
+    await callback.message.answer("📚 Выберите модуль для тренировки:", reply_markup=module_selection_menu(modules))
 
-@router.callback_query(F.data == "personal_dict_menu")
+@callback_registry.register("personal_dict_menu")
 async def open_personal_dict_menu(callback: types.CallbackQuery):
     await callback.message.answer("Личный словарь: выберите действие", reply_markup=personal_dict_menu())
 
-@router.callback_query(F.data == "personal_add")
+@callback_registry.register("personal_add")
 async def personal_add_word_start(callback: types.CallbackQuery, state: FSMContext):
     await state.set_state(PersonalDictFSM.adding_word)
     await callback.message.answer("Введите английское слово:")
@@ -235,7 +144,7 @@ async def personal_add_word_translation(message: types.Message, state: FSMContex
     await message.answer("Введите синонимы через запятую (или '-' если нет синонимов):")
 
 
-@router.callback_query(F.data == "personal_view")
+@callback_registry.register("personal_view")
 async def personal_view(callback: types.CallbackQuery):
     session_id = get_or_create_session(callback.from_user.id)
     with get_connection() as conn:
@@ -246,10 +155,10 @@ async def personal_view(callback: types.CallbackQuery):
     lines = [f"{row[0]}. {row[1]} – {row[2]}" for row in rows]
     await callback.message.answer("📓 Ваши слова:\n" + "\n".join(lines))
 
-@router.callback_query(F.data == "personal_delete")
+@callback_registry.register("personal_delete")
 async def personal_delete_start(callback: types.CallbackQuery, state: FSMContext):
     await state.set_state(PersonalDictFSM.deleting_word_id)
-    await callback.message.answer("Введите ID слова для удаления:")
+    await callback.message.answer("Введите ID слова для удаления (найти ID: /find начало слова):")
 
 @router.message(PersonalDictFSM.deleting_word_id)
 async def personal_delete_confirm(message: types.Message, state: FSMContext):
@@ -259,10 +168,7 @@ async def personal_delete_confirm(message: types.Message, state: FSMContext):
     except ValueError:
         await message.answer("Введите корректный ID.")
         return
-    with get_connection() as conn:
-        cur = conn.cursor()
-        cur.execute("DELETE FROM Word WHERE Word_ID = ? AND added_by = 'student' AND StudentSession_ID = ?", (word_id, session_id))
-        deleted = cur.rowcount
+    deleted = delete_word(word_id, session_id)
     await message.answer("✅ Слово удалено." if deleted else "❌ Не удалось удалить слово.")
     await state.clear()
 
@@ -282,7 +188,11 @@ async def personal_add_word_synonyms(message: types.Message, state: FSMContext):
             added_by="student",
             synonyms=synonyms
         )
-        await message.answer(f"✅ Слово <b>{data['word']}</b> добавлено.", parse_mode="HTML")
+        text = f"✅ Слово <b>{data['word']}</b> добавлено."
+        new_achievements = achievement_engine.on_event(session_id, "word_added")
+        if new_achievements:
+            text += "\n\n" + format_new_achievements(new_achievements)
+        await message.answer(text, parse_mode="HTML")
     except ValueError as e:
         await message.answer(f"❌ {str(e)}")
 
@@ -306,6 +216,166 @@ async def show_achievements(message: types.Message):
     await message.answer(text.strip(), parse_mode="HTML")
 
 
+# ---------- Leaderboard ----------
+LEADERBOARD_SIZE = 10
+LEVELS = ("A1", "A2", "B1")
+
+def format_leaderboard(title, rows, session_id):
+    lines = [title]
+    for place, row in enumerate(rows, start=1):
+        me = " (вы)" if row["StudentSession_ID"] == session_id else ""
+        lines.append(f"{place}. Студент #{row['StudentSession_ID']} [{row['level']}] — {row['score']}{me}")
+    if not rows:
+        lines.append("Пока пусто.")
+    return "\n".join(lines)
+
+@router.message(Command("top"))
+async def show_leaderboard(message: types.Message, command: CommandObject):
+    session_id = get_or_create_session(message.from_user.id)
+    level = (command.args or "").strip().upper() or None
+    if level and level not in LEVELS:
+        await message.answer("Укажите уровень: /top A1, /top A2 или /top B1")
+        return
+
+    # В классе рейтинг считается среди одноклассников
+    class_id = get_session_class(session_id)
+    in_class = " в классе" if class_id else ""
+    parts = []
+    if not level:
+        title = "🏆 <b>Рейтинг класса:</b>" if class_id else "🏆 <b>Общий рейтинг:</b>"
+        parts.append(format_leaderboard(title, get_leaderboard(LEADERBOARD_SIZE, class_id=class_id), session_id))
+        rank = get_student_rank(session_id, class_id=class_id)
+        if rank:
+            parts.append(f"Ваше место: {rank['rank']} из {rank['total']} (очки: {rank['score']})")
+        level = rank["level"] if rank else None
+
+    if level:
+        parts.append(format_leaderboard(
+            f"📈 <b>Рейтинг уровня {level}{in_class}:</b>", get_leaderboard(LEADERBOARD_SIZE, level, class_id), session_id
+        ))
+        level_rank = get_student_rank(session_id, level, class_id)
+        if level_rank and level_rank["level"] == level:
+            parts.append(f"Ваше место в уровне {level}{in_class}: {level_rank['rank']} из {level_rank['total']}")
+
+    await message.answer("\n\n".join(parts), parse_mode="HTML")
+
+
+HISTORY_DAYS = 14
+HISTORY_MAX_DAYS = 90
+
+def format_history(rows, days, title):
+    if not rows:
+        return f"{title}\nЗа последние {days} дн. ответов нет. История обновляется раз в несколько минут."
+    lines = [title]
+    for row in rows:
+        total = row["correct"] + row["incorrect"]
+        accuracy = round(100 * row["correct"] / total)
+        bar = "▇" * round(accuracy / 10)
+        lines.append(f"{row['day'][8:]}.{row['day'][5:7]}: {row['correct']}/{total} ({accuracy}%) {bar}")
+    correct = sum(r["correct"] for r in rows)
+    total = correct + sum(r["incorrect"] for r in rows)
+    lines.append(f"\nВсего: {correct}/{total}, точность {round(100 * correct / total)}%")
+    return "\n".join(lines)
+
+@router.message(Command("history"))
+async def show_history(message: types.Message, command: CommandObject):
+    """/history [дней] — своя точность по дням; преподаватель: /history #студент [дней]."""
+    args = (command.args or "").split()
+    session_id = get_or_create_session(message.from_user.id)
+    title = "📅 <b>Ваши ответы по дням (UTC)</b>"
+    if get_user_role(message.from_user.id) == "teacher":
+        if not args or not args[0].lstrip("#").isdigit():
+            await message.answer("Укажите номер студента, например: /history 12 30")
+            return
+        student_id = int(args.pop(0).lstrip("#"))
+        if not is_class_student(student_id, get_session_class(session_id)):
+            await message.answer(f"Студента #{student_id} нет в вашем активном классе. Сменить класс: /classes")
+            return
+        session_id = student_id
+        title = f"📅 <b>Студент #{session_id}: ответы по дням (UTC)</b>"
+    days = int(args[0]) if args and args[0].isdigit() else HISTORY_DAYS
+    days = max(1, min(days, HISTORY_MAX_DAYS))
+    since = (datetime.now(timezone.utc) - timedelta(days=days - 1)).strftime("%Y-%m-%d")
+    rows = get_daily_student_stats(session_id, since)
+    await message.answer(format_history(rows, days, title), parse_mode="HTML")
+
+
+@router.message(Command("join"))
+async def join_class_command(message: types.Message, command: CommandObject):
+    if get_user_role(message.from_user.id) == "teacher":
+        await message.answer("Преподаватели создают классы командой /newclass.")
+        return
+    code = (command.args or "").strip()
+    if not code:
+        await message.answer("Укажите код класса от преподавателя, например: /join K7M2QX")
+        return
+    cls = join_class(get_or_create_session(message.from_user.id), code)
+    if not cls:
+        await message.answer("Код класса не найден. Проверьте его у преподавателя.")
+        return
+    await message.answer(f"🏫 Вы в классе «{cls['name']}». Теперь вам доступны его слова и модули.")
+
+
+# ---------- Reminder Settings ----------
+def format_tz_offset(minutes):
+    sign = "-" if minutes < 0 else "+"
+    hours, mins = divmod(abs(minutes), 60)
+    return f"UTC{sign}{hours:02d}:{mins:02d}"
+
+def format_reminder_settings(settings):
+    quiet = (
+        f"{settings['quiet_start']:02d}:00–{settings['quiet_end']:02d}:00"
+        if settings["quiet_start"] is not None else "выключены"
+    )
+    return (
+        f"🔔 Напоминания: {'включены' if settings['reminders_enabled'] else 'выключены'}\n"
+        f"🌍 Часовой пояс: {format_tz_offset(settings['tz_offset'] or 0)}\n"
+        f"🌙 Тихие часы: {quiet}"
+    )
+
+@router.message(Command("reminders"))
+async def reminders_command(message: types.Message, command: CommandObject):
+    get_or_create_session(message.from_user.id)
+    arg = (command.args or "").strip().lower()
+    if arg in ("on", "off"):
+        set_reminder_settings(message.from_user.id, reminders_enabled=int(arg == "on"))
+    elif arg:
+        await message.answer("Использование: /reminders on или /reminders off")
+        return
+    await message.answer(format_reminder_settings(get_reminder_settings(message.from_user.id)))
+
+@router.message(Command("quiet"))
+async def quiet_hours_command(message: types.Message, command: CommandObject):
+    get_or_create_session(message.from_user.id)
+    arg = (command.args or "").strip().lower()
+    if arg == "off":
+        set_reminder_settings(message.from_user.id, quiet_start=None, quiet_end=None)
+    elif arg:
+        start, _, end = arg.partition("-")
+        if not (start.isdigit() and end.isdigit() and int(start) < 24 and int(end) < 24 and int(start) != int(end)):
+            await message.answer("Укажите тихие часы по местному времени, например: /quiet 22-8, или /quiet off")
+            return
+        set_reminder_settings(message.from_user.id, quiet_start=int(start), quiet_end=int(end))
+    await message.answer(format_reminder_settings(get_reminder_settings(message.from_user.id)))
+
+@router.message(Command("timezone"))
+async def timezone_command(message: types.Message, command: CommandObject):
+    get_or_create_session(message.from_user.id)
+    arg = (command.args or "").strip().upper().removeprefix("UTC")
+    if arg:
+        sign = -1 if arg.startswith("-") else 1
+        hours, _, mins = arg.lstrip("+-").partition(":")
+        if not (hours.isdigit() and (not mins or (mins.isdigit() and int(mins) < 60))):
+            await message.answer("Укажите смещение от UTC, например: /timezone +3 или /timezone +05:30")
+            return
+        offset = sign * (int(hours) * 60 + int(mins or 0))
+        if not -12 * 60 <= offset <= 14 * 60:
+            await message.answer("Смещение должно быть от -12 до +14 часов.")
+            return
+        set_reminder_settings(message.from_user.id, tz_offset=offset)
+    await message.answer(format_reminder_settings(get_reminder_settings(message.from_user.id)))
+
+
 # ---------- Register ----------
 def register(dp):
     dp.include_router(router)
\ No newline at end of file
@@ -1,14 +1,32 @@
-from aiogram import Router, types, F
+from aiogram import Router, types
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
-from aiogram.filters import Command
+from aiogram.filters import Command, CommandObject
 from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
 
-from bot.database.db_helpers import get_or_create_session, add_word, get_words, add_library_word
+from bot.callbacks import (
+    callback_registry, CallbackConfig, WordPartOfSpeech, WordLevel, DashboardPage, ClassChoice, BroadcastAction
+)
+from bot.database.db_helpers import get_or_create_session, add_word, add_words, add_library_word, get_connection
+from bot.database.profiler import query_profiler
+from bot.services.achievements import achievement_engine, format_new_achievements
+from bot.services.metrics import metrics
+from bot.services.backup import backup_service
+from bot.services.dictionary import dictionary
+from bot.services.word_search import word_search
+from bot.services.broadcast import broadcast_service, format_broadcast_report, broadcast_stop_markup
 from bot.menus import teacher_main_menu, confirm_batch_upload_menu
-from bot.database.db_helpers import get_user_role 
-import sqlite3
+from bot.database.db_helpers import (
+    get_user_role, get_cohort_summary, get_cohort_dashboard, get_cohort_module_stats, get_student_module_stats,
+    count_broadcast_audience, create_broadcast, get_broadcast, update_broadcast,
+    create_class, get_class, get_teacher_classes, set_active_class, get_session_class, update_word,
+    get_hardest_words, get_module_difficulty, is_class_student
+)
+from datetime import date, timedelta
 import asyncio
+import html
+import os
+import re
 
 router = Router()
 
@@ -33,6 +51,8 @@ class TeacherBatchAdd(StatesGroup):
     waiting_for_batch_input = State()
     waiting_for_confirm = State()
 
+BATCH_STALE_NOTICE = "Эта загрузка уже завершена или отменена."
+
 # --- Commands ---
 
 @router.message(Command("menu_teacher"))
@@ -52,12 +72,19 @@ async def delete_message_later(bot, chat_id, message_id, delay=180):
         pass  # Ignore if already deleted or insufficient permissions
 
 
-@router.message(Command("help"))
 async def teacher_help(message: types.Message):
     help_text = (
         "👨‍🏫 <b>Справка для преподавателя:</b>\n\n"
         "<b>Основные команды:</b>\n"
         "/menu_teacher - Показать меню преподавателя\n"
+        "/newclass - Создать класс с кодом для студентов\n"
+        "/classes - Мои классы и выбор активного\n"
+        "/dashboard - Прогресс студентов\n"
+        "/history #студент - Ответы студента по дням\n"
+        "/find слово - Поиск слова и его ID (или @бот слово в любом чате)\n"
+        "/broadcast - Рассылка студентам\n"
+        "/metrics - Метрики бота\n"
+        "/backup - Резервная копия базы сейчас\n"
         "/help - Показать эту справку\n\n"
         "<b>Функции меню:</b>\n"
         "• <b>Добавить слово</b> - Добавить новое слово в базу\n"
@@ -69,8 +96,46 @@ async def teacher_help(message: types.Message):
     )
     await message.answer(help_text, parse_mode="HTML")
 
+@router.message(Command("sqlprofile"))
+async def teacher_sql_profile(message: types.Message):
+    if get_user_role(message.from_user.id) != "teacher":
+        await message.answer("⛔️ Доступ запрещён. Только для преподавателей.")
+        return
+    if not query_profiler.enabled:
+        await message.answer("Профилирование SQL выключено (DORI_SQL_PROFILE=1).")
+        return
+    if message.text.strip().endswith("reset"):
+        query_profiler.reset()
+        await message.answer("Статистика SQL сброшена.")
+        return
+    report = query_profiler.report()
+    query_profiler.dump()
+    await message.answer(f"<pre>{html.escape(report[:3900])}</pre>", parse_mode="HTML")
+
+@router.message(Command("metrics"))
+async def teacher_metrics(message: types.Message):
+    if get_user_role(message.from_user.id) != "teacher":
+        await message.answer("⛔️ Доступ запрещён. Только для преподавателей.")
+        return
+    await message.answer(f"<pre>{html.escape(metrics.report()[:3900])}</pre>", parse_mode="HTML")
+
+@router.message(Command("backup"))
+async def teacher_backup(message: types.Message):
+    if get_user_role(message.from_user.id) != "teacher":
+        await message.answer("⛔️ Доступ запрещён. Только для преподавателей.")
+        return
+    await message.answer("⏳ Создаю резервную копию...")
+    try:
+        result = await backup_service.run()
+    except Exception as e:
+        await message.answer(f"❌ Резервная копия не создана: {e}")
+        return
+    await message.answer(
+        f"💾 Копия {os.path.basename(result['path'])}: {result['size'] // 1024} КБ за {result['seconds']:.1f} с"
+    )
+
 # --- Add single word ---
-@router.callback_query(F.data == "add_word")
+@callback_registry.register("add_word")
 async def teacher_start_add(callback: types.CallbackQuery, state: FSMContext):
     if get_user_role(callback.from_user.id) != "teacher":
         await callback.message.answer("⛔️ Доступ запрещён. Только для преподавателей.")
@@ -80,33 +145,77 @@ async def teacher_start_add(callback: types.CallbackQuery, state: FSMContext):
     await callback.message.answer("Введите английское слово:")
 
 
+def part_of_speech_menu():
+    return InlineKeyboardMarkup(inline_keyboard=[
+        [InlineKeyboardButton(text=label, callback_data=WordPartOfSpeech(pos=label).pack())]
+        for label in ["noun", "verb", "adjective", "adverb", "phrase", "phrasal verb"]
+    ])
+
+def word_level_menu():
+    return InlineKeyboardMarkup(inline_keyboard=[
+        [InlineKeyboardButton(text=lvl, callback_data=WordLevel(level=lvl).pack())]
+        for lvl in ["A1", "A2", "B1"]
+    ])
+
+def format_dictionary_entry(entry):
+    lines = [f"📖 В словаре: <b>{html.escape(entry['word'])}</b> — {html.escape(entry['translation'])}"]
+    if entry["part_of_speech"]:
+        lines.append(f"Часть речи: {html.escape(entry['part_of_speech'])}")
+    if entry["synonyms"]:
+        lines.append(f"Синонимы: {html.escape(entry['synonyms'])}")
+    return "\n".join(lines)
+
 @router.message(TeacherAddWord.waiting_for_text)
 async def teacher_get_text(message: types.Message, state: FSMContext):
-    await state.update_data(text=message.text)
+    entry = dictionary.lookup(message.text)
+    await state.update_data(text=message.text, suggestion=entry)
     await state.set_state(TeacherAddWord.waiting_for_translation)
-    await message.answer("Введите перевод:")
+    if not entry:
+        await message.answer("Введите перевод:")
+        return
+    await message.answer(
+        format_dictionary_entry(entry) + "\n\nВозьмите перевод из словаря или введите свой:",
+        parse_mode="HTML",
+        reply_markup=InlineKeyboardMarkup(inline_keyboard=[[
+            InlineKeyboardButton(text="✅ Взять из словаря", callback_data="dictionary_accept")
+        ]]),
+    )
+
+@callback_registry.register("dictionary_accept", state=TeacherAddWord.waiting_for_translation)
+async def teacher_accept_suggestion(callback: types.CallbackQuery, state: FSMContext):
+    entry = (await state.get_data()).get("suggestion")
+    if not entry:
+        # Кнопка осталась от прошлого слова, а у текущего подсказки из словаря нет
+        await callback.answer(CallbackConfig.STALE_NOTICE)
+        return
+    await state.update_data(
+        translation=entry["translation"], part_of_speech=entry["part_of_speech"], synonyms=entry["synonyms"]
+    )
+    await callback.answer()
+    if not entry["part_of_speech"]:
+        await state.set_state(TeacherAddWord.waiting_for_part_of_speech)
+        await callback.message.answer("Укажите часть речи:", reply_markup=part_of_speech_menu())
+        return
+    await state.set_state(TeacherAddWord.waiting_for_level)
+    await callback.message.answer("Выберите уровень:", reply_markup=word_level_menu())
 
 @router.message(TeacherAddWord.waiting_for_translation)
 async def teacher_get_translation(message: types.Message, state: FSMContext):
     await state.update_data(translation=message.text)
     await state.set_state(TeacherAddWord.waiting_for_part_of_speech)
-    await message.answer("Укажите часть речи:", reply_markup=InlineKeyboardMarkup(inline_keyboard=[
-        [InlineKeyboardButton(text=label, callback_data=f"pos_{label}")]
-        for label in ["noun", "verb", "adjective", "adverb", "phrase", "phrasal verb"]
-    ]))
+    suggestion = (await state.get_data()).get("suggestion")
+    hint = f" (в словаре: {suggestion['part_of_speech']})" if suggestion and suggestion["part_of_speech"] else ""
+    await message.answer(f"Укажите часть речи{hint}:", reply_markup=part_of_speech_menu())
 
-@router.callback_query(F.data.startswith("pos_"))
-async def teacher_receive_pos(callback: types.CallbackQuery, state: FSMContext):
-    await state.update_data(part_of_speech=callback.data.split("_", 1)[1])
+@callback_registry.register(WordPartOfSpeech, state=TeacherAddWord.waiting_for_part_of_speech)
+async def teacher_receive_pos(callback: types.CallbackQuery, state: FSMContext, callback_data: WordPartOfSpeech):
+    await state.update_data(part_of_speech=callback_data.pos)
     await state.set_state(TeacherAddWord.waiting_for_level)
-    await callback.message.answer("Выберите уровень:", reply_markup=InlineKeyboardMarkup(inline_keyboard=[
-        [InlineKeyboardButton(text=lvl, callback_data=f"level_{lvl}")]
-        for lvl in ["A1", "A2", "B1"]
-    ]))
+    await callback.message.answer("Выберите уровень:", reply_markup=word_level_menu())
 
-@router.callback_query(F.data.startswith("level_"))
-async def teacher_get_module(callback: types.CallbackQuery, state: FSMContext):
-    await state.update_data(level=callback.data.split("_", 1)[1])
+@callback_registry.register(WordLevel, state=TeacherAddWord.waiting_for_level)
+async def teacher_get_module(callback: types.CallbackQuery, state: FSMContext, callback_data: WordLevel):
+    await state.update_data(level=callback_data.level)
     await state.set_state(TeacherAddWord.waiting_for_module)
     await callback.message.answer("Введите номер модуля:")
 
@@ -121,14 +230,14 @@ async def teacher_save_word(message: types.Message, state: FSMContext):
     session_id = get_or_create_session(message.from_user.id)
 
     try:
-        add_word(
+        word_id = add_word(
             session_id,
             data['text'],
             data['translation'],
             data['level'],
             data['part_of_speech'],
             "teacher",
-            None,
+            data.get('synonyms'),
             data['module']
         )
     except ValueError as e:
@@ -136,21 +245,17 @@ async def teacher_save_word(message: types.Message, state: FSMContext):
         await state.clear()
         return
 
-    with sqlite3.connect("dori_bot.db") as db:
-        word_id = db.execute("SELECT last_insert_rowid()").fetchone()[0]
     add_library_word(session_id, word_id, can_edit=True)
 
-    await message.answer(f"Слово '{data['text']}' добавлено.")
-    await state.clear()
-
-    with sqlite3.connect("dori_bot.db") as db:
-        word_id = db.execute("SELECT last_insert_rowid()").fetchone()[0]
-    add_library_word(session_id, word_id, can_edit=True)
-    await message.answer(f"Слово '{data['text']}' добавлено.")
+    text = f"Слово '{html.escape(data['text'])}' добавлено."
+    new_achievements = achievement_engine.on_event(session_id, "word_added")
+    if new_achievements:
+        text += "\n\n" + format_new_achievements(new_achievements)
+    await message.answer(text, parse_mode="HTML")
     await state.clear()
 
 # --- Edit synonyms ---
-@router.callback_query(F.data == "edit_synonyms")
+@callback_registry.register("edit_synonyms")
 async def teacher_prompt_edit_synonyms(callback: types.CallbackQuery, state: FSMContext):
     if get_user_role(callback.from_user.id) != "teacher":
         await callback.message.answer("⛔️ Доступ запрещён. Только для преподавателей.")
@@ -169,15 +274,16 @@ async def teacher_receive_word_id_synonyms(message: types.Message, state: FSMCon
         await message.answer("Введите числовой ID.")
 
 # --- Batch add ---
-@router.callback_query(F.data == "add_batch")
+@callback_registry.register("add_batch")
 async def teacher_start_batch_add(callback: types.CallbackQuery, state: FSMContext):
     if get_user_role(callback.from_user.id) != "teacher":
         await callback.message.answer("⛔️ Доступ запрещён. Только для преподавателей.")
         await callback.answer()
         return
     await state.set_state(TeacherBatchAdd.waiting_for_batch_input)
+    hint = "\nПустые перевод, синонимы и часть речи заполнятся из словаря:\ncat - - - 4" if dictionary.available else ""
     await callback.message.answer(
-        "Формат: слово - перевод - синонимы - модуль\nПример:\ncat - кот - feline, kitty - 4"
+        "Формат: слово - перевод - синонимы - модуль\nПример:\ncat - кот - feline, kitty - 4" + hint
     )
 
 
@@ -187,11 +293,14 @@ async def teacher_receive_batch_input(message: types.Message, state: FSMContext)
     await state.set_state(TeacherBatchAdd.waiting_for_confirm)
     await message.answer("Подтвердите загрузку:", reply_markup=confirm_batch_upload_menu())
 
-@router.callback_query(F.data == "confirm_batch")
+@callback_registry.register(
+    "confirm_batch", state=TeacherBatchAdd.waiting_for_confirm, stale=BATCH_STALE_NOTICE
+)
 async def teacher_confirm_batch(callback: types.CallbackQuery, state: FSMContext):
+    await callback.answer()
     data = await state.get_data()
     session_id = get_or_create_session(callback.from_user.id)
-    success, failed = 0, []
+    words, filled, failed = [], 0, []
     for line in data['batch_text'].splitlines():
         parts = [p.strip() for p in line.split("-")]
         if len(parts) < 4 or not parts[3].isdigit():
@@ -199,60 +308,87 @@ async def teacher_confirm_batch(callback: types.CallbackQuery, state: FSMContext
             continue
         text, translation, synonyms, module = parts[:4]
         part_of_speech = parts[4] if len(parts) >= 5 else None
-        try:
-            add_word(session_id, text, translation, "A1", part_of_speech, "teacher", synonyms, module)
-            success += 1
-        except Exception:
+        entry = dictionary.lookup(text) if not (translation and synonyms and part_of_speech) else None
+        if entry:
+            given = (translation, synonyms, part_of_speech)
+            translation = translation or entry["translation"]
+            synonyms = synonyms or entry["synonyms"]
+            part_of_speech = part_of_speech or entry["part_of_speech"]
+            filled += given != (translation, synonyms, part_of_speech)
+        if not translation:
             failed.append(line)
+            continue
+        words.append({
+            "Text": text, "translation": translation, "level": "A1",
+            "part_of_speech": part_of_speech, "synonyms": synonyms, "module": module,
+        })
+    # Одна транзакция на всю загрузку, существующие слова читаются один раз
+    word_ids, skipped = add_words(session_id, words) if words else ([], 0)
+    success = len(word_ids)
     summary = f"Добавлено: {success}"
+    if filled:
+        summary += f" (дополнено из словаря: {filled})"
+    if skipped:
+        summary += f"\nПропущено дубликатов: {skipped}"
     if failed:
         summary += "\nОшибки:\n" + "\n".join(failed)
+    if success:
+        summary += "\n\n📣 Сообщить студентам: /broadcast Добавлены новые слова!"
     await callback.message.answer(summary)
+    if success:
+        new_achievements = achievement_engine.on_event(session_id, "word_added")
+        if new_achievements:
+            await callback.message.answer(format_new_achievements(new_achievements), parse_mode="HTML")
     await state.clear()
 
 
-@router.callback_query(F.data == "cancel_batch")
+@callback_registry.register(
+    "cancel_batch", state=TeacherBatchAdd.waiting_for_confirm, stale=BATCH_STALE_NOTICE
+)
 async def teacher_cancel_batch(callback: types.CallbackQuery, state: FSMContext):
+    await callback.answer()
     await state.clear()
     await callback.message.answer("Добавление отменено.")
 
 # --- View & Edit ---
-@router.callback_query(F.data == "view_words")
+@callback_registry.register("view_words")
 async def teacher_view_words(callback: types.CallbackQuery):
     if get_user_role(callback.from_user.id) != "teacher":
         await callback.message.answer("⛔️ Доступ запрещён. Только для преподавателей.")
         await callback.answer()
         return
-    with sqlite3.connect("dori_bot.db") as db:
-        rows = db.execute("SELECT Word_ID, Text, translation FROM Word WHERE added_by = 'teacher'").fetchall()
+    class_id = get_session_class(get_or_create_session(callback.from_user.id))
+    with get_connection() as db:
+        rows = db.execute(
+            "SELECT Word_ID, Text, translation FROM Word WHERE added_by = 'teacher' AND Class_ID IS ?", (class_id,)
+        ).fetchall()
     if not rows:
         await callback.message.answer("База пуста.")
     else:
         await callback.message.answer("\n".join(f"{r[0]}. {r[1]} – {r[2]}" for r in rows))
 
-@router.callback_query(F.data == "start_edit")
+@callback_registry.register("start_edit")
 async def teacher_prompt_edit(callback: types.CallbackQuery, state: FSMContext):
     if get_user_role(callback.from_user.id) != "teacher":
         await callback.message.answer("⛔️ Доступ запрещён. Только для преподавателей.")
         await callback.answer()
         return
     await state.set_state(TeacherEditWord.waiting_for_word_id)
-    await callback.message.answer("Введите ID или слово:")
+    await callback.message.answer("Введите ID или слово (найти ID: /find начало слова):")
 
 
 @router.message(TeacherEditWord.waiting_for_word_id)
 async def teacher_start_edit(message: types.Message, state: FSMContext):
     session_id = get_or_create_session(message.from_user.id)
+    class_id = get_session_class(session_id)
     input_text = message.text.strip()
-    word_id = None
-    try:
-        word_id = int(input_text)
-    except ValueError:
-        matches = [w for w in get_words(session_id) if w['Text'].lower() == input_text.lower()]
-        if matches:
-            word_id = matches[0]['Word_ID']
-    if not word_id or not any(w['Word_ID'] == word_id for w in get_words(session_id)):
-        await message.answer("Слово не найдено.")
+    if input_text.isdigit():
+        word_id = int(input_text) if word_search.is_visible(session_id, class_id, int(input_text)) else None
+    else:
+        word = word_search.find_exact(session_id, class_id, input_text)
+        word_id = word["Word_ID"] if word else None
+    if not word_id:
+        await message.answer("Слово не найдено. Поиск по началу слова: /find " + html.escape(input_text[:30]))
         return
     await state.update_data(word_id=word_id)
     await state.set_state(TeacherEditWord.waiting_for_new_text)
@@ -267,10 +403,307 @@ async def teacher_edit_text(message: types.Message, state: FSMContext):
 @router.message(TeacherEditWord.waiting_for_new_translation)
 async def teacher_edit_translation(message: types.Message, state: FSMContext):
     data = await state.get_data()
-    with sqlite3.connect("dori_bot.db") as db:
-        db.execute("UPDATE Word SET Text = ?, translation = ? WHERE Word_ID = ?", (data['new_text'], message.text, data['word_id']))
+    update_word(data['word_id'], data['new_text'], message.text)
     await message.answer("Слово обновлено.")
     await state.clear()
 
+# --- Progress dashboard ---
+DASHBOARD_PAGE_SIZE = 15
+DASHBOARD_HARDEST_WORDS = 5
+
+def _accuracy(correct, incorrect):
+    total = correct + incorrect
+    return f"{round(100 * correct / total)}%" if total else "—"
+
+def _percent(share):
+    return f"{round(100 * share)}%"
+
+def _module_name(module):
+    return html.escape(module) if module else "без модуля"
+
+def _teacher_class(telegram_id):
+    return get_session_class(get_or_create_session(telegram_id))
+
+def render_dashboard(page=0, class_id=None):
+    summary = get_cohort_summary(class_id)
+    students = get_cohort_dashboard(DASHBOARD_PAGE_SIZE + 1, page * DASHBOARD_PAGE_SIZE, class_id)
+    has_next = len(students) > DASHBOARD_PAGE_SIZE
+    cls = get_class(class_id) if class_id else None
+    title = f"класс {html.escape(cls['name'])}" if cls else "без класса"
+    lines = [
+        f"📊 <b>Прогресс студентов</b> ({title})",
+        f"Студентов: {summary['students']}, точность: {_accuracy(summary['correct'], summary['incorrect'])}, "
+        f"выучено слов: {summary['mastered']}",
+    ]
+    if page == 0:
+        modules = get_cohort_module_stats(class_id)
+        # Распределение сложности слов модуля — из пакетного пересчёта services/analytics.py
+        difficulty = get_module_difficulty(class_id)
+        if modules:
+            lines.append("\n<b>Модули:</b>")
+            for m in modules:
+                line = (
+                    f"• {_module_name(m['module'])}: {_accuracy(m['correct'], m['incorrect'])}, "
+                    f"студентов {m['students']}, выучено {m['mastered']}"
+                )
+                d = difficulty.get((m['module'] or "").lower())
+                if d:
+                    line += f", ошибки по словам: медиана {_percent(d['median'])}, 90-й перцентиль {_percent(d['p90'])}"
+                lines.append(line)
+        hardest = get_hardest_words(class_id, DASHBOARD_HARDEST_WORDS)
+        if hardest:
+            lines.append("\n<b>Самые трудные слова:</b>")
+            lines += [
+                f"• {html.escape(w['Text'])} – {html.escape(w['translation'])}: ошибок {_percent(w['error_rate'])}, "
+                f"студентов {w['students']}"
+                for w in hardest
+            ]
+    lines.append(f"\n<b>Студенты</b> (стр. {page + 1}):")
+    for s in students[:DASHBOARD_PAGE_SIZE]:
+        lines.append(
+            f"#{s['StudentSession_ID']} [{s['level']}] {_accuracy(s['correct'], s['incorrect'])}, "
+            f"выучено {s['mastered']}/{s['practiced']}, активность: {s['last_activity'] or '—'}"
+        )
+    if not students:
+        lines.append("Нет данных.")
+    lines.append("\nПодробнее о студенте: /dashboard &lt;#&gt;")
+
+    nav = []
+    if page > 0:
+        nav.append(InlineKeyboardButton(text="◀️", callback_data=DashboardPage(page=page - 1).pack()))
+    if has_next:
+        nav.append(InlineKeyboardButton(text="▶️", callback_data=DashboardPage(page=page + 1).pack()))
+    return "\n".join(lines), InlineKeyboardMarkup(inline_keyboard=[nav]) if nav else None
+
+def render_student_dashboard(session_id, class_id=None):
+    if not is_class_student(session_id, class_id):
+        return f"Студента #{session_id} нет в вашем активном классе. Сменить класс: /classes"
+    modules = get_student_module_stats(session_id)
+    if not modules:
+        return f"У студента #{session_id} пока нет прогресса."
+    lines = [f"📊 <b>Студент #{session_id}</b>"]
+    for m in modules:
+        lines.append(
+            f"• {_module_name(m['module'])}: {_accuracy(m['correct'], m['incorrect'])}, "
+            f"выучено {m['mastered']}/{m['practiced']}, активность: {m['last_activity'] or '—'}"
+        )
+    return "\n".join(lines)
+
+@router.message(Command("dashboard"))
+async def teacher_dashboard(message: types.Message, command: CommandObject):
+    if get_user_role(message.from_user.id) != "teacher":
+        await message.answer("⛔️ Доступ запрещён. Только для преподавателей.")
+        return
+    if command.args:
+        arg = command.args.strip().lstrip("#")
+        if not arg.isdigit():
+            await message.answer("Укажите номер студента, например: /dashboard 12")
+            return
+        text = render_student_dashboard(int(arg), _teacher_class(message.from_user.id))
+        await message.answer(text, parse_mode="HTML")
+        return
+    text, markup = render_dashboard(class_id=_teacher_class(message.from_user.id))
+    await message.answer(text, parse_mode="HTML", reply_markup=markup)
+
+@callback_registry.register("dashboard")
+async def teacher_dashboard_menu(callback: types.CallbackQuery):
+    if get_user_role(callback.from_user.id) != "teacher":
+        await callback.message.answer("⛔️ Доступ запрещён. Только для преподавателей.")
+        await callback.answer()
+        return
+    text, markup = render_dashboard(class_id=_teacher_class(callback.from_user.id))
+    await callback.message.answer(text, parse_mode="HTML", reply_markup=markup)
+    await callback.answer()
+
+@callback_registry.register(DashboardPage)
+async def teacher_dashboard_page(callback: types.CallbackQuery, callback_data: DashboardPage):
+    if get_user_role(callback.from_user.id) != "teacher":
+        await callback.answer("⛔️ Только для преподавателей.")
+        return
+    text, markup = render_dashboard(callback_data.page, _teacher_class(callback.from_user.id))
+    await callback.message.edit_text(text, parse_mode="HTML", reply_markup=markup)
+    await callback.answer()
+
+# --- Classes ---
+def classes_markup(classes, active_id):
+    rows = [
+        [InlineKeyboardButton(
+            text=("✅ " if c["Class_ID"] == active_id else "") + c["name"],
+            callback_data=ClassChoice(class_id=c["Class_ID"]).pack(),
+        )]
+        for c in classes
+    ]
+    rows.append([InlineKeyboardButton(
+        text=("✅ " if active_id is None else "") + "Без класса", callback_data=ClassChoice(class_id=0).pack()
+    )])
+    return InlineKeyboardMarkup(inline_keyboard=rows)
+
+def format_classes(classes, bot_username):
+    if not classes:
+        return "У вас пока нет классов. Создайте: /newclass Название"
+    lines = ["🏫 <b>Ваши классы</b>"]
+    for c in classes:
+        lines.append(
+            f"#{c['Class_ID']} {html.escape(c['name'])}: студентов {c['students']}, код <code>{c['join_code']}</code>\n"
+            f"   t.me/{bot_username}?start=join_{c['join_code']}"
+        )
+    lines.append("\nАктивный класс определяет слова, прогресс и рассылки, с которыми вы работаете.")
+    return "\n".join(lines)
+
+@router.message(Command("newclass"))
+async def teacher_new_class(message: types.Message, command: CommandObject):
+    if get_user_role(message.from_user.id) != "teacher":
+        await message.answer("⛔️ Доступ запрещён. Только для преподавателей.")
+        return
+    name = (command.args or "").strip()
+    if not name:
+        await message.answer("Использование: /newclass Название класса")
+        return
+    cls = create_class(get_or_create_session(message.from_user.id), name[:64])
+    me = await message.bot.me()
+    await message.answer(
+        f"🏫 Класс <b>{html.escape(cls['name'])}</b> создан и выбран активным.\n"
+        f"Код для студентов: <code>{cls['join_code']}</code> (команда /join {cls['join_code']})\n"
+        f"Ссылка: t.me/{me.username}?start=join_{cls['join_code']}",
+        parse_mode="HTML",
+    )
+
+@router.message(Command("classes"))
+async def teacher_classes(message: types.Message):
+    if get_user_role(message.from_user.id) != "teacher":
+        await message.answer("⛔️ Доступ запрещён. Только для преподавателей.")
+        return
+    session_id = get_or_create_session(message.from_user.id)
+    classes = get_teacher_classes(session_id)
+    me = await message.bot.me()
+    await message.answer(
+        format_classes(classes, me.username), parse_mode="HTML",
+        reply_markup=classes_markup(classes, get_session_class(session_id)),
+    )
+
+@callback_registry.register(ClassChoice)
+async def teacher_use_class(callback: types.CallbackQuery, callback_data: ClassChoice):
+    if get_user_role(callback.from_user.id) != "teacher":
+        await callback.answer("⛔️ Только для преподавателей.")
+        return
+    session_id = get_or_create_session(callback.from_user.id)
+    class_id = callback_data.class_id or None
+    if not set_active_class(session_id, class_id):
+        await callback.answer("Класс не найден.")
+        return
+    await callback.message.edit_reply_markup(reply_markup=classes_markup(get_teacher_classes(session_id), class_id))
+    await callback.answer("Активный класс выбран")
+
+# --- Broadcasts ---
+BROADCAST_USAGE = (
+    "Использование: /broadcast [class=3|0] [level=A1] [module=4] [since=7] текст\n"
+    "class — номер класса из /classes, по умолчанию активный класс; 0 — студенты без класса.\n"
+    "since — число дней или дата ГГГГ-ММ-ДД последней активности студента.\n"
+    "Пример: /broadcast level=A2 Добавлен новый модуль 5!"
+)
+_BROADCAST_FILTER_RE = re.compile(r"^\s*(class|level|module|since)=(\S+)")
+
+def parse_broadcast_args(args, default_class=None):
+    """Split '/broadcast' arguments into audience filters and the message text."""
+    filters = {}
+    while True:
+        match = _BROADCAST_FILTER_RE.match(args)
+        if not match:
+            break
+        key, value = match.groups()
+        filters[key] = value
+        args = args[match.end():]
+    text = args.strip()
+    if not text:
+        raise ValueError("Добавьте текст рассылки.")
+
+    level = filters.get("level", "").upper() or None
+    if level and level not in ("A1", "A2", "B1"):
+        raise ValueError("Уровень должен быть A1, A2 или B1.")
+    since = filters.get("since")
+    if since and since.isdigit():
+        since = (date.today() - timedelta(days=int(since))).isoformat()
+    elif since:
+        try:
+            since = date.fromisoformat(since).isoformat()
+        except ValueError:
+            raise ValueError("since — число дней или дата ГГГГ-ММ-ДД.")
+    class_id = filters.get("class", default_class)
+    if isinstance(class_id, str):
+        if not class_id.isdigit():
+            raise ValueError("class — номер класса или 0.")
+        class_id = int(class_id) or None
+    filters = {"level": level, "module": filters.get("module"), "active_since": since, "class_id": class_id}
+    return filters, text
+
+@router.message(Command("broadcast"))
+async def teacher_broadcast(message: types.Message, command: CommandObject):
+    if get_user_role(message.from_user.id) != "teacher":
+        await message.answer("⛔️ Доступ запрещён. Только для преподавателей.")
+        return
+    if not command.args:
+        await message.answer(BROADCAST_USAGE)
+        return
+    session_id = get_or_create_session(message.from_user.id)
+    try:
+        filters, text = parse_broadcast_args(command.args, get_session_class(session_id))
+    except ValueError as e:
+        await message.answer(f"{e}\n\n{BROADCAST_USAGE}")
+        return
+    cls = get_class(filters["class_id"]) if filters["class_id"] else None
+    if filters["class_id"] and (not cls or cls["created_by"] != session_id):
+        await message.answer("Класс не найден. Список ваших классов: /classes")
+        return
+
+    total = count_broadcast_audience(**filters)
+    if not total:
+        await message.answer("Под эти фильтры не подходит ни один студент.")
+        return
+    broadcast_id = create_broadcast(session_id, text, **filters)
+    update_broadcast(broadcast_id, total=total)
+    await message.answer(
+        f"{format_broadcast_report(get_broadcast(broadcast_id))}\n\nТекст:\n{text}",
+        reply_markup=InlineKeyboardMarkup(inline_keyboard=[[
+            InlineKeyboardButton(text="📣 Отправить", callback_data=BroadcastAction(action="send", broadcast_id=broadcast_id).pack()),
+            InlineKeyboardButton(text="Отмена", callback_data=BroadcastAction(action="stop", broadcast_id=broadcast_id).pack()),
+        ]])
+    )
+
+@callback_registry.register(BroadcastAction)
+async def teacher_broadcast_action(callback: types.CallbackQuery, callback_data: BroadcastAction):
+    if get_user_role(callback.from_user.id) != "teacher":
+        await callback.answer("⛔️ Только для преподавателей.")
+        return
+    broadcast = get_broadcast(callback_data.broadcast_id)
+    if not broadcast or broadcast["created_by"] != get_or_create_session(callback.from_user.id):
+        await callback.answer("Рассылка не найдена.")
+        return
+    if callback_data.action == "send":
+        await teacher_broadcast_send(callback, callback_data.broadcast_id)
+    else:
+        await teacher_broadcast_stop(callback, callback_data.broadcast_id)
+
+async def teacher_broadcast_send(callback: types.CallbackQuery, broadcast_id: int):
+    broadcast = get_broadcast(broadcast_id)
+    if not broadcast or broadcast["status"] != "draft":
+        await callback.answer("Рассылка уже запущена или отменена.")
+        return
+    update_broadcast(
+        broadcast_id, status="running",
+        report_chat_id=callback.message.chat.id, report_message_id=callback.message.message_id,
+    )
+    await callback.message.edit_text(
+        format_broadcast_report(get_broadcast(broadcast_id)), reply_markup=broadcast_stop_markup(broadcast_id)
+    )
+    broadcast_service.start(callback.bot, broadcast_id)
+    await callback.answer("Рассылка запущена")
+
+async def teacher_broadcast_stop(callback: types.CallbackQuery, broadcast_id: int):
+    if not broadcast_service.cancel(broadcast_id):
+        await callback.answer("Рассылка уже завершена.")
+        return
+    await callback.message.edit_text(format_broadcast_report(get_broadcast(broadcast_id)))
+    await callback.answer("Рассылка остановлена")
+
 def register(dp):
     dp.include_router(router)
\ No newline at end of file
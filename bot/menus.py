@@ -1,8 +1,11 @@
 from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
 
+from bot.callbacks import AnswerOption, ModuleChoice, ModulePage
+
 def student_main_menu() -> InlineKeyboardMarkup:
     return InlineKeyboardMarkup(inline_keyboard=[
         [InlineKeyboardButton(text="🧠 Флеш-карты", callback_data="flashcards_start")],
+        [InlineKeyboardButton(text="✅ Самопроверка", callback_data="self_check_start")],
         [InlineKeyboardButton(text="✏️ Редактировать слово", callback_data="student_start_edit")],
         [InlineKeyboardButton(text="📚 Мои модули", callback_data="view_modules")],
         [InlineKeyboardButton(text="📖 Мои слова", callback_data="view_student_words")],
@@ -10,11 +13,34 @@ def student_main_menu() -> InlineKeyboardMarkup:
     ])
 
 
-def module_selection_menu(modules: list) -> InlineKeyboardMarkup:
+MODULES_PER_PAGE = 24
+
+def module_selection_menu(modules: list, page: int = 0) -> InlineKeyboardMarkup:
+    """Modules from get_modules()/get_student_modules(), three per row; callback data carries Module_ID."""
+    shown = modules[page * MODULES_PER_PAGE:(page + 1) * MODULES_PER_PAGE]
+    buttons = [
+        InlineKeyboardButton(
+            text=f"{mod['name']} ({mod['words']})", callback_data=ModuleChoice(module_id=mod["Module_ID"]).pack()
+        )
+        for mod in shown
+    ]
+    rows = [buttons[i:i + 3] for i in range(0, len(buttons), 3)]
+    nav = []
+    if page > 0:
+        nav.append(InlineKeyboardButton(text="◀️", callback_data=ModulePage(page=page - 1).pack()))
+    if len(modules) > (page + 1) * MODULES_PER_PAGE:
+        nav.append(InlineKeyboardButton(text="▶️", callback_data=ModulePage(page=page + 1).pack()))
+    if nav:
+        rows.append(nav)
+    rows.append([InlineKeyboardButton(text="🔀 Все слова", callback_data=ModuleChoice(module_id=0).pack())])
+    return InlineKeyboardMarkup(inline_keyboard=rows)
+
+def self_check_menu(options: list) -> InlineKeyboardMarkup:
+    """Answer buttons for a multiple-choice question, two per row; callback data carries the option index."""
     buttons = [
-        [InlineKeyboardButton(text=mod, callback_data=f"module_{mod}")] for mod in modules
+        InlineKeyboardButton(text=text, callback_data=AnswerOption(index=i).pack()) for i, text in enumerate(options)
     ]
-    return InlineKeyboardMarkup(inline_keyboard=buttons)
+    return InlineKeyboardMarkup(inline_keyboard=[buttons[i:i + 2] for i in range(0, len(buttons), 2)])
 
 def confirm_batch_upload_menu() -> InlineKeyboardMarkup:
     return InlineKeyboardMarkup(inline_keyboard=[
@@ -43,7 +69,8 @@ def teacher_main_menu() -> InlineKeyboardMarkup:
         [InlineKeyboardButton(text="Посмотреть все слова", callback_data="view_words")],
         [InlineKeyboardButton(text="Редактировать слово", callback_data="start_edit")],
         [InlineKeyboardButton(text="Редактировать синонимы", callback_data="edit_synonyms")],  # New button
-        [InlineKeyboardButton(text="Мои модули", callback_data="view_modules")]
+        [InlineKeyboardButton(text="Мои модули", callback_data="view_modules")],
+        [InlineKeyboardButton(text="📊 Прогресс студентов", callback_data="dashboard")]
     ])
 
 
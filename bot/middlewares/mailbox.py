@@ -0,0 +1,78 @@
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict
+
+from aiogram import BaseMiddleware
+from aiogram.types import Update
+
+from bot.services.metrics import metrics
+
+
+class MailboxConfig:
+    MAX_CONCURRENT = 64   # обработчиков разных пользователей одновременно
+
+
+class _Mailbox:
+    __slots__ = ("lock", "pending", "presses")
+
+    def __init__(self):
+        self.lock = asyncio.Lock()   # FIFO: обновления пользователя идут в порядке поступления
+        self.pending = 0             # в очереди и в обработке
+        self.presses = set()         # (callback data, сообщение) ещё не обработанных нажатий
+
+
+class UserMailbox(BaseMiddleware):
+    """Runs one user's updates one at a time and different users' updates in parallel.
+
+    Register as an outer update middleware, before any middleware that reads FSM state.
+    Each user gets a mailbox lock, and a semaphore caps how many handlers run at once. A
+    mailbox is dropped as soon as its last queued update finishes. A button press that
+    repeats one still queued or running is answered and dropped.
+    """
+
+    def __init__(self, max_concurrent: int = MailboxConfig.MAX_CONCURRENT):
+        self._boxes: Dict[int, _Mailbox] = {}
+        self._slots = asyncio.Semaphore(max_concurrent)
+
+    async def __call__(
+        self,
+        handler: Callable[[Update, Dict[str, Any]], Awaitable[Any]],
+        event: Update,
+        data: Dict[str, Any],
+    ) -> Any:
+        user, chat = data.get("event_from_user"), data.get("event_chat")
+        key = user.id if user else chat.id if chat else None
+        if key is None:
+            return await handler(event, data)
+
+        box = self._boxes.get(key)
+        if box is None:
+            box = self._boxes[key] = _Mailbox()
+        press = None
+        if event.callback_query:
+            query = event.callback_query
+            press = (query.data, query.message.message_id if query.message else query.inline_message_id)
+            if press in box.presses:
+                # Повторное нажатие той же кнопки, пока первое ещё ждёт или обрабатывается
+                metrics.inc("mailbox.coalesced")
+                await query.answer()
+                return None
+            box.presses.add(press)
+
+        box.pending += 1
+        if box.lock.locked():
+            metrics.inc("mailbox.queued")
+        metrics.set("mailbox.users", len(self._boxes))
+        started = time.monotonic()
+        try:
+            async with box.lock, self._slots:
+                metrics.observe("mailbox.wait_seconds", time.monotonic() - started)
+                if "state" in data:
+                    # FSMContextMiddleware прочитал состояние до очереди — за это время его могли изменить
+                    data["raw_state"] = await data["state"].get_state()
+                return await handler(event, data)
+        finally:
+            box.pending -= 1
+            box.presses.discard(press)
+            if not box.pending:
+                del self._boxes[key]
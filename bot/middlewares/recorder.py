@@ -0,0 +1,125 @@
+import gzip
+import hashlib
+import hmac
+import json
+import logging
+import os
+import secrets
+import time
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from aiogram import BaseMiddleware
+from aiogram.types import Update
+
+from bot.handlers.start import RoleSelection
+
+
+logger = logging.getLogger(__name__)
+
+
+class RecorderConfig:
+    PATH_ENV = "DORI_RECORD_UPDATES"
+    SALT_ENV = "DORI_RECORD_SALT"
+    FLUSH_EVERY = 50
+    ID_KEYS = ("id", "chat_id", "user_id", "sender_chat_id")
+    PERSONAL_KEYS = ("last_name", "username", "phone_number", "bio", "language_code")
+    REQUIRED_NAME = "first_name"  # обязательное поле User/Chat — заменяется, а не удаляется
+    # Состояния, в которых текст сообщения нельзя сохранять
+    SENSITIVE_STATES = {RoleSelection.waiting_for_teacher_password.state}
+    REDACTED = "***"
+
+
+def anonymize_id(value: int, salt: str) -> int:
+    """Map a Telegram user/chat id to a stable pseudonymous id with the same sign."""
+    digest = hmac.new(salt.encode(), str(abs(value)).encode(), hashlib.sha256).digest()
+    pseudo = int.from_bytes(digest[:5], "big") + 1
+    return -pseudo if value < 0 else pseudo
+
+
+def _anonymize(node: Any, salt: str) -> Any:
+    # message_id, update_id и строковые id (callback, файлы) не персональные и остаются как есть
+    if isinstance(node, dict):
+        return {
+            key: anonymize_id(value, salt) if key in RecorderConfig.ID_KEYS and isinstance(value, int)
+            else RecorderConfig.REDACTED if key == RecorderConfig.REQUIRED_NAME
+            else _anonymize(value, salt)
+            for key, value in node.items()
+            if key not in RecorderConfig.PERSONAL_KEYS
+        }
+    if isinstance(node, list):
+        return [_anonymize(item, salt) for item in node]
+    return node
+
+
+def segment_path(path: str, started: datetime, pid: int) -> str:
+    """Recording file of one bot process: updates.jsonl.gz -> updates.jsonl.20250101-120000.1234.gz."""
+    base = path[:-3] if path.endswith(".gz") else path
+    return f"{base}.{started:%Y%m%d-%H%M%S}.{pid}.gz"
+
+
+class UpdateRecorder(BaseMiddleware):
+    """Writes every incoming update, anonymized, to a gzip-compressed JSONL file.
+
+    Each process writes its own segment next to `path`: a process killed mid-write leaves a
+    truncated gzip member, and appending to it would make the whole file unreadable.
+    """
+
+    def __init__(self, path: str, salt: str):
+        self.path = segment_path(path, datetime.now(), os.getpid())
+        self.salt = salt
+        self._file = None
+        self._pending = 0
+
+    @classmethod
+    def from_env(cls) -> Optional["UpdateRecorder"]:
+        path = os.getenv(RecorderConfig.PATH_ENV)
+        if not path:
+            return None
+        salt = os.getenv(RecorderConfig.SALT_ENV)
+        if not salt:
+            salt = secrets.token_hex(16)
+            logger.warning(
+                f"{RecorderConfig.SALT_ENV} is not set: recorded ids cannot be matched to a database copy"
+            )
+        recorder = cls(path, salt)
+        logger.info(f"Recording updates to {recorder.path}")
+        return recorder
+
+    def record(self, update: Update, raw_state: Optional[str] = None):
+        payload = update.model_dump(mode="json", exclude_none=True)
+        if raw_state in RecorderConfig.SENSITIVE_STATES and "message" in payload:
+            payload["message"]["text"] = RecorderConfig.REDACTED
+        line = json.dumps(
+            {"ts": time.time(), "update": _anonymize(payload, self.salt)},
+            ensure_ascii=False, separators=(",", ":"),
+        )
+        if self._file is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            self._file = gzip.open(self.path, "wt", encoding="utf-8")
+        self._file.write(line + "\n")
+        self._pending += 1
+        if self._pending >= RecorderConfig.FLUSH_EVERY:
+            self.flush()
+
+    def flush(self):
+        if self._file is not None and self._pending:
+            self._file.flush()
+            self._pending = 0
+
+    async def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    async def __call__(
+        self,
+        handler: Callable[[Update, Dict[str, Any]], Awaitable[Any]],
+        event: Update,
+        data: Dict[str, Any],
+    ) -> Any:
+        try:
+            self.record(event, data.get("raw_state"))
+        except Exception as e:
+            logger.error(f"Update recording failed: {e}")
+        return await handler(event, data)
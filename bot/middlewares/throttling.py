@@ -0,0 +1,104 @@
+import time
+from typing import Any, Awaitable, Callable, Dict
+
+from aiogram import BaseMiddleware
+from aiogram.dispatcher.flags import get_flag
+from aiogram.types import CallbackQuery, Message, TelegramObject
+
+from bot.callbacks import callback_registry
+from bot.services.metrics import metrics
+
+
+class ThrottleConfig:
+    # Класс обработчика (флаг "throttle") -> (ёмкость корзины, пополнение в секунду)
+    LIMITS = {
+        "default": (10, 2.0),
+        "flashcard": (4, 1.0),        # каждый ответ — запись прогресса и рендер карточки
+        "export": (1, 1 / 30),        # выгрузка читает таблицу целиком
+    }
+    NOTICE_INTERVAL = 10.0            # не чаще одного предупреждения на пользователя
+    IDLE_TTL = 600.0                  # корзины простаивающих пользователей удаляются
+    SWEEP_EVERY = 1000                # проверять простой раз в N событий
+    CALLBACK_NOTICE = "⏳ Слишком часто, подождите немного."
+    MESSAGE_NOTICE = "⏳ Слишком много сообщений. Подождите пару секунд."
+
+
+class TokenBucket:
+    __slots__ = ("tokens", "updated")
+
+    def __init__(self, capacity: float, now: float):
+        self.tokens = capacity
+        self.updated = now
+
+    def consume(self, capacity: float, rate: float, now: float) -> bool:
+        self.tokens = min(capacity, self.tokens + (now - self.updated) * rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+
+class ThrottlingMiddleware(BaseMiddleware):
+    """Per-user token buckets per handler class; excess messages and callback presses are dropped.
+
+    Register as an inner middleware on message and callback_query so the matched
+    handler's flags are known: @router.message(..., flags={"throttle": "flashcard"}).
+    Callback flags come from the callback_registry entry for the pressed button.
+    """
+
+    def __init__(self, limits: Dict[str, tuple] = None):
+        self.limits = limits or ThrottleConfig.LIMITS
+        self._buckets: Dict[tuple, TokenBucket] = {}
+        self._notified: Dict[int, float] = {}
+        self._events = 0
+
+    def _sweep(self, now: float):
+        idle = now - ThrottleConfig.IDLE_TTL
+        self._buckets = {k: b for k, b in self._buckets.items() if b.updated > idle}
+        self._notified = {k: t for k, t in self._notified.items() if t > idle}
+
+    async def _reject(self, event: TelegramObject, user_id: int, now: float):
+        if isinstance(event, CallbackQuery):
+            # На callback всё равно нужно ответить, иначе у пользователя крутится индикатор
+            await event.answer(ThrottleConfig.CALLBACK_NOTICE)
+        elif isinstance(event, Message) and now - self._notified.get(user_id, 0.0) >= ThrottleConfig.NOTICE_INTERVAL:
+            self._notified[user_id] = now
+            await event.answer(ThrottleConfig.MESSAGE_NOTICE)
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        user = data.get("event_from_user")
+        if user is None:
+            return await handler(event, data)
+
+        now = time.monotonic()
+        self._events += 1
+        if self._events % ThrottleConfig.SWEEP_EVERY == 0:
+            self._sweep(now)
+            metrics.set("throttle.buckets", len(self._buckets))
+
+        if isinstance(event, CallbackQuery):
+            # Все нажатия идут через один обработчик, флаги — у записи в таблице
+            handler_class = callback_registry.flags(event.data).get("throttle", "default")
+        else:
+            handler_class = get_flag(data, "throttle", default="default")
+        if handler_class not in self.limits:
+            handler_class = "default"
+
+        capacity, rate = self.limits[handler_class]
+        key = (user.id, handler_class)
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = TokenBucket(capacity, now)
+        if not bucket.consume(capacity, rate, now):
+            metrics.inc("throttle.dropped", handler=handler_class)
+            await self._reject(event, user.id, now)
+            return None
+
+        metrics.inc("throttle.allowed", handler=handler_class)
+        return await handler(event, data)
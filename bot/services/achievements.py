@@ -0,0 +1,137 @@
+import html
+import logging
+import operator
+import re
+from collections import defaultdict
+from typing import Callable, Dict, List, Optional
+
+from bot.database.db_helpers import (
+    get_achievement_definitions, add_achievement, assign_achievement,
+    get_awarded_achievement_ids, get_student_counters
+)
+
+
+logger = logging.getLogger(__name__)
+
+
+class AchievementConfig:
+    # Имя счётчика в критериях -> выражение над колонками StudentStats
+    COUNTERS = {
+        "correct_total": "correct_count",
+        "answers_total": "correct_count + incorrect_count",
+        "streak": "current_streak",
+        "best_streak": "best_streak",
+        "words_mastered": "words_mastered",
+        "words_added": "words_added",
+        "modules_completed": "modules_completed",
+    }
+    # Какие счётчики может изменить каждое событие
+    EVENTS = {
+        "answer": {"correct_total", "answers_total", "streak", "best_streak", "words_mastered"},
+        "word_added": {"words_added"},
+        "module_completed": {"modules_completed"},
+    }
+    DEFAULTS = [
+        ("Первые шаги", "Первый правильный ответ", "correct_total >= 1"),
+        ("Сотня", "100 правильных ответов", "correct_total >= 100"),
+        ("В ударе", "10 правильных ответов подряд", "streak >= 10"),
+        ("Коллекционер", "Добавить 20 слов", "words_added >= 20"),
+        ("Знаток", "Выучить 50 слов", "words_mastered >= 50"),
+        ("Модуль пройден", "Завершить тренировку по модулю", "modules_completed >= 1"),
+    ]
+
+
+_OPERATORS = {
+    ">=": operator.ge, ">": operator.gt, "<=": operator.le,
+    "<": operator.lt, "==": operator.eq, "=": operator.eq,
+}
+_CONDITION_RE = re.compile(r"^\s*([a-z_]+)\s*(>=|<=|==|=|>|<)\s*(\d+)\s*$")
+_AND_RE = re.compile(r"\s+and\s+|,|&&", re.IGNORECASE)
+
+
+class CompiledAchievement:
+    __slots__ = ("achievement_id", "name", "description", "counters", "predicate")
+
+    def __init__(self, achievement_id: int, name: str, description: str,
+                 counters: frozenset, predicate: Callable[[Dict[str, int]], bool]):
+        self.achievement_id = achievement_id
+        self.name = name
+        self.description = description
+        self.counters = counters
+        self.predicate = predicate
+
+
+def compile_criteria(criteria: str) -> tuple:
+    """Compile 'streak >= 10 and correct_total >= 100' into (counter names, predicate)."""
+    checks = []
+    for part in _AND_RE.split(criteria or ""):
+        match = _CONDITION_RE.match(part)
+        if not match:
+            raise ValueError(f"bad condition: {part!r}")
+        counter, op, value = match.groups()
+        if counter not in AchievementConfig.COUNTERS:
+            raise ValueError(f"unknown counter: {counter}")
+        checks.append((counter, _OPERATORS[op], int(value)))
+
+    def predicate(counters: Dict[str, int]) -> bool:
+        return all(op(counters[name], value) for name, op, value in checks)
+
+    return frozenset(name for name, _, _ in checks), predicate
+
+
+class AchievementEngine:
+    def __init__(self):
+        self._by_counter: Optional[Dict[str, List[CompiledAchievement]]] = None
+
+    def load(self):
+        definitions = get_achievement_definitions()
+        if not definitions:
+            for name, description, criteria in AchievementConfig.DEFAULTS:
+                add_achievement(name, description, criteria)
+            definitions = get_achievement_definitions()
+
+        by_counter = defaultdict(list)
+        for achievement_id, name, description, criteria in definitions:
+            try:
+                counters, predicate = compile_criteria(criteria)
+            except ValueError as e:
+                logger.warning(f"Achievement {achievement_id} '{name}' skipped: {e}")
+                continue
+            compiled = CompiledAchievement(achievement_id, name, description, counters, predicate)
+            for counter in counters:
+                by_counter[counter].append(compiled)
+        self._by_counter = dict(by_counter)
+
+    def on_event(self, session_id: int, event: str) -> List[CompiledAchievement]:
+        """Evaluate only achievements whose counters the event can change; return the newly awarded ones."""
+        if self._by_counter is None:
+            self.load()
+        affected = {}
+        for counter in AchievementConfig.EVENTS[event]:
+            for achievement in self._by_counter.get(counter, ()):
+                affected[achievement.achievement_id] = achievement
+        if not affected:
+            return []
+
+        awarded = get_awarded_achievement_ids(session_id, list(affected))
+        candidates = [a for a_id, a in affected.items() if a_id not in awarded]
+        if not candidates:
+            return []
+
+        names = set().union(*(a.counters for a in candidates))
+        counters = get_student_counters(session_id, {n: AchievementConfig.COUNTERS[n] for n in names})
+        # assign_achievement опирается на уникальный индекс: повторная выдача ничего не вставит
+        return [
+            a for a in candidates
+            if a.predicate(counters) and assign_achievement(session_id, a.achievement_id)
+        ]
+
+
+def format_new_achievements(achievements: List[CompiledAchievement]) -> str:
+    return "\n".join(
+        f"🏆 Новое достижение: <b>{html.escape(a.name)}</b> — {html.escape(a.description or '')}"
+        for a in achievements
+    )
+
+
+achievement_engine = AchievementEngine()
@@ -0,0 +1,217 @@
+"""Word-difficulty analytics over the whole cohort, computed in one vectorized pass.
+
+PracticeProgress is streamed into NumPy columns and every statistic is a bincount over word,
+student or module indices, so the job scales with the number of rows without a Python loop
+per row. Results replace WordDifficulty and ModuleDifficulty, read by the teacher dashboard
+and by deck ordering.
+
+    python -m bot.services.analytics --db dori_bot.db
+"""
+
+import argparse
+import asyncio
+import logging
+import time
+
+import numpy as np
+
+from bot.database import db_helpers
+from bot.database.schema import initialize_db
+from bot.services.metrics import metrics
+from bot.services.scheduler import PeriodicTask
+
+
+logger = logging.getLogger(__name__)
+
+
+class AnalyticsConfig:
+    INTERVAL = 6 * 3600
+    INITIAL_DELAY = 300
+    PRIOR_WEIGHT = 5.0          # ответов «средней» сложности, добавляемых к каждому слову при сглаживании
+    MIN_STUDENTS = 5            # discrimination считается, начиная с этого числа студентов
+    PERCENTILES = (25, 50, 75, 90)
+
+
+_PROGRESS_DTYPE = np.dtype([("session", np.int64), ("word", np.int64), ("correct", np.int64), ("incorrect", np.int64)])
+_MODULE_DTYPE = np.dtype([("word", np.int64), ("class_id", np.int64), ("module", np.int64)])
+
+
+def load_progress() -> np.ndarray:
+    """Answered progress rows as a structured array (session, word, correct, incorrect)."""
+    return np.fromiter(db_helpers.iter_practice_counts(), dtype=_PROGRESS_DTYPE)
+
+
+def load_module_words() -> np.ndarray:
+    return np.fromiter(db_helpers.iter_module_words(), dtype=_MODULE_DTYPE)
+
+
+def word_difficulty(progress: np.ndarray, prior_weight: float = AnalyticsConfig.PRIOR_WEIGHT,
+                    min_students: int = AnalyticsConfig.MIN_STUDENTS) -> dict:
+    """Per-word statistics, indexed by Word_ID (words without answers have students == 0).
+
+    error_rate is the word's share of wrong answers shrunk towards the cohort-wide rate by
+    prior_weight answers, so a word answered twice is not ranked by two data points.
+    discrimination is the Pearson correlation, over the students who practised the word,
+    between their accuracy on it and their accuracy on all other words; NaN below min_students.
+    """
+    sessions, words = progress["session"], progress["word"]
+    correct = progress["correct"].astype(np.float64)
+    incorrect = progress["incorrect"].astype(np.float64)
+    attempts = correct + incorrect
+    size = int(words.max()) + 1 if len(words) else 0
+
+    students = np.bincount(words, minlength=size)
+    word_attempts = np.bincount(words, weights=attempts, minlength=size)
+    word_incorrect = np.bincount(words, weights=incorrect, minlength=size)
+    prior = incorrect.sum() / attempts.sum() if len(words) else 0.0
+    error_rate = (word_incorrect + prior_weight * prior) / (word_attempts + prior_weight)
+
+    # Успеваемость студента без этого слова, чтобы слово не коррелировало само с собой
+    student_correct = np.bincount(sessions, weights=correct)[sessions] - correct
+    student_attempts = np.bincount(sessions, weights=attempts)[sessions] - attempts
+    rest = student_attempts > 0
+    x = correct[rest] / attempts[rest]
+    y = student_correct[rest] / student_attempts[rest]
+    w = words[rest]
+    n = np.bincount(w, minlength=size).astype(np.float64)
+    sx = np.bincount(w, weights=x, minlength=size)
+    sy = np.bincount(w, weights=y, minlength=size)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cov = np.bincount(w, weights=x * y, minlength=size) - sx * sy / n
+        var_x = np.bincount(w, weights=x * x, minlength=size) - sx * sx / n
+        var_y = np.bincount(w, weights=y * y, minlength=size) - sy * sy / n
+        discrimination = cov / np.sqrt(var_x * var_y)
+    # Все ответили одинаково — корреляция не определена
+    discrimination[(n < min_students) | (var_x <= 1e-12) | (var_y <= 1e-12)] = np.nan
+
+    return {
+        "students": students,
+        "attempts": word_attempts.astype(np.int64),
+        "error_rate": error_rate,
+        "discrimination": np.clip(discrimination, -1.0, 1.0),
+        "prior": prior,
+    }
+
+
+def module_difficulty(module_words: np.ndarray, words: dict,
+                      percentiles=AnalyticsConfig.PERCENTILES) -> dict:
+    """Distribution of word error rates per (Class_ID, Module_ID), over the words that have answers.
+
+    Words are sorted once by (module, error rate); each percentile is then read off every module's
+    slice at the same relative position, with linear interpolation like np.percentile.
+    """
+    size = len(words["students"])
+    module_words = module_words[module_words["word"] < size]
+    module_words = module_words[words["students"][module_words["word"]] > 0]
+    keys = module_words["class_id"] * (int(module_words["module"].max(initial=0)) + 1) + module_words["module"]
+    unique_keys, first, group = np.unique(keys, return_index=True, return_inverse=True)
+    values = words["error_rate"][module_words["word"]]
+
+    order = np.lexsort((values, group))
+    values, group, word_ids = values[order], group[order], module_words["word"][order]
+    counts = np.bincount(group, minlength=len(unique_keys))
+    starts = np.cumsum(counts) - counts
+    result = {
+        "class_id": module_words["class_id"][first],
+        "module_id": module_words["module"][first],
+        "words": counts,
+        "mean": np.bincount(group, weights=values, minlength=len(unique_keys)) / counts,
+        "hardest_word_id": word_ids[starts + counts - 1],
+    }
+    for q in percentiles:
+        position = starts + (counts - 1) * (q / 100)
+        low = np.floor(position).astype(np.int64)
+        high = np.ceil(position).astype(np.int64)
+        result[f"p{q}"] = values[low] + (values[high] - values[low]) * (position - low)
+    return result
+
+
+def compute_difficulty() -> dict:
+    """Recompute and store word and module difficulty. Blocking: run in a thread."""
+    started = time.monotonic()
+    progress = load_progress()
+    module_words = load_module_words()
+    loaded = time.monotonic()
+
+    words = word_difficulty(progress)
+    modules = module_difficulty(module_words, words)
+    computed = time.monotonic()
+
+    now = int(time.time())
+    word_ids = np.flatnonzero(words["students"])
+    discrimination = words["discrimination"][word_ids].astype(object)
+    discrimination[np.isnan(words["discrimination"][word_ids])] = None
+    word_rows = zip(
+        word_ids.tolist(), words["students"][word_ids].tolist(), words["attempts"][word_ids].tolist(),
+        words["error_rate"][word_ids].tolist(), discrimination.tolist(), [now] * len(word_ids),
+    )
+    module_rows = zip(
+        modules["class_id"].tolist(), modules["module_id"].tolist(), modules["words"].tolist(),
+        modules["mean"].tolist(), modules["p25"].tolist(), modules["p50"].tolist(),
+        modules["p75"].tolist(), modules["p90"].tolist(), modules["hardest_word_id"].tolist(),
+        [now] * len(modules["words"]),
+    )
+    db_helpers.replace_word_difficulty(word_rows, module_rows)
+    finished = time.monotonic()
+    return {
+        "rows": len(progress),
+        "words": len(word_ids),
+        "modules": len(modules["words"]),
+        "prior": words["prior"],
+        "load_seconds": loaded - started,
+        "compute_seconds": computed - loaded,
+        "store_seconds": finished - computed,
+        "seconds": finished - started,
+    }
+
+
+class AnalyticsService:
+    """Periodic recomputation of word difficulty; the work runs in a worker thread."""
+
+    def __init__(self):
+        self._task = PeriodicTask(
+            "analytics", AnalyticsConfig.INTERVAL, self.run, initial_delay=AnalyticsConfig.INITIAL_DELAY
+        )
+        self._lock = asyncio.Lock()
+
+    async def start(self):
+        """Dispatcher startup hook."""
+        self._task.start()
+
+    async def stop(self):
+        """Dispatcher shutdown hook."""
+        await self._task.stop()
+
+    async def run(self) -> dict:
+        async with self._lock:
+            result = await asyncio.to_thread(compute_difficulty)
+        metrics.observe("analytics.seconds", result["seconds"])
+        metrics.set("analytics.rows", result["rows"])
+        metrics.set("analytics.words", result["words"])
+        logger.info(
+            f"Word difficulty: {result['rows']} progress rows, {result['words']} words, "
+            f"{result['modules']} modules in {result['seconds']:.2f} s"
+        )
+        return result
+
+
+analytics_service = AnalyticsService()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recompute word and module difficulty")
+    parser.add_argument("--db", default=db_helpers.DB_PATH, help="database file")
+    args = parser.parse_args()
+    initialize_db(args.db)
+    db_helpers.DB_PATH = args.db
+    result = compute_difficulty()
+    print(
+        f"{result['rows']} progress rows -> {result['words']} words, {result['modules']} modules; "
+        f"cohort error rate {result['prior']:.1%}\n"
+        f"load {result['load_seconds']:.2f} s, compute {result['compute_seconds']:.2f} s, "
+        f"store {result['store_seconds']:.2f} s"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+import asyncio
+import logging
+import time
+from datetime import datetime, timedelta, timezone
+
+from bot.database.db_helpers import insert_answer_events, rollup_answer_events, prune_answer_events
+from bot.services.metrics import metrics
+from bot.services.scheduler import PeriodicTask
+
+
+logger = logging.getLogger(__name__)
+
+
+class AnswerLogConfig:
+    FLUSH_INTERVAL = 2.0        # секунд между записями буфера в AnswerEvent
+    MAX_BUFFER = 5000           # при переполнении буфер пишется сразу
+    ROLLUP_INTERVAL = 300       # свёртка в дневные агрегаты
+    ROLLUP_BATCH = 50000        # событий за одну транзакцию свёртки
+    PRUNE_INTERVAL = 6 * 3600
+    EVENT_RETENTION_DAYS = 30   # сырые события
+    DAILY_RETENTION_DAYS = 400  # дневные агрегаты
+
+
+class AnswerLog:
+    """Buffers answer events in memory and appends them to AnswerEvent in batches.
+
+    Batches are written in a worker thread, one at a time; a batch that fails to write goes
+    back to the front of the buffer. Background tasks fold events into DailyStudentStats/
+    DailyWordStats and prune raw events past the retention window. Events still in the
+    buffer at a crash are lost.
+    """
+
+    def __init__(self):
+        self._buffer = []
+        self._write_lock = asyncio.Lock()
+        self._overflow_flush = None
+        self._flush_task = PeriodicTask("answer_log.flush", AnswerLogConfig.FLUSH_INTERVAL, self.flush)
+        self._rollup_task = PeriodicTask("answer_log.rollup", AnswerLogConfig.ROLLUP_INTERVAL, self.rollup)
+        self._prune_task = PeriodicTask(
+            "answer_log.prune", AnswerLogConfig.PRUNE_INTERVAL, self.prune, initial_delay=AnswerLogConfig.ROLLUP_INTERVAL
+        )
+
+    def record(self, session_id: int, word_id: int, is_correct: bool):
+        self._buffer.append((session_id, word_id, int(is_correct), int(time.time())))
+        if len(self._buffer) >= AnswerLogConfig.MAX_BUFFER and (
+            self._overflow_flush is None or self._overflow_flush.done()
+        ):
+            # Запись не блокирует обработчик: буфер уходит в БД в фоне
+            self._overflow_flush = asyncio.get_running_loop().create_task(self._flush_overflow())
+
+    async def _flush_overflow(self):
+        try:
+            await self.flush()
+        except Exception:
+            logger.exception("Answer log overflow flush failed")
+
+    async def flush(self):
+        async with self._write_lock:
+            events, self._buffer = self._buffer, []
+            if not events:
+                return
+            started = time.monotonic()
+            try:
+                await asyncio.to_thread(insert_answer_events, events)
+            except Exception:
+                # Пачка возвращается в начало буфера и уйдёт со следующей записью
+                self._buffer[:0] = events
+                metrics.inc("answer_log.write_failures")
+                raise
+            metrics.inc("answer_log.events", len(events))
+            metrics.observe("answer_log.flush_seconds", time.monotonic() - started)
+
+    async def rollup(self) -> int:
+        await self.flush()
+        total = 0
+        while True:
+            started = time.monotonic()
+            count = await asyncio.to_thread(rollup_answer_events, AnswerLogConfig.ROLLUP_BATCH)
+            total += count
+            if count:
+                metrics.observe("answer_log.rollup_seconds", time.monotonic() - started)
+            if count < AnswerLogConfig.ROLLUP_BATCH:
+                break
+        metrics.inc("answer_log.rolled_up", total)
+        return total
+
+    async def prune(self):
+        await self.rollup()
+        events_before = int(time.time()) - AnswerLogConfig.EVENT_RETENTION_DAYS * 86400
+        daily_before = (datetime.now(timezone.utc) - timedelta(days=AnswerLogConfig.DAILY_RETENTION_DAYS)).strftime("%Y-%m-%d")
+        pruned = await asyncio.to_thread(prune_answer_events, events_before, daily_before)
+        metrics.inc("answer_log.pruned", pruned)
+        if pruned:
+            logger.info(f"Pruned {pruned} answer events older than {AnswerLogConfig.EVENT_RETENTION_DAYS} days")
+
+    async def start(self):
+        """Dispatcher startup hook."""
+        for task in (self._flush_task, self._rollup_task, self._prune_task):
+            task.start()
+
+    async def stop(self):
+        """Dispatcher shutdown hook: write what is still buffered."""
+        for task in (self._flush_task, self._rollup_task, self._prune_task):
+            await task.stop()
+        await self.flush()
+
+
+answer_log = AnswerLog()
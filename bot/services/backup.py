@@ -0,0 +1,151 @@
+import asyncio
+import glob
+import logging
+import os
+import sqlite3
+import time
+from datetime import datetime
+
+from bot.database import db_helpers
+from bot.services.metrics import metrics
+from bot.services.scheduler import PeriodicTask
+
+
+logger = logging.getLogger(__name__)
+
+
+class BackupConfig:
+    DIR_ENV = "DORI_BACKUP_DIR"
+    HOURS_ENV = "DORI_BACKUP_HOURS"
+    KEEP_ENV = "DORI_BACKUP_KEEP"
+    DEFAULT_DIR = "backups"
+    DEFAULT_HOURS = 6.0          # 0 — отключить фоновые копии
+    DEFAULT_KEEP = 7             # сколько последних копий хранить
+    INITIAL_DELAY = 600
+    PAGES_PER_STEP = 256         # страниц за шаг: между шагами писатели получают базу
+    STEP_PAUSE = 0.005           # секунд паузы после каждого шага
+    MAX_RESTARTS = 3             # база менялась во время копирования — дальше копируем за один шаг
+    PREFIX = "dori_bot-"
+
+
+class BackupError(Exception):
+    pass
+
+
+class _Restarted(Exception):
+    pass
+
+
+def _copy(src_path: str, dst_path: str, pages: int) -> int:
+    """Online copy through the SQLite backup API; returns the number of pages copied."""
+    progress = {"remaining": None, "restarts": 0, "total": 0}
+
+    def on_step(status, remaining, total):
+        # Если источник изменил другой процесс или соединение, копирование начинается заново
+        if progress["remaining"] is not None and remaining > progress["remaining"]:
+            progress["restarts"] += 1
+            if progress["restarts"] > BackupConfig.MAX_RESTARTS:
+                raise _Restarted()
+        progress["remaining"], progress["total"] = remaining, total
+        time.sleep(BackupConfig.STEP_PAUSE)
+
+    src = sqlite3.connect(src_path)
+    dst = sqlite3.connect(dst_path)
+    try:
+        src.backup(dst, pages=pages, progress=on_step if pages > 0 else None)
+        return progress["total"] or src.execute("PRAGMA page_count").fetchone()[0]
+    finally:
+        dst.close()
+        src.close()
+
+
+def _integrity_check(path: str):
+    conn = sqlite3.connect(path)
+    try:
+        rows = conn.execute("PRAGMA integrity_check").fetchall()
+    finally:
+        conn.close()
+    if rows != [("ok",)]:
+        raise BackupError("integrity_check: " + "; ".join(r[0] for r in rows[:5]))
+
+
+def list_backups(directory: str) -> list:
+    """Backup files in the directory, oldest first."""
+    return sorted(glob.glob(os.path.join(directory, f"{BackupConfig.PREFIX}*.db")))
+
+
+def rotate_backups(directory: str, keep: int) -> list:
+    removed = list_backups(directory)[:-keep] if keep > 0 else []
+    for path in removed:
+        os.remove(path)
+    return removed
+
+
+def create_backup(db_path: str, directory: str, keep: int = BackupConfig.DEFAULT_KEEP) -> dict:
+    """Copy a live database into directory, check the copy and rotate old ones. Blocking: run in a thread."""
+    os.makedirs(directory, exist_ok=True)
+    started = time.monotonic()
+    path = os.path.join(directory, f"{BackupConfig.PREFIX}{datetime.now():%Y%m%d-%H%M%S}.db")
+    tmp_path = path + ".tmp"
+    try:
+        try:
+            pages = _copy(db_path, tmp_path, BackupConfig.PAGES_PER_STEP)
+        except _Restarted:
+            # Базу постоянно меняют: одна операция чтения. В режиме WAL она не блокирует писателей
+            logger.info("Backup restarted too often, copying in one step")
+            os.remove(tmp_path)
+            pages = _copy(db_path, tmp_path, -1)
+        _integrity_check(tmp_path)
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    rotated = rotate_backups(directory, keep)
+    return {
+        "path": path,
+        "size": os.path.getsize(path),
+        "pages": pages,
+        "seconds": time.monotonic() - started,
+        "rotated": len(rotated),
+    }
+
+
+class BackupService:
+    """Scheduled online backups of the bot database; the copy itself runs in a worker thread."""
+
+    def __init__(self):
+        self.directory = os.getenv(BackupConfig.DIR_ENV, BackupConfig.DEFAULT_DIR)
+        self.keep = int(os.getenv(BackupConfig.KEEP_ENV, BackupConfig.DEFAULT_KEEP))
+        hours = float(os.getenv(BackupConfig.HOURS_ENV, BackupConfig.DEFAULT_HOURS))
+        self._task = PeriodicTask(
+            "backup", hours * 3600, self.run, initial_delay=BackupConfig.INITIAL_DELAY
+        ) if hours > 0 else None
+        self._lock = asyncio.Lock()
+
+    async def start(self):
+        """Dispatcher startup hook."""
+        if self._task:
+            self._task.start()
+
+    async def stop(self):
+        """Dispatcher shutdown hook."""
+        if self._task:
+            await self._task.stop()
+
+    async def run(self) -> dict:
+        async with self._lock:
+            try:
+                result = await asyncio.to_thread(create_backup, db_helpers.DB_PATH, self.directory, self.keep)
+            except Exception:
+                metrics.inc("backup.failures")
+                raise
+        metrics.observe("backup.seconds", result["seconds"])
+        metrics.set("backup.size_bytes", result["size"])
+        metrics.set("backup.last_success", int(time.time()))
+        metrics.inc("backup.runs")
+        logger.info(f"Backup {result['path']}: {result['size']} bytes, {result['seconds']:.1f} s")
+        return result
+
+
+backup_service = BackupService()
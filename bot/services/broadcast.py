@@ -0,0 +1,145 @@
+import asyncio
+import logging
+import time
+
+from aiogram import Bot
+from aiogram.exceptions import TelegramAPIError, TelegramBadRequest, TelegramForbiddenError
+from aiogram.types import InlineKeyboardButton, InlineKeyboardMarkup
+
+from bot.callbacks import BroadcastAction
+from bot.database.db_helpers import (
+    get_broadcast, update_broadcast, get_broadcast_recipients, get_running_broadcast_ids
+)
+from bot.services.metrics import metrics
+from bot.services.send_scheduler import Lane, send_priority
+
+
+logger = logging.getLogger(__name__)
+
+
+class BroadcastConfig:
+    CHUNK_SIZE = 100          # получателей за один запрос и одну контрольную точку
+    CONCURRENCY = 10          # одновременных отправок; лимиты Telegram соблюдает SendScheduler
+    REPORT_INTERVAL = 3.0     # секунд между обновлениями отчёта преподавателю
+
+
+def format_broadcast_report(broadcast: dict) -> str:
+    status = {
+        "draft": "📝 Черновик",
+        "running": "📣 Идёт рассылка",
+        "done": "✅ Рассылка завершена",
+        "cancelled": "⏹ Рассылка остановлена",
+    }[broadcast["status"]]
+    filters = [
+        f"класс #{broadcast['class_id']}" if broadcast["class_id"] else "без класса",
+        f"уровень {broadcast['level']}" if broadcast["level"] else None,
+        f"модуль {broadcast['module']}" if broadcast["module"] else None,
+        f"активны с {broadcast['active_since']}" if broadcast["active_since"] else None,
+    ]
+    filters = ", ".join(f for f in filters if f)
+    return (
+        f"{status} #{broadcast['Broadcast_ID']}\n"
+        f"Аудитория: {filters} — {broadcast['total']}\n"
+        f"Доставлено: {broadcast['sent']}, ошибок: {broadcast['failed']}, "
+        f"заблокировали бота: {broadcast['blocked']}"
+    )
+
+
+def broadcast_stop_markup(broadcast_id: int) -> InlineKeyboardMarkup:
+    return InlineKeyboardMarkup(inline_keyboard=[[
+        InlineKeyboardButton(text="⏹ Остановить", callback_data=BroadcastAction(action="stop", broadcast_id=broadcast_id).pack())
+    ]])
+
+
+class BroadcastService:
+    """Runs broadcasts in the background: keyset chunks of recipients, bounded concurrency, checkpoints.
+
+    Progress (last StudentSession_ID and counters) is stored after every chunk, so a
+    restart resumes from the last finished chunk; at most one chunk can be delivered twice.
+    """
+
+    def __init__(self):
+        self._tasks = {}
+
+    def start(self, bot: Bot, broadcast_id: int):
+        if broadcast_id not in self._tasks:
+            task = asyncio.create_task(self._run(bot, broadcast_id))
+            self._tasks[broadcast_id] = task
+            task.add_done_callback(lambda _: self._tasks.pop(broadcast_id, None))
+
+    def cancel(self, broadcast_id: int) -> bool:
+        broadcast = get_broadcast(broadcast_id)
+        if not broadcast or broadcast["status"] not in ("draft", "running"):
+            return False
+        # Задача увидит новый статус перед следующей порцией и остановится сама
+        update_broadcast(broadcast_id, status="cancelled")
+        return True
+
+    async def resume(self, bot: Bot):
+        """Restart broadcasts interrupted by a shutdown; registered as a Dispatcher startup hook."""
+        for broadcast_id in get_running_broadcast_ids():
+            logger.info(f"Resuming broadcast {broadcast_id}")
+            self.start(bot, broadcast_id)
+
+    async def _send(self, bot: Bot, telegram_id: int, text: str, counters: dict, semaphore):
+        async with semaphore:
+            try:
+                await bot.send_message(telegram_id, text)
+                counters["sent"] += 1
+            except TelegramForbiddenError:
+                counters["blocked"] += 1
+            except TelegramAPIError as e:
+                logger.warning(f"Broadcast to {telegram_id} failed: {e}")
+                counters["failed"] += 1
+
+    async def _report(self, bot: Bot, broadcast: dict, final: bool = False):
+        if not broadcast["report_message_id"]:
+            return
+        try:
+            await bot.edit_message_text(
+                format_broadcast_report(broadcast),
+                chat_id=broadcast["report_chat_id"],
+                message_id=broadcast["report_message_id"],
+                reply_markup=None if final else broadcast_stop_markup(broadcast["Broadcast_ID"]),
+            )
+        except TelegramBadRequest as e:
+            logger.info(f"Broadcast {broadcast['Broadcast_ID']} report not updated: {e.message}")
+
+    async def _run(self, bot: Bot, broadcast_id: int):
+        broadcast = get_broadcast(broadcast_id)
+        counters = {k: broadcast[k] for k in ("sent", "failed", "blocked")}
+        checkpoint = broadcast["last_session_id"]
+        semaphore = asyncio.Semaphore(BroadcastConfig.CONCURRENCY)
+        reported = 0.0
+
+        with send_priority(Lane.BROADCAST):
+            while True:
+                if get_broadcast(broadcast_id)["status"] != "running":
+                    break
+                chunk = get_broadcast_recipients(
+                    checkpoint, BroadcastConfig.CHUNK_SIZE,
+                    broadcast["level"], broadcast["module"], broadcast["active_since"], broadcast["class_id"],
+                )
+                if not chunk:
+                    finished_at = time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime())
+                    update_broadcast(broadcast_id, status="done", finished_at=finished_at)
+                    break
+
+                started = time.monotonic()
+                await asyncio.gather(*(
+                    self._send(bot, telegram_id, broadcast["text"], counters, semaphore)
+                    for _, telegram_id in chunk
+                ))
+                checkpoint = chunk[-1][0]
+                update_broadcast(broadcast_id, last_session_id=checkpoint, **counters)
+                metrics.inc("broadcast.recipients", len(chunk))
+                metrics.observe("broadcast.chunk_seconds", time.monotonic() - started)
+
+                if time.monotonic() - reported >= BroadcastConfig.REPORT_INTERVAL:
+                    reported = time.monotonic()
+                    await self._report(bot, get_broadcast(broadcast_id))
+
+        await self._report(bot, get_broadcast(broadcast_id), final=True)
+
+
+broadcast_service = BroadcastService()
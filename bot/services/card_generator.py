@@ -45,20 +45,28 @@ class FlashcardConfig:
 
 class FlashcardGenerator:
     def __init__(self):
-        self._load_fonts()
+        # Шрифты загружаются при первой карточке, а не при импорте модуля
+        self._fonts = None
+
+    @property
+    def fonts(self):
+        if self._fonts is None:
+            self._fonts = self._load_fonts()
+        return self._fonts
 
     def _load_fonts(self):
-        self.fonts = {}
+        fonts = {}
         try:
             for key in FlashcardConfig.FONT_SIZES:
-                self.fonts[key] = ImageFont.truetype(
+                fonts[key] = ImageFont.truetype(
                     FlashcardConfig.FONT_PATHS['main'], 
                     FlashcardConfig.FONT_SIZES[key]
                 )
         except Exception as e:
             logger.warning(f"Font loading failed: {e}")
             fallback_font = ImageFont.load_default()
-            self.fonts = {k: fallback_font for k in FlashcardConfig.FONT_SIZES}
+            fonts = {k: fallback_font for k in FlashcardConfig.FONT_SIZES}
+        return fonts
 
     async def generate_flashcard(self, text: str, is_question: bool = True) -> BufferedInputFile:
         try:
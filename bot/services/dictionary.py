@@ -0,0 +1,231 @@
+"""Offline bilingual dictionary: a dump compiled into a sorted binary index read through mmap.
+
+Build the index from a tab-separated dump (optionally .gz), one entry per line:
+
+    word<TAB>translation[<TAB>part of speech[<TAB>synonym, synonym]]
+
+    python -m bot.services.dictionary build dictionary.tsv.gz --out dictionary.idx
+    python -m bot.services.dictionary lookup cat "give up"
+"""
+
+import argparse
+import gzip
+import logging
+import mmap
+import os
+import struct
+import time
+
+from bot.services.metrics import metrics
+
+
+logger = logging.getLogger(__name__)
+
+
+class DictionaryConfig:
+    PATH_ENV = "DORI_DICTIONARY"
+    DEFAULT_PATH = "dictionary.idx"
+    MAGIC = b"DORIDICT"
+    VERSION = 1
+    RELOAD_CHECK = 30.0           # секунд между проверками, не пересобран ли индекс
+    MAX_TRANSLATIONS = 3          # переводов из разных строк дампа на одно слово
+    PREFIXES = ("to ", "a ", "an ", "the ")   # «to run» ищется и как «run»
+
+
+_HEADER = struct.Struct("<8sII")  # magic, version, число записей
+_OFFSET = struct.Struct("<I")     # начало записи относительно области данных
+_FIELD = b"\x1f"                  # ключ, слово, перевод, часть речи, синонимы
+
+
+def normalize(word: str) -> str:
+    return " ".join((word or "").lower().split())
+
+
+def _read_dump(path: str) -> dict:
+    """Merge dump lines into {key: [word, translations, part of speech, synonyms]}."""
+    opener = gzip.open if path.endswith(".gz") else open
+    entries = {}
+    with opener(path, "rt", encoding="utf-8") as f:
+        for line in f:
+            if not line.strip() or line.startswith("#"):
+                continue
+            fields = [part.strip() for part in line.rstrip("\n").split("\t")] + ["", "", ""]
+            word, translation, pos, synonyms = fields[:4]
+            key = normalize(word)
+            if not key or not translation:
+                continue
+            entry = entries.get(key)
+            if entry is None:
+                entry = entries[key] = [word.strip(), [], pos, []]
+            if translation not in entry[1] and len(entry[1]) < DictionaryConfig.MAX_TRANSLATIONS:
+                entry[1].append(translation)
+            entry[2] = entry[2] or pos
+            for synonym in synonyms.split(","):
+                synonym = synonym.strip()
+                if synonym and synonym not in entry[3] and normalize(synonym) != key:
+                    entry[3].append(synonym)
+    return entries
+
+
+def build_index(dump_path: str, index_path: str) -> int:
+    """Compile a dump into an index file; returns the number of entries. Replaces the file atomically."""
+    entries = _read_dump(dump_path)
+    records = sorted(
+        (key.encode(), _FIELD.join(
+            part.replace("\x1f", " ").encode()
+            for part in (key, word, "; ".join(translations), pos, ", ".join(synonyms))
+        ))
+        for key, (word, translations, pos, synonyms) in entries.items()
+    )
+    tmp_path = index_path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(_HEADER.pack(DictionaryConfig.MAGIC, DictionaryConfig.VERSION, len(records)))
+        offset = 0
+        for _, record in records:
+            f.write(_OFFSET.pack(offset))
+            offset += len(record)
+        f.write(_OFFSET.pack(offset))
+        for _, record in records:
+            f.write(record)
+    os.replace(tmp_path, index_path)
+    return len(records)
+
+
+class OfflineDictionary:
+    """Binary search over a memory-mapped index; only the pages touched by a lookup are read.
+
+    Missing index means no suggestions. A rebuilt index file is picked up within RELOAD_CHECK
+    seconds without restarting the bot.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._mm = None
+        self._count = 0
+        self._data = 0
+        self._mtime = None
+        self._checked = None
+
+    @classmethod
+    def from_env(cls) -> "OfflineDictionary":
+        return cls(os.getenv(DictionaryConfig.PATH_ENV, DictionaryConfig.DEFAULT_PATH))
+
+    def _open(self) -> bool:
+        now = time.monotonic()
+        if self._checked is not None and now - self._checked < DictionaryConfig.RELOAD_CHECK:
+            return self._mm is not None
+        self._checked = now
+        try:
+            mtime = os.stat(self.path).st_mtime
+        except OSError:
+            self.close()
+            return False
+        if mtime == self._mtime:
+            return True
+        self.close()
+        with open(self.path, "rb") as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, count = _HEADER.unpack_from(mm, 0)
+        if magic != DictionaryConfig.MAGIC or version != DictionaryConfig.VERSION:
+            mm.close()
+            logger.error(f"{self.path} is not a dictionary index (version {DictionaryConfig.VERSION})")
+            return False
+        self._mm, self._count, self._mtime = mm, count, mtime
+        self._data = _HEADER.size + (count + 1) * _OFFSET.size
+        metrics.set("dictionary.entries", count)
+        logger.info(f"Dictionary index {self.path}: {count} entries")
+        return True
+
+    def close(self):
+        if self._mm is not None:
+            self._mm.close()
+        self._mm, self._count, self._mtime = None, 0, None
+
+    @property
+    def available(self) -> bool:
+        return self._open()
+
+    def _bounds(self, i: int):
+        start = _OFFSET.unpack_from(self._mm, _HEADER.size + i * _OFFSET.size)[0]
+        end = _OFFSET.unpack_from(self._mm, _HEADER.size + (i + 1) * _OFFSET.size)[0]
+        return self._data + start, self._data + end
+
+    def _key(self, i: int) -> bytes:
+        start, end = self._bounds(i)
+        return self._mm[start:self._mm.find(_FIELD, start, end)]
+
+    def _entry(self, i: int) -> dict:
+        start, end = self._bounds(i)
+        _, word, translation, pos, synonyms = self._mm[start:end].decode().split("\x1f")
+        return {"word": word, "translation": translation, "part_of_speech": pos or None, "synonyms": synonyms or None}
+
+    def _lower_bound(self, key: bytes) -> int:
+        lo, hi = 0, self._count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._key(mid) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def lookup(self, word: str):
+        """Entry for a word (dict with word, translation, part_of_speech, synonyms) or None."""
+        if not self._open():
+            return None
+        key = normalize(word)
+        candidates = [key] + [key[len(p):] for p in DictionaryConfig.PREFIXES if key.startswith(p)]
+        for candidate in candidates:
+            encoded = candidate.encode()
+            i = self._lower_bound(encoded)
+            if i < self._count and self._key(i) == encoded:
+                metrics.inc("dictionary.lookups", result="hit")
+                return self._entry(i)
+        metrics.inc("dictionary.lookups", result="miss")
+        return None
+
+    def complete(self, prefix: str, limit: int = 10) -> list:
+        """Up to `limit` entries whose word starts with the prefix, in index order."""
+        if not self._open():
+            return []
+        encoded = normalize(prefix).encode()
+        found = []
+        i = self._lower_bound(encoded)
+        while i < self._count and len(found) < limit and self._key(i).startswith(encoded):
+            found.append(self._entry(i))
+            i += 1
+        return found
+
+
+dictionary = OfflineDictionary.from_env()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build or query the offline dictionary index")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build = commands.add_parser("build", help="compile a TSV dump (word, translation, part of speech, synonyms)")
+    build.add_argument("dump", help="tab-separated dump, optionally .gz")
+    build.add_argument("--out", default=dictionary.path, help="index file to write")
+    lookup = commands.add_parser("lookup", help="look words up in the index")
+    lookup.add_argument("words", nargs="+")
+    lookup.add_argument("--index", default=dictionary.path)
+    args = parser.parse_args()
+
+    if args.command == "build":
+        started = time.monotonic()
+        count = build_index(args.dump, args.out)
+        print(f"{count} entries -> {args.out} ({os.path.getsize(args.out) // 1024} KB) "
+              f"in {time.monotonic() - started:.1f} s")
+        return
+    index = OfflineDictionary(args.index)
+    if not index.available:
+        parser.error(f"no dictionary index at {args.index}")
+    for word in args.words:
+        started = time.perf_counter()
+        entry = index.lookup(word)
+        elapsed_us = (time.perf_counter() - started) * 1e6
+        print(f"{word}: {entry} ({elapsed_us:.0f} µs)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+import logging
+import random
+import time
+
+from bot.database.db_helpers import add_word_listener, get_teacher_word_keys
+from bot.services.metrics import metrics
+
+
+logger = logging.getLogger(__name__)
+
+
+class DistractorConfig:
+    OPTIONS = 4              # вариантов ответа вместе с правильным
+    ATTEMPTS_PER_TIER = 12   # случайных выборок в группе, прежде чем перейти к более широкой
+
+
+def _norm(value) -> str:
+    return (value or "").strip().lower()
+
+
+def _tier_keys(class_id, part_of_speech, level, module) -> list:
+    """Group keys from the most specific (same part of speech, level and module) to the whole class."""
+    class_id = class_id or 0
+    pos, level, module = _norm(part_of_speech), _norm(level), _norm(module)
+    return [
+        ("module", class_id, pos, level, module),
+        ("level", class_id, pos, level),
+        ("pos", class_id, pos),
+        ("class", class_id),
+    ]
+
+
+class _Group:
+    """Word ids with O(1) add, remove (swap with the last) and random choice."""
+
+    __slots__ = ("ids", "positions")
+
+    def __init__(self):
+        self.ids = []
+        self.positions = {}
+
+    def add(self, word_id):
+        if word_id not in self.positions:
+            self.positions[word_id] = len(self.ids)
+            self.ids.append(word_id)
+
+    def remove(self, word_id):
+        index = self.positions.pop(word_id, None)
+        if index is None:
+            return
+        last = self.ids.pop()
+        if last != word_id:
+            self.ids[index] = last
+            self.positions[last] = index
+
+
+class DistractorIndex:
+    """In-memory groups of teacher words for multiple-choice distractors.
+
+    Words are grouped by (class, part of speech, level, module) plus three wider tiers, so
+    a question is answered from memory with a few random picks. The index is built on first
+    use and then kept current by the db_helpers word listeners.
+    """
+
+    def __init__(self):
+        self._groups = {}
+        self._words = {}     # Word_ID -> (Text, ключи групп)
+        self._loaded = False
+
+    def _add(self, word_id, text, part_of_speech, level, module, class_id):
+        keys = _tier_keys(class_id, part_of_speech, level, module)
+        self._words[word_id] = (text, keys)
+        for key in keys:
+            group = self._groups.get(key)
+            if group is None:
+                group = self._groups[key] = _Group()
+            group.add(word_id)
+
+    def _remove(self, word_id):
+        entry = self._words.pop(word_id, None)
+        if entry is None:
+            return
+        for key in entry[1]:
+            group = self._groups[key]
+            group.remove(word_id)
+            if not group.ids:
+                del self._groups[key]
+
+    def load(self):
+        started = time.monotonic()
+        self._groups, self._words = {}, {}
+        for row in get_teacher_word_keys():
+            self._add(*row)
+        self._loaded = True
+        metrics.set("distractors.words", len(self._words))
+        logger.info(f"Distractor index: {len(self._words)} words, {len(self._groups)} groups "
+                    f"in {time.monotonic() - started:.2f} s")
+
+    def refresh(self, word_ids):
+        """Word listener: re-read only the changed words."""
+        if not self._loaded:
+            return
+        for word_id in word_ids:
+            self._remove(word_id)
+        for row in get_teacher_word_keys(word_ids):
+            self._add(*row)
+        metrics.set("distractors.words", len(self._words))
+
+    def pick(self, word: dict, class_id=None, count: int = DistractorConfig.OPTIONS - 1) -> list:
+        """Up to `count` distractor texts for a word from get_words(), different from its answer and synonyms."""
+        if not self._loaded:
+            self.load()
+        taken = {_norm(word["Text"])} | {_norm(s) for s in (word.get("synonyms") or "").split(",")}
+        picked = []
+        for key in _tier_keys(class_id, word.get("part_of_speech"), word.get("level"), word.get("module")):
+            group = self._groups.get(key)
+            if group is None:
+                continue
+            for _ in range(DistractorConfig.ATTEMPTS_PER_TIER):
+                text = self._words[random.choice(group.ids)][0]
+                if _norm(text) not in taken:
+                    taken.add(_norm(text))
+                    picked.append(text)
+                    if len(picked) == count:
+                        metrics.inc("distractors.tier", tier=key[0])
+                        return picked
+        metrics.inc("distractors.tier", tier="short")
+        return picked
+
+
+distractor_index = DistractorIndex()
+add_word_listener(distractor_index.refresh)
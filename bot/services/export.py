@@ -0,0 +1,93 @@
+import csv
+import gzip
+import json
+import os
+import tempfile
+from datetime import datetime
+
+from bot.database.db_helpers import get_connection
+
+
+class ExportConfig:
+    FORMATS = ("csv", "jsonl")
+    FETCH_SIZE = 1000   # строк за один fetchmany — память не зависит от размера таблицы
+
+
+# Название выгрузки -> (SQL, колонки). :session_id — сессия того, кто выгружает;
+# выгрузки преподавателя ограничены его активным классом.
+_SESSION_CLASS = "(SELECT Class_ID FROM StudentSession WHERE StudentSession_ID = :session_id)"
+
+EXPORT_QUERIES = {
+    "words": (f"""
+        SELECT Word_ID, Text, translation, part_of_speech, level, module, synonyms, created_at
+        FROM Word WHERE added_by = 'teacher' AND Class_ID IS {_SESSION_CLASS}
+        ORDER BY Word_ID
+    """, ["Word_ID", "Text", "translation", "part_of_speech", "level", "module", "synonyms", "created_at"]),
+    "cohort_progress": (f"""
+        SELECT p.StudentSession_ID, ss.level, p.Word_ID, w.Text, w.translation, w.module,
+               p.correct_count, p.incorrect_count, p.last_practiced
+        FROM PracticeProgress p
+        JOIN StudentSession ss ON ss.StudentSession_ID = p.StudentSession_ID AND ss.role = 'student'
+                                AND ss.Class_ID IS {_SESSION_CLASS}
+        LEFT JOIN Word w ON w.Word_ID = p.Word_ID
+        ORDER BY p.StudentSession_ID, p.Word_ID
+    """, ["StudentSession_ID", "level", "Word_ID", "Text", "translation", "module",
+          "correct_count", "incorrect_count", "last_practiced"]),
+    "dictionary": ("""
+        SELECT Word_ID, Text, translation, part_of_speech, module, synonyms, created_at
+        FROM Word WHERE StudentSession_ID = :session_id
+        ORDER BY Word_ID
+    """, ["Word_ID", "Text", "translation", "part_of_speech", "module", "synonyms", "created_at"]),
+    "progress": ("""
+        SELECT p.Word_ID, w.Text, w.translation, w.module, p.correct_count, p.incorrect_count, p.last_practiced
+        FROM PracticeProgress p
+        LEFT JOIN Word w ON w.Word_ID = p.Word_ID
+        WHERE p.StudentSession_ID = :session_id
+        ORDER BY p.Word_ID
+    """, ["Word_ID", "Text", "translation", "module", "correct_count", "incorrect_count", "last_practiced"]),
+}
+
+
+def _write_csv(f, columns, batches):
+    writer = csv.writer(f)
+    writer.writerow(columns)
+    for rows in batches:
+        writer.writerows(rows)
+
+
+def _write_jsonl(f, columns, batches):
+    for rows in batches:
+        for row in rows:
+            f.write(json.dumps(dict(zip(columns, row)), ensure_ascii=False, default=str))
+            f.write("\n")
+
+
+def export_to_file(name: str, fmt: str = "csv", session_id: int = None, directory: str = None) -> tuple:
+    """Stream an export into a gzip file; returns (path, filename, row count). The caller removes the file."""
+    if fmt not in ExportConfig.FORMATS:
+        raise ValueError(f"Неизвестный формат: {fmt}")
+    query, columns = EXPORT_QUERIES[name]
+    filename = f"{name}_{datetime.now():%Y%m%d_%H%M}.{fmt}.gz"
+    fd, path = tempfile.mkstemp(suffix=f".{fmt}.gz", dir=directory)
+    os.close(fd)
+
+    count = 0
+    try:
+        with get_connection() as conn, gzip.open(path, "wt", encoding="utf-8", newline="") as f:
+            cur = conn.cursor()
+            cur.execute(query, {"session_id": session_id})
+
+            def batches():
+                nonlocal count
+                while True:
+                    rows = cur.fetchmany(ExportConfig.FETCH_SIZE)
+                    if not rows:
+                        return
+                    count += len(rows)
+                    yield rows
+
+            (_write_csv if fmt == "csv" else _write_jsonl)(f, columns, batches())
+    except Exception:
+        os.remove(path)
+        raise
+    return path, filename, count
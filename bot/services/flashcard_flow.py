@@ -0,0 +1,113 @@
+import html
+import logging
+import random
+
+from aiogram import types
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.fsm.context import FSMContext
+from aiogram.types import InlineKeyboardMarkup, InputMediaPhoto
+
+from bot.database.db_helpers import complete_module
+from bot.services.achievements import achievement_engine, format_new_achievements
+from bot.services.card_generator import generate_flashcard_image
+
+
+logger = logging.getLogger(__name__)
+
+# Telegram ограничивает подпись к фото 1024 символами
+CAPTION_LIMIT = 1024
+# Во сколько раз чаще в начало колоды попадает слово, на котором ошибаются всегда, чем лёгкое
+DECK_DIFFICULTY_WEIGHT = 4.0
+# Слово ещё без статистики считается средней сложности
+DECK_DEFAULT_DIFFICULTY = 0.3
+
+
+def order_deck(words: list) -> list:
+    """Shuffle words in place so that harder ones tend to come first.
+
+    Weighted random order (Efraimidis–Spirakis): each word draws random() ** (1 / weight), the
+    deck is sorted by the draw. Weight grows with the cohort error rate from WordDifficulty.
+    """
+    def draw(word):
+        difficulty = word.get("difficulty")
+        if difficulty is None:
+            difficulty = DECK_DEFAULT_DIFFICULTY
+        return random.random() ** (1 / (1 + (DECK_DIFFICULTY_WEIGHT - 1) * difficulty))
+
+    words.sort(key=draw, reverse=True)
+    return words
+
+
+def grade_answer(word: dict, user_input: str) -> tuple:
+    """Return (is_correct, feedback HTML) for a typed answer."""
+    user_input = user_input.strip().lower()
+    correct = word["Text"].strip().lower()
+    synonyms = [s.strip().lower() for s in (word.get("synonyms") or "").split(",")]
+    is_correct = user_input == correct or user_input in synonyms
+
+    feedback = (
+        "✅ Верно!" if user_input == correct else
+        "✅ Верно (синоним)!" if user_input in synonyms else
+        f"❌ Неверно.\nПравильный ответ: <b>{html.escape(word['Text'])}</b>"
+    )
+    feedback += f"\nСинонимы: {html.escape(word.get('synonyms') or 'не указаны')}"
+    return is_correct, feedback
+
+
+def _caption(feedback: str, prompt: str) -> str:
+    if feedback and len(feedback) + len(prompt) + 2 > CAPTION_LIMIT:
+        # Обрезаем только отзыв: обрезанный HTML-тег сломал бы всю подпись
+        feedback = html.escape(html.unescape(feedback.replace("<b>", "").replace("</b>", "")))
+        feedback = feedback[:CAPTION_LIMIT - len(prompt) - 3] + "…"
+    return f"{feedback}\n\n{prompt}" if feedback else prompt
+
+
+async def show_card(message: types.Message, state: FSMContext, word: dict, feedback: str = None,
+                    reply_markup: InlineKeyboardMarkup = None):
+    """Show the next word in the session's card message, editing it in place (one API call per turn).
+
+    The card message id lives in FSM data under card_message_id; a new card is sent
+    when there is none yet or it can no longer be edited.
+    """
+    image = await generate_flashcard_image(word["translation"], is_question=True)
+    caption = _caption(feedback, f"Слово: <b>{html.escape(word['translation'])}</b>")
+    card_message_id = (await state.get_data()).get("card_message_id")
+
+    if card_message_id:
+        try:
+            await message.bot.edit_message_media(
+                chat_id=message.chat.id,
+                message_id=card_message_id,
+                media=InputMediaPhoto(media=image, caption=caption, parse_mode="HTML"),
+                reply_markup=reply_markup,
+            )
+            return
+        except TelegramBadRequest as e:
+            # Сообщение удалено или слишком старое — отправим новую карточку
+            logger.info(f"Card {card_message_id} not editable: {e.message}")
+
+    sent = await message.answer_photo(photo=image, caption=caption, parse_mode="HTML", reply_markup=reply_markup)
+    await state.update_data(card_message_id=sent.message_id)
+
+
+async def finish_session(message: types.Message, state: FSMContext, session_id: int,
+                         feedback: str, module: str = None):
+    """Put the last feedback and the summary into the card caption and end the session."""
+    finished = "🎉 Тренировка завершена"
+    if module and complete_module(session_id, module):
+        module_achievements = achievement_engine.on_event(session_id, "module_completed")
+        if module_achievements:
+            finished += "\n\n" + format_new_achievements(module_achievements)
+
+    card_message_id = (await state.get_data()).get("card_message_id")
+    await state.clear()
+    caption = _caption(feedback, finished)
+    if card_message_id:
+        try:
+            await message.bot.edit_message_caption(
+                chat_id=message.chat.id, message_id=card_message_id, caption=caption, parse_mode="HTML"
+            )
+            return
+        except TelegramBadRequest as e:
+            logger.info(f"Card {card_message_id} not editable: {e.message}")
+    await message.answer(caption, parse_mode="HTML")
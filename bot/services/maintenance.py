@@ -0,0 +1,179 @@
+import asyncio
+import logging
+import os
+import sqlite3
+import time
+
+from bot.database import db_helpers
+from bot.services.metrics import metrics
+from bot.services.scheduler import PeriodicTask
+
+
+logger = logging.getLogger(__name__)
+
+
+class MaintenanceConfig:
+    TICK_INTERVAL = 600           # секунд между проверками нагрузки
+    INITIAL_DELAY = 900
+    MIN_INTERVAL_HOURS = 20       # обслуживание не чаще раза в сутки
+    QUIET_UPDATES_PER_MIN = 5     # «тихое окно»: меньше стольких событий в минуту за прошлый интервал
+    ANALYSIS_LIMIT = 1000         # строк на индекс при ANALYZE — статистика приблизительная, но быстрая
+    ANALYZE_SECONDS = 5.0
+    CHECKPOINT_SECONDS = 5.0
+    VACUUM_SECONDS = 10.0
+    VACUUM_PAGES_PER_STEP = 512
+    CONVERT_SECONDS = 3.0         # разовый VACUUM для включения incremental auto_vacuum на старой базе
+    PROGRESS_OPS = 1000           # как часто SQLite проверяет ограничение по времени (инструкций VM)
+
+
+def _bound(conn: sqlite3.Connection, seconds: float):
+    """Abort the running statement once the time budget is spent (sqlite3.OperationalError: interrupted)."""
+    deadline = time.monotonic() + seconds
+    conn.set_progress_handler(lambda: int(time.monotonic() > deadline), MaintenanceConfig.PROGRESS_OPS)
+    return deadline
+
+
+def _pragma(conn: sqlite3.Connection, name: str) -> int:
+    return conn.execute(f"PRAGMA {name}").fetchone()[0]
+
+
+def _step(report: dict, name: str, seconds: float, conn: sqlite3.Connection, func):
+    started = time.monotonic()
+    deadline = _bound(conn, seconds)
+    result = {"interrupted": False}
+    try:
+        result.update(func(deadline) or {})
+    except sqlite3.OperationalError as e:
+        if "interrupted" not in str(e):
+            raise
+        result["interrupted"] = True
+        metrics.inc("maintenance.interrupted", step=name)
+    finally:
+        conn.set_progress_handler(None, 0)
+    result["seconds"] = time.monotonic() - started
+    metrics.observe("maintenance.seconds", result["seconds"], step=name)
+    report["steps"][name] = result
+
+
+def _file_size(path: str) -> int:
+    return os.path.getsize(path) if os.path.exists(path) else 0
+
+
+def run_maintenance(db_path: str) -> dict:
+    """ANALYZE, WAL checkpoint and incremental vacuum, each within its time budget. Blocking: run in a thread."""
+    started = time.monotonic()
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    report = {"steps": {}, "freelist_before": 0}
+    try:
+        report["freelist_before"] = _pragma(conn, "freelist_count")
+
+        def analyze(deadline):
+            conn.execute(f"PRAGMA analysis_limit = {MaintenanceConfig.ANALYSIS_LIMIT}")
+            if sqlite3.sqlite_version_info >= (3, 46, 0):
+                # 0x10000 — проверить все таблицы, а не только использованные этим соединением
+                conn.execute("PRAGMA optimize(0x10002)").fetchall()
+            else:
+                conn.execute("ANALYZE")
+
+        def checkpoint(deadline):
+            busy, log, done = conn.execute("PRAGMA wal_checkpoint(PASSIVE)").fetchone()
+            if busy == 0 and log == done:
+                # Всё перенесено — пробуем обрезать WAL, не дожидаясь читателей
+                conn.execute("PRAGMA busy_timeout = 0")
+                busy, log, done = conn.execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchone()
+            return {"busy": busy, "wal_frames": log, "checkpointed": done}
+
+        def vacuum(deadline):
+            if _pragma(conn, "auto_vacuum") != 2:
+                # incremental_vacuum работает только после разового VACUUM с auto_vacuum = INCREMENTAL
+                _bound(conn, MaintenanceConfig.CONVERT_SECONDS)
+                conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+                conn.execute("VACUUM")
+                return {"converted": True}
+            freed = 0
+            while time.monotonic() < deadline:
+                free = _pragma(conn, "freelist_count")
+                if not free:
+                    break
+                conn.execute(f"PRAGMA incremental_vacuum({MaintenanceConfig.VACUUM_PAGES_PER_STEP})").fetchall()
+                freed += free - _pragma(conn, "freelist_count")
+            return {"freed_pages": freed}
+
+        _step(report, "analyze", MaintenanceConfig.ANALYZE_SECONDS, conn, analyze)
+        _step(report, "vacuum", MaintenanceConfig.VACUUM_SECONDS, conn, vacuum)
+        # Контрольная точка последней: переносит в базу и страницы, освобождённые вакуумом
+        _step(report, "checkpoint", MaintenanceConfig.CHECKPOINT_SECONDS, conn, checkpoint)
+
+        report.update(
+            page_size=_pragma(conn, "page_size"),
+            pages=_pragma(conn, "page_count"),
+            freelist_after=_pragma(conn, "freelist_count"),
+            auto_vacuum=_pragma(conn, "auto_vacuum"),
+        )
+    finally:
+        conn.close()
+    report.update(
+        file_bytes=_file_size(db_path),
+        wal_bytes=_file_size(db_path + "-wal"),
+        seconds=time.monotonic() - started,
+    )
+    return report
+
+
+def format_maintenance_report(report: dict) -> str:
+    steps = ", ".join(
+        f"{name} {step['seconds']:.2f} с" + (" (прервано)" if step["interrupted"] else "")
+        for name, step in report["steps"].items()
+    )
+    return (
+        f"Файл: {report['file_bytes'] // 1024} КБ, WAL: {report['wal_bytes'] // 1024} КБ\n"
+        f"Свободных страниц: {report['freelist_before']} → {report['freelist_after']}\n"
+        f"Шаги: {steps}; всего {report['seconds']:.2f} с"
+    )
+
+
+class MaintenanceService:
+    """Runs run_maintenance at most once per MIN_INTERVAL_HOURS, when the bot has been quiet for a tick."""
+
+    def __init__(self):
+        self._task = PeriodicTask(
+            "maintenance", MaintenanceConfig.TICK_INTERVAL, self.tick, initial_delay=MaintenanceConfig.INITIAL_DELAY
+        )
+        self._last_run = None
+        self._last_updates = None
+
+    async def start(self):
+        """Dispatcher startup hook."""
+        self._task.start()
+
+    async def stop(self):
+        """Dispatcher shutdown hook."""
+        await self._task.stop()
+
+    def _quiet(self) -> bool:
+        # Обработанные события считает ThrottlingMiddleware
+        updates = metrics.total("throttle.allowed")
+        previous, self._last_updates = self._last_updates, updates
+        if previous is None:
+            return False
+        per_minute = (updates - previous) / (MaintenanceConfig.TICK_INTERVAL / 60)
+        return per_minute < MaintenanceConfig.QUIET_UPDATES_PER_MIN
+
+    async def tick(self):
+        quiet = self._quiet()
+        due = self._last_run is None or time.monotonic() - self._last_run >= MaintenanceConfig.MIN_INTERVAL_HOURS * 3600
+        if quiet and due:
+            await self.run()
+
+    async def run(self) -> dict:
+        self._last_run = time.monotonic()
+        report = await asyncio.to_thread(run_maintenance, db_helpers.DB_PATH)
+        metrics.set("maintenance.file_bytes", report["file_bytes"])
+        metrics.set("maintenance.wal_bytes", report["wal_bytes"])
+        metrics.set("maintenance.freelist_pages", report["freelist_after"])
+        metrics.inc("maintenance.runs")
+        logger.info("Database maintenance: " + format_maintenance_report(report).replace("\n", "; "))
+        return report
+
+
+maintenance_service = MaintenanceService()
@@ -0,0 +1,88 @@
+import threading
+from collections import defaultdict, deque
+from typing import Dict
+
+
+class MetricsConfig:
+    MAX_SAMPLES = 1000   # последние значения для перцентилей
+
+
+def _key(name: str, labels: Dict[str, object]) -> str:
+    if not labels:
+        return name
+    return name + "{" + ",".join(f"{k}={v}" for k, v in sorted(labels.items())) + "}"
+
+
+class Summary:
+    __slots__ = ("count", "total", "max", "samples")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.samples = deque(maxlen=MetricsConfig.MAX_SAMPLES)
+
+    def observe(self, value: float):
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+        self.samples.append(value)
+
+    def snapshot(self) -> dict:
+        ordered = sorted(self.samples)
+        p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] if ordered else 0.0
+        return {
+            "count": self.count,
+            "avg": self.total / self.count if self.count else 0.0,
+            "p95": p95,
+            "max": self.max,
+        }
+
+
+class Metrics:
+    """In-process counters, gauges and summaries shown to teachers via /metrics."""
+
+    def __init__(self):
+        self._counters = defaultdict(int)
+        self._gauges = {}
+        self._summaries = defaultdict(Summary)
+        self._lock = threading.Lock()
+
+    def inc(self, name: str, value: int = 1, **labels):
+        with self._lock:
+            self._counters[_key(name, labels)] += value
+
+    def set(self, name: str, value: float, **labels):
+        with self._lock:
+            self._gauges[_key(name, labels)] = value
+
+    def observe(self, name: str, value: float, **labels):
+        with self._lock:
+            self._summaries[_key(name, labels)].observe(value)
+
+    def total(self, name: str) -> int:
+        """Sum of a counter over all its labels."""
+        prefix = name + "{"
+        with self._lock:
+            return sum(v for k, v in self._counters.items() if k == name or k.startswith(prefix))
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "counters": dict(self._counters),
+                "gauges": dict(self._gauges),
+                "summaries": {k: s.snapshot() for k, s in self._summaries.items()},
+            }
+
+    def report(self) -> str:
+        snap = self.snapshot()
+        lines = [f"{k} = {v}" for k, v in sorted(snap["counters"].items())]
+        lines += [f"{k} = {v:g}" for k, v in sorted(snap["gauges"].items())]
+        lines += [
+            f"{k}: n={s['count']} avg={s['avg']:.3f} p95={s['p95']:.3f} max={s['max']:.3f}"
+            for k, s in sorted(snap["summaries"].items())
+        ]
+        return "\n".join(lines) or "Метрик пока нет."
+
+
+metrics = Metrics()
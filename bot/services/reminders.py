@@ -0,0 +1,100 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+
+from aiogram import Bot
+from aiogram.exceptions import TelegramAPIError, TelegramForbiddenError
+from aiogram.types import InlineKeyboardButton, InlineKeyboardMarkup
+
+from bot.database.db_helpers import get_reminder_candidates, mark_reminded, disable_reminders
+from bot.services.metrics import metrics
+from bot.services.scheduler import PeriodicTask
+from bot.services.send_scheduler import Lane, send_priority
+
+
+logger = logging.getLogger(__name__)
+
+
+class ReminderConfig:
+    TICK_INTERVAL = 300          # секунд между проверками
+    INITIAL_DELAY = 60           # не напоминать сразу после перезапуска
+    IDLE_DAYS = 3                # напоминать студентам, не занимавшимся столько дней
+    COOLDOWN_HOURS = 20          # не чаще одного напоминания за это время
+    MAX_IDLE_REMINDERS = 3       # напоминаний о простое подряд, пока студент не ответит
+    MAX_PER_TICK = 50000
+    BATCH_SIZE = 200             # отправок между отметками reminded_at
+    CONCURRENCY = 10
+    DEEP_LINK = "review"         # /start review — сразу начинает повторение
+    TEXTS = {
+        "due": "🔔 Пора повторить слова — несколько карточек уже ждут вас.",
+        "idle": "👋 Давно не виделись! Пара минут тренировки поможет не забыть выученные слова.",
+    }
+
+
+class ReminderService:
+    """Periodically reminds students with due reviews or long inactivity, honouring quiet hours."""
+
+    def __init__(self):
+        self.bot = None
+        self._task = PeriodicTask(
+            "reminders", ReminderConfig.TICK_INTERVAL, self.tick, initial_delay=ReminderConfig.INITIAL_DELAY
+        )
+
+    async def start(self, bot: Bot):
+        """Dispatcher startup hook."""
+        self.bot = bot
+        self._task.start()
+
+    async def stop(self):
+        """Dispatcher shutdown hook."""
+        await self._task.stop()
+
+    async def _markup(self) -> InlineKeyboardMarkup:
+        me = await self.bot.me()
+        return InlineKeyboardMarkup(inline_keyboard=[[InlineKeyboardButton(
+            text="🃏 Повторить сейчас", url=f"https://t.me/{me.username}?start={ReminderConfig.DEEP_LINK}"
+        )]])
+
+    async def _send(self, telegram_id: int, reason: str, markup, blocked: list, semaphore):
+        async with semaphore:
+            try:
+                await self.bot.send_message(telegram_id, ReminderConfig.TEXTS[reason], reply_markup=markup)
+                metrics.inc("reminders.sent", reason=reason)
+            except TelegramForbiddenError:
+                blocked.append(telegram_id)
+            except TelegramAPIError as e:
+                logger.warning(f"Reminder to {telegram_id} failed: {e}")
+                metrics.inc("reminders.failed")
+
+    async def tick(self):
+        now = datetime.now(timezone.utc)
+        candidates = get_reminder_candidates(
+            remind_before=(now - timedelta(hours=ReminderConfig.COOLDOWN_HOURS)).strftime("%Y-%m-%d %H:%M:%S"),
+            idle_before=(now - timedelta(days=ReminderConfig.IDLE_DAYS)).strftime("%Y-%m-%d"),
+            limit=ReminderConfig.MAX_PER_TICK,
+            max_idle_reminders=ReminderConfig.MAX_IDLE_REMINDERS,
+        )
+        metrics.set("reminders.last_tick_candidates", len(candidates))
+        if not candidates:
+            return
+
+        markup = await self._markup()
+        semaphore = asyncio.Semaphore(ReminderConfig.CONCURRENCY)
+        with send_priority(Lane.BROADCAST):
+            for i in range(0, len(candidates), ReminderConfig.BATCH_SIZE):
+                batch = candidates[i:i + ReminderConfig.BATCH_SIZE]
+                blocked = []
+                await asyncio.gather(*(
+                    self._send(telegram_id, reason, markup, blocked, semaphore)
+                    for _, telegram_id, reason in batch
+                ))
+                mark_reminded([(session_id, reason) for session_id, _, reason in batch])
+                if blocked:
+                    # Студент заблокировал бота — больше не пытаемся
+                    blocked = set(blocked)
+                    disable_reminders([session_id for session_id, telegram_id, _ in batch if telegram_id in blocked])
+                    metrics.inc("reminders.blocked", len(blocked))
+        logger.info(f"Reminder tick: {len(candidates)} students")
+
+
+reminder_service = ReminderService()
@@ -0,0 +1,53 @@
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable
+
+from bot.services.metrics import metrics
+
+
+logger = logging.getLogger(__name__)
+
+
+class PeriodicTask:
+    """Run a coroutine function every `interval` seconds in the background.
+
+    A failing run is logged and the task keeps going; runs never overlap.
+    """
+
+    def __init__(self, name: str, interval: float, func: Callable[[], Awaitable], initial_delay: float = 0.0):
+        self.name = name
+        self.interval = interval
+        self.func = func
+        self.initial_delay = initial_delay
+        self._task = None
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._loop(), name=f"periodic:{self.name}")
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def run_once(self):
+        started = time.monotonic()
+        try:
+            await self.func()
+        except Exception:
+            metrics.inc("scheduler.failures", task=self.name)
+            logger.exception(f"Periodic task {self.name} failed")
+        finally:
+            metrics.observe("scheduler.run_seconds", time.monotonic() - started, task=self.name)
+
+    async def _loop(self):
+        await asyncio.sleep(self.initial_delay)
+        while True:
+            started = time.monotonic()
+            await self.run_once()
+            await asyncio.sleep(max(0.0, self.interval - (time.monotonic() - started)))
@@ -0,0 +1,196 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.methods import DeleteMessage
+
+from bot.services.metrics import metrics
+
+
+logger = logging.getLogger(__name__)
+
+
+class Lane:
+    INTERACTIVE = 0   # ответы пользователю на его действие
+    BROADCAST = 1     # рассылки и напоминания
+    DELETION = 2      # отложенное удаление сообщений
+
+    NAMES = {INTERACTIVE: "interactive", BROADCAST: "broadcast", DELETION: "deletion"}
+
+
+class SendSchedulerConfig:
+    # (ёмкость, запросов в секунду) — лимиты Telegram с небольшим запасом
+    GLOBAL_LIMIT = (30, 28.0)
+    CHAT_LIMIT = (3, 1.0)           # личный чат: около одного сообщения в секунду
+    GROUP_LIMIT = (3, 20 / 60)      # группы: 20 сообщений в минуту
+    MAX_RETRIES = 3
+    MAX_IDLE_CHATS = 10000          # сколько корзин чатов держать до очистки
+
+
+_lane = ContextVar("send_lane", default=None)
+
+
+@contextmanager
+def send_priority(lane: int):
+    """Send everything inside the block through the given lane: with send_priority(Lane.BROADCAST): ..."""
+    token = _lane.set(lane)
+    try:
+        yield
+    finally:
+        _lane.reset(token)
+
+
+class RateBucket:
+    __slots__ = ("capacity", "rate", "tokens", "updated", "blocked_until")
+
+    def __init__(self, capacity: float, rate: float, now: float):
+        self.capacity = capacity
+        self.rate = rate
+        self.tokens = capacity
+        self.updated = now
+        self.blocked_until = 0.0
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, now: float) -> float:
+        """Seconds until a token is available (0 if one is available now)."""
+        if now < self.blocked_until:
+            return self.blocked_until - now
+        self._refill(now)
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def take(self):
+        self.tokens -= 1
+
+    def block(self, now: float, seconds: float):
+        self.blocked_until = max(self.blocked_until, now + seconds)
+        self.tokens = 0.0
+
+
+class SendScheduler(BaseRequestMiddleware):
+    """Outbound queue for Bot API calls: global and per-chat token buckets, priority lanes, retry_after.
+
+    Install with bot.session.middleware(SendScheduler()). Calls without chat_id (e.g.
+    answerCallbackQuery) skip the buckets; a retry_after on them holds back only that method.
+    """
+
+    def __init__(self):
+        now = time.monotonic()
+        self._global = RateBucket(*SendSchedulerConfig.GLOBAL_LIMIT, now)
+        self._chats = {}
+        self._method_blocks = {}          # метод без chat_id -> время окончания retry_after
+        self._queue = []                  # куча (lane, seq, chat_id, future)
+        self._seq = itertools.count()
+        self._wakeup = None
+        self._worker = None
+
+    def _chat_bucket(self, chat_id, now: float) -> RateBucket:
+        bucket = self._chats.get(chat_id)
+        if bucket is None:
+            if len(self._chats) >= SendSchedulerConfig.MAX_IDLE_CHATS:
+                self._chats = {k: b for k, b in self._chats.items() if b.wait_time(now) > 0 or b.tokens < b.capacity}
+            limit = SendSchedulerConfig.GROUP_LIMIT if str(chat_id).startswith("-") else SendSchedulerConfig.CHAT_LIMIT
+            bucket = self._chats[chat_id] = RateBucket(*limit, now)
+        return bucket
+
+    def _update_gauges(self):
+        metrics.set("send.queue_depth", len(self._queue))
+
+    async def _acquire(self, chat_id, lane: int):
+        loop = asyncio.get_running_loop()
+        if self._worker is None or self._worker.done():
+            self._wakeup = asyncio.Event()
+            self._worker = loop.create_task(self._run())
+        future = loop.create_future()
+        heapq.heappush(self._queue, (lane, next(self._seq), chat_id, future))
+        self._update_gauges()
+        self._wakeup.set()
+        started = time.monotonic()
+        await future
+        metrics.observe("send.wait_seconds", time.monotonic() - started, lane=Lane.NAMES[lane])
+
+    def _grant(self, now: float) -> float:
+        """Release every request that may go now; return seconds until the next one could."""
+        delay = None
+        waiting = []
+        while self._queue:
+            entry = heapq.heappop(self._queue)
+            lane, _, chat_id, future = entry
+            if future.done():             # ожидание отменено
+                continue
+            wait = max(self._global.wait_time(now), self._chat_bucket(chat_id, now).wait_time(now))
+            if wait > 0:
+                # Чат исчерпал лимит — не задерживаем запросы в другие чаты
+                waiting.append(entry)
+                delay = wait if delay is None else min(delay, wait)
+                if self._global.wait_time(now) > 0:
+                    break
+                continue
+            self._global.take()
+            self._chats[chat_id].take()
+            future.set_result(None)
+        for entry in waiting:
+            heapq.heappush(self._queue, entry)
+        self._update_gauges()
+        return delay
+
+    async def _run(self):
+        while True:
+            delay = self._grant(time.monotonic())
+            self._wakeup.clear()
+            if delay is None and not self._queue:
+                await self._wakeup.wait()
+                continue
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=delay)
+            except asyncio.TimeoutError:
+                pass
+
+    def _retry_after(self, chat_id, api_method: str, seconds: float):
+        now = time.monotonic()
+        if chat_id is None:
+            # Без чата лимит относится к методу — очередь сообщений не останавливаем
+            self._method_blocks[api_method] = max(self._method_blocks.get(api_method, 0.0), now + seconds)
+            return
+        self._chat_bucket(chat_id, now).block(now, seconds)
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def _wait_method(self, api_method: str):
+        blocked_until = self._method_blocks.get(api_method)
+        if blocked_until is None:
+            return
+        wait = blocked_until - time.monotonic()
+        if wait > 0:
+            await asyncio.sleep(wait)
+        elif self._method_blocks.get(api_method) == blocked_until:
+            del self._method_blocks[api_method]
+
+    async def __call__(self, make_request, bot, method):
+        chat_id = getattr(method, "chat_id", None)
+        lane = _lane.get()
+        if lane is None:
+            lane = Lane.DELETION if isinstance(method, DeleteMessage) else Lane.INTERACTIVE
+        metrics.inc("send.requests", lane=Lane.NAMES[lane])
+
+        for attempt in range(SendSchedulerConfig.MAX_RETRIES + 1):
+            if chat_id is not None:
+                await self._acquire(chat_id, lane)
+            else:
+                await self._wait_method(method.__api_method__)
+            try:
+                return await make_request(bot, method)
+            except TelegramRetryAfter as e:
+                metrics.inc("send.retry_after", lane=Lane.NAMES[lane])
+                if attempt == SendSchedulerConfig.MAX_RETRIES:
+                    raise
+                logger.warning(f"{method.__api_method__} to {chat_id}: retry after {e.retry_after} s")
+                self._retry_after(chat_id, method.__api_method__, e.retry_after)
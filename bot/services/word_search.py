@@ -0,0 +1,184 @@
+import bisect
+import logging
+import time
+
+from bot.database.db_helpers import add_word_listener, get_word_search_rows
+from bot.services.metrics import metrics
+
+
+logger = logging.getLogger(__name__)
+
+
+class WordSearchConfig:
+    LIMIT = 20                 # результатов по умолчанию
+    CANDIDATES_PER_RESULT = 4  # совпадений на результат: у слова несколько терминов
+
+
+def _norm(value) -> str:
+    norm = " ".join((value or "").lower().split())
+    return value if norm == value else norm   # уже нормализованная строка не копируется
+
+
+def _terms(text, translation, synonyms) -> tuple:
+    """Search terms of a word: text, translation, each synonym and each word of a phrase."""
+    phrases = {_norm(text), _norm(translation)} | {_norm(s.strip()) for s in (synonyms or "").split(",")}
+    phrases.discard("")
+    return tuple(phrases | {token for phrase in phrases if " " in phrase for token in phrase.split()})
+
+
+def _scope(added_by, class_id, session_id):
+    # Слова преподавателя видят все в классе (0 — без класса), слова студента — только он сам
+    return ("class", class_id or 0) if added_by == "teacher" else ("own", session_id)
+
+
+class _SortedTerms:
+    """Parallel sorted arrays of terms and word ids; insert and remove are a bisect and a list shift."""
+
+    __slots__ = ("terms", "ids")
+
+    def __init__(self):
+        self.terms = []
+        self.ids = []
+
+    def add(self, term, word_id):
+        i = bisect.bisect_right(self.terms, term)
+        self.terms.insert(i, term)
+        self.ids.insert(i, word_id)
+
+    def remove(self, term, word_id):
+        i = bisect.bisect_left(self.terms, term)
+        while i < len(self.terms) and self.terms[i] == term:
+            if self.ids[i] == word_id:
+                del self.terms[i]
+                del self.ids[i]
+                return
+            i += 1
+
+    def prefix(self, prefix, limit):
+        """(term, word id) pairs whose term starts with the prefix, at most `limit`."""
+        i = bisect.bisect_left(self.terms, prefix)
+        end = min(i + limit, len(self.terms))
+        found = []
+        while i < end and self.terms[i].startswith(prefix):
+            found.append((self.terms[i], self.ids[i]))
+            i += 1
+        return found
+
+
+class WordSearchIndex:
+    """Prefix search over Text, translation and synonyms, scoped to the words a user can see.
+
+    One sorted term array per scope: teacher words of a class and each student's own words,
+    the same split as get_words(). Built on first use and then kept current by the db_helpers
+    word listeners.
+    """
+
+    def __init__(self):
+        self._scopes = {}
+        self._words = {}    # Word_ID -> (область, термины, Text, translation, synonyms)
+        self._scope_keys = {}   # один объект-ключ на область вместо копии у каждого слова
+        self._loaded = False
+
+    def _scope(self, added_by, class_id, session_id):
+        scope = _scope(added_by, class_id, session_id)
+        return self._scope_keys.setdefault(scope, scope)
+
+    def _add(self, word_id, text, translation, synonyms, added_by, class_id, session_id):
+        scope = self._scope(added_by, class_id, session_id)
+        terms = _terms(text, translation, synonyms)
+        self._words[word_id] = (scope, terms, text, translation, synonyms)
+        index = self._scopes.get(scope)
+        if index is None:
+            index = self._scopes[scope] = _SortedTerms()
+        for term in terms:
+            index.add(term, word_id)
+
+    def _remove(self, word_id):
+        entry = self._words.pop(word_id, None)
+        if entry is None:
+            return
+        index = self._scopes[entry[0]]
+        for term in entry[1]:
+            index.remove(term, word_id)
+        if not index.terms:
+            del self._scopes[entry[0]]
+
+    def load(self):
+        started = time.monotonic()
+        self._scopes, self._words, self._scope_keys = {}, {}, {}
+        rows = get_word_search_rows()
+        # Массивы собираются сортировкой целиком, а не вставками по одной
+        pairs = {}
+        for word_id, text, translation, synonyms, added_by, class_id, session_id in rows:
+            scope = self._scope(added_by, class_id, session_id)
+            terms = _terms(text, translation, synonyms)
+            self._words[word_id] = (scope, terms, text, translation, synonyms)
+            pairs.setdefault(scope, []).extend((term, word_id) for term in terms)
+        for scope, scope_pairs in pairs.items():
+            scope_pairs.sort()
+            index = self._scopes[scope] = _SortedTerms()
+            index.terms = [term for term, _ in scope_pairs]
+            index.ids = [word_id for _, word_id in scope_pairs]
+        self._loaded = True
+        metrics.set("word_search.words", len(self._words))
+        logger.info(f"Word search index: {len(self._words)} words, {len(self._scopes)} scopes "
+                    f"in {time.monotonic() - started:.2f} s")
+
+    def refresh(self, word_ids):
+        """Word listener: re-read only the changed words."""
+        if not self._loaded:
+            return
+        for word_id in word_ids:
+            self._remove(word_id)
+        for row in get_word_search_rows(word_ids):
+            self._add(*row)
+        metrics.set("word_search.words", len(self._words))
+
+    def _ensure_loaded(self):
+        if not self._loaded:
+            self.load()
+
+    def is_visible(self, session_id, class_id, word_id) -> bool:
+        self._ensure_loaded()
+        entry = self._words.get(word_id)
+        return entry is not None and entry[0] in (("class", class_id or 0), ("own", session_id))
+
+    def search(self, session_id, class_id, query, limit: int = WordSearchConfig.LIMIT) -> list:
+        """Words visible to the session whose text, translation or a synonym starts with the query.
+
+        Exact matches come first, then the shortest matching terms. Returns get_words()-style dicts.
+        """
+        self._ensure_loaded()
+        started = time.perf_counter()
+        prefix = _norm(query)
+        if not prefix:
+            return []
+        candidates = []
+        for scope in (("class", class_id or 0), ("own", session_id)):
+            index = self._scopes.get(scope)
+            if index is not None:
+                candidates += index.prefix(prefix, limit * WordSearchConfig.CANDIDATES_PER_RESULT)
+        candidates.sort(key=lambda c: (c[0] != prefix, len(c[0]), c[0]))
+        results, seen = [], set()
+        for _, word_id in candidates:
+            if word_id in seen:
+                continue
+            seen.add(word_id)
+            _, _, text, translation, synonyms = self._words[word_id]
+            results.append({"Word_ID": word_id, "Text": text, "translation": translation, "synonyms": synonyms})
+            if len(results) == limit:
+                break
+        metrics.observe("word_search.seconds", time.perf_counter() - started)
+        return results
+
+    def find_exact(self, session_id, class_id, text):
+        """A visible word whose Text equals `text` ignoring case and spaces, or None."""
+        key = _norm(text)
+        for word in self.search(session_id, class_id, text):
+            if _norm(word["Text"]) == key:
+                return word
+        return None
+
+
+word_search = WordSearchIndex()
+add_word_listener(word_search.refresh)
@@ -0,0 +1,83 @@
+import asyncio
+import os
+import sqlite3
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+from bot.database import db_helpers
+from bot.database.schema import initialize_db
+from bot.services.answer_log import AnswerLog
+
+
+class AnswerEventRollupTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.dir.name, "test.db")
+        self._saved_path = db_helpers.DB_PATH
+        db_helpers.DB_PATH = self.db_path
+
+    def tearDown(self):
+        db_helpers.DB_PATH = self._saved_path
+        self.dir.cleanup()
+
+    def _answers(self):
+        with sqlite3.connect(self.db_path) as conn:
+            return conn.execute("SELECT SUM(correct + incorrect) FROM DailyStudentStats").fetchone()[0]
+
+    def _insert_rollup_prune(self):
+        old = int(time.time()) - 86400
+        db_helpers.insert_answer_events([(1, 1, 1, old), (1, 2, 0, old), (1, 3, 1, old)])
+        self.assertEqual(db_helpers.rollup_answer_events(100), 3)
+        self.assertEqual(db_helpers.prune_answer_events(int(time.time()), "0000-00-00"), 3)
+
+    def test_events_after_prune_empties_table_are_rolled_up(self):
+        initialize_db(self.db_path)
+        self._insert_rollup_prune()
+
+        db_helpers.insert_answer_events([(1, 4, 1, int(time.time()))])
+        self.assertEqual(db_helpers.rollup_answer_events(100), 1)
+        self.assertEqual(self._answers(), 4)
+
+    def test_upgrade_of_emptied_table_without_autoincrement(self):
+        initialize_db(self.db_path)
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute("DROP TABLE AnswerEvent")
+            conn.execute("""
+                CREATE TABLE AnswerEvent (
+                    AnswerEvent_ID INTEGER PRIMARY KEY,
+                    StudentSession_ID INTEGER NOT NULL,
+                    Word_ID INTEGER NOT NULL,
+                    is_correct INTEGER NOT NULL,
+                    answered_at INTEGER NOT NULL
+                )
+            """)
+        self._insert_rollup_prune()
+
+        initialize_db(self.db_path)
+        db_helpers.insert_answer_events([(1, 4, 1, int(time.time()))])
+        self.assertEqual(db_helpers.rollup_answer_events(100), 1)
+        self.assertEqual(self._answers(), 4)
+
+
+class AnswerLogFlushTest(unittest.TestCase):
+    def test_failed_write_keeps_events_buffered(self):
+        log = AnswerLog()
+        log.record(1, 1, True)
+        log.record(1, 2, False)
+
+        with mock.patch("bot.services.answer_log.insert_answer_events", side_effect=sqlite3.OperationalError("locked")):
+            with self.assertRaises(sqlite3.OperationalError):
+                asyncio.run(log.flush())
+        self.assertEqual([event[:3] for event in log._buffer], [(1, 1, 1), (1, 2, 0)])
+
+        written = []
+        with mock.patch("bot.services.answer_log.insert_answer_events", side_effect=written.extend):
+            asyncio.run(log.flush())
+        self.assertEqual(len(written), 2)
+        self.assertEqual(log._buffer, [])
+
+
+if __name__ == "__main__":
+    unittest.main()